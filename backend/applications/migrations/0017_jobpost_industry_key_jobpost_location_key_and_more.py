@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:07
+
+from django.db import migrations, models
+
+
+def fill_keys(apps, schema_editor):
+    JobPost = apps.get_model('applications', 'JobPost')
+    jobs = list(JobPost.objects.only('location', 'industry'))
+    for job in jobs:
+        job.location_key = " ".join((job.location or "").lower().split())
+        job.industry_key = " ".join((job.industry or "").lower().split())
+    JobPost.objects.bulk_update(jobs, ['location_key', 'industry_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0016_jobpost_skill_ids'),
+        ('recruiters', '0004_alter_recruiter_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='industry_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='location_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['industry_key', 'location_key', 'duration_of_internship'], name='application_industr_d0917a_idx'),
+        ),
+        migrations.RunPython(fill_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0017_jobpost_industry_key_jobpost_location_key_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='jobpost',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -3,7 +3,7 @@ from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-from candidates.models import Candidate
+from candidates.models import Candidate, normalized_key
 from recruiters.models import Recruiter
 
 
@@ -61,17 +61,42 @@ class JobPost(models.Model):
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change-feed watermark for matching_server
+
+    # Maintained by matching.signals; drives `run_matching --incremental`
+    match_fingerprint = models.CharField(max_length=64, blank=True, default='')
+    match_dirty = models.BooleanField(default=True, db_index=True)
+    skill_ids = models.JSONField(default=list, blank=True)  # sorted matching.Skill ids
+
+    # Normalized copies of location / industry for indexed recommendation filters
+    location_key = models.CharField(max_length=100, blank=True, default='', editable=False)
+    industry_key = models.CharField(max_length=200, blank=True, default='', editable=False)
+
+    KEY_FIELDS = {'location': 'location_key', 'industry': 'industry_key'}
 
     objects = models.Manager()
     active_jobs = ActiveJobManager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['industry_key', 'location_key', 'duration_of_internship']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.recruiter.user.email}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        for source, key in self.KEY_FIELDS.items():
+            setattr(self, key, normalized_key(getattr(self, source)))
+            if update_fields is not None and source in update_fields:
+                kwargs['update_fields'] = update_fields = {*update_fields, key}
+        if update_fields is not None:
+            # auto_now is only written when listed
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+
     def clean(self):
         # Prevent past deadlines
         if self.application_deadline and self.application_deadline < timezone.now().date():
@@ -105,7 +130,7 @@ class Application(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     applied_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change-feed watermark for matching_server
 
     additional_skills = models.JSONField(default=list, blank=True)
 
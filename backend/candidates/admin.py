@@ -1,8 +1,25 @@
 from django.contrib import admin
-from .models import Candidate
+from .models import Candidate, ResumeAnalysis, ResumeAnalysisJob
 # Register your models here.
 @admin.register(Candidate)
 class CandidateAdmin(admin.ModelAdmin):
     list_display = ('user', 'seeking_job', 'registered_with_overseer')
     list_filter = ('registered_with_overseer', 'seeking_job')
-    search_fields = ('user__username', 'user__email')
\ No newline at end of file
+    search_fields = ('user__username', 'user__email')
+
+
+@admin.register(ResumeAnalysisJob)
+class ResumeAnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'candidate', 'application', 'status', 'attempts', 'resume_score', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('candidate__user__username', 'candidate__user__email')
+    readonly_fields = ('analysis', 'skills', 'education', 'resume_score', 'error', 'attempts',
+                       'created_at', 'started_at', 'finished_at')
+
+
+@admin.register(ResumeAnalysis)
+class ResumeAnalysisAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'parser_version', 'score', 'analyzed_at')
+    list_filter = ('parser_version',)
+    search_fields = ('sha256',)
+    readonly_fields = ('sha256', 'parser_version', 'text', 'skills', 'education', 'score', 'analyzed_at')
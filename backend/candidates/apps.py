@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CandidatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'candidates'
+
+    def ready(self):
+        if getattr(settings, 'RESUME_PARSER_WARMUP', False):
+            from .resume_parser import warmup_resume_parser
+            warmup_resume_parser()
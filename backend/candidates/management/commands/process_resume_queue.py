@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from candidates.tasks import process_batch, DEFAULT_RESUME_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Drain the resume analysis queue filled when candidates apply with a resume."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_RESUME_BATCH_SIZE,
+            help="Number of queued resumes claimed per batch.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty instead of polling for new work.",
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            summary = process_batch(options['batch_size'])
+            if summary is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            processed += summary['jobs']
+            self.stdout.write(
+                f"Analyzed {summary['jobs']} resumes: {summary['completed']} completed, "
+                f"{summary['failed']} failed."
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Resume queue drained. {processed} resumes processed."))
@@ -0,0 +1,60 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from candidates.models import Candidate
+from candidates.reanalysis import reanalyze_resumes, DEFAULT_CHUNK_SIZE
+from candidates.resume_parser import DEFAULT_BATCH_TOKENS
+
+
+def _id_list(value):
+    try:
+        return [int(i) for i in value.split(',') if i.strip()]
+    except ValueError:
+        raise CommandError(f"Expected comma-separated ids, got {value!r}.")
+
+
+class Command(BaseCommand):
+    help = "Re-analyze every stored candidate resume with batched NER inference and update skills and scores."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Processes extracting resume text (default: one per CPU; 1 extracts in-process).",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Candidates read, analyzed and written per chunk.",
+        )
+        parser.add_argument(
+            '--max-tokens', type=int, default=DEFAULT_BATCH_TOKENS,
+            help="Padded tokens (longest resume x batch size) per NER mini-batch.",
+        )
+        parser.add_argument(
+            '--candidates', type=_id_list,
+            metavar='IDS', help="Comma-separated candidate ids to re-analyze instead of everyone.",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Re-parse resumes even when a result for the current parser version is cached.",
+        )
+
+    def handle(self, *args, **options):
+        candidates = None
+        if options['candidates']:
+            candidates = Candidate.objects.filter(id__in=options['candidates'])
+
+        def progress(summary):
+            self.stdout.write(
+                f"{summary['documents']} resumes: {summary['parsed']} parsed, {summary['cached']} cached, "
+                f"{summary['failed']} failed ({summary['docs_per_second']:.1f} docs/s)"
+            )
+
+        summary = reanalyze_resumes(
+            candidates=candidates, workers=options['workers'], chunk_size=options['chunk_size'],
+            max_tokens=options['max_tokens'], force=options['force'], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Re-analyzed {summary['documents']} resumes in {summary['seconds']:.1f}s "
+            f"({summary['docs_per_second']:.1f} docs/s): {summary['updated']} candidates updated, "
+            f"{summary['parsed']} parsed, {summary['cached']} from cache, {summary['failed']} failed."
+        ))
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from candidates.models import ResumeAnalysis
+from candidates.resume_parser import NER_MODEL, PARSER_VERSION, cached_model_path, get_resume_parser
+from candidates.tasks import queue_status
+
+
+def _mb(value):
+    return "n/a" if value is None else f"{value / 2 ** 20:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the resume analysis state shared by every process: whether the NER model is downloaded, "
+        "the analysis queue depth and the result cache. --load also loads the model in this process "
+        "to measure load time and memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--load', action='store_true',
+                            help="Load and warm up the model here, measuring load time and memory.")
+        parser.add_argument('--json', action='store_true', help="Print the status as JSON.")
+
+    def handle(self, *args, **options):
+        queue = queue_status()
+        status = {
+            'model': NER_MODEL,
+            'parser_version': PARSER_VERSION,
+            'model_path': cached_model_path(),
+            'queue': queue,
+            'cached_analyses': ResumeAnalysis.objects.filter(parser_version=PARSER_VERSION).count(),
+        }
+        if options['load']:
+            parser = get_resume_parser()
+            parser.warmup()
+            status['load'] = parser.status()
+
+        if options['json']:
+            self.stdout.write(json.dumps(status, default=str))
+            return
+        self.stdout.write(f"Model:      {NER_MODEL} (parser version {PARSER_VERSION})")
+        self.stdout.write(f"Downloaded: {status['model_path'] or 'no, fetched on first load'}")
+        jobs = queue['jobs']
+        self.stdout.write(
+            f"Queue:      {jobs['pending']} pending, {jobs['running']} running "
+            f"({queue['stale_running']} past the timeout), {jobs['failed']} failed, {jobs['completed']} completed"
+        )
+        if queue['oldest_pending_at']:
+            waiting = (timezone.now() - queue['oldest_pending_at']).total_seconds()
+            self.stdout.write(f"Oldest:     pending for {waiting:.0f}s")
+        self.stdout.write(f"Cached:     {status['cached_analyses']} analyses")
+        if options['load']:
+            load = status['load']
+            self.stdout.write(f"Load time:  {load['load_seconds']:.2f}s")
+            self.stdout.write(f"Load RSS:   {_mb(load['load_rss_bytes'])}")
+            self.stdout.write(f"RSS now:    {_mb(load['rss_bytes'])}")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0015_remove_candidate_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='match_dirty',
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='match_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
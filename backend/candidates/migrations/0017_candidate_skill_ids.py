@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0016_candidate_match_dirty_candidate_match_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='skill_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_keys(apps, schema_editor):
+    Candidate = apps.get_model('candidates', 'Candidate')
+    candidates = list(Candidate.objects.only('city', 'employment_type'))
+    for candidate in candidates:
+        candidate.city_key = " ".join((candidate.city or "").lower().split())
+        candidate.employment_type_key = " ".join((candidate.employment_type or "").lower().split())
+    Candidate.objects.bulk_update(candidates, ['city_key', 'employment_type_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0017_candidate_skill_ids'),
+        ('universities', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='city_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='employment_type_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['employment_type_key', 'city_key'], name='candidates__employm_2b94b7_idx'),
+        ),
+        migrations.RunPython(fill_keys, migrations.RunPython.noop),
+    ]
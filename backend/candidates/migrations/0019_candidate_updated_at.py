@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0018_candidate_city_key_candidate_employment_type_key_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
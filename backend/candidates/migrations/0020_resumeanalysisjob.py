@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0018_application_updated_at_jobpost_updated_at'),
+        ('candidates', '0019_candidate_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeAnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resume', models.FileField(upload_to='resumes/')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('skills', models.JSONField(blank=True, default=list)),
+                ('education', models.JSONField(blank=True, default=list)),
+                ('resume_score', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('application', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resume_analyses', to='applications.application')),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resume_analyses', to='candidates.candidate')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
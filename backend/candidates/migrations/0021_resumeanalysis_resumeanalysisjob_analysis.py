@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0020_resumeanalysisjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('parser_version', models.PositiveIntegerField()),
+                ('text', models.TextField(blank=True)),
+                ('skills', models.JSONField(blank=True, default=list)),
+                ('education', models.JSONField(blank=True, default=list)),
+                ('score', models.IntegerField(default=0)),
+                ('analyzed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'resume analyses',
+            },
+        ),
+        migrations.AddField(
+            model_name='resumeanalysisjob',
+            name='analysis',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='candidates.resumeanalysis'),
+        ),
+    ]
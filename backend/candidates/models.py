@@ -2,6 +2,11 @@ from django.db import models
 from users.models import User
 
 
+def normalized_key(value):
+    """Lowercased, whitespace-collapsed form used for indexed equality filters."""
+    return " ".join((value or "").lower().split())
+
+
 class Candidate(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='candidate_profile')
     professional_title = models.CharField(max_length=100)
@@ -24,7 +29,94 @@ class Candidate(models.Model):
     registered_with_overseer = models.BooleanField(default=False)
     seeking_job = models.BooleanField(default=True)
     cover_letter = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # change-feed watermark for matching_server
+
+    # Maintained by matching.signals; drives `run_matching --incremental`
+    match_fingerprint = models.CharField(max_length=64, blank=True, default='')
+    match_dirty = models.BooleanField(default=True, db_index=True)
+    skill_ids = models.JSONField(default=list, blank=True)  # sorted matching.Skill ids
+
+    # Normalized copies of city / employment_type for indexed recommendation filters
+    city_key = models.CharField(max_length=100, blank=True, default='', editable=False)
+    employment_type_key = models.CharField(max_length=50, blank=True, default='', editable=False)
+
+    KEY_FIELDS = {'city': 'city_key', 'employment_type': 'employment_type_key'}
+
+    class Meta:
+        indexes = [models.Index(fields=['employment_type_key', 'city_key'])]
 
-    
     def __str__(self):
         return f"{self.user.username} - Candidate"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        for source, key in self.KEY_FIELDS.items():
+            setattr(self, key, normalized_key(getattr(self, source)))
+            if update_fields is not None and source in update_fields:
+                kwargs['update_fields'] = update_fields = {*update_fields, key}
+        if update_fields is not None:
+            # auto_now is only written when listed
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+
+
+class ResumeAnalysis(models.Model):
+    """
+    Parser output for one resume file, keyed by the SHA-256 of its bytes so
+    a resume uploaded to many jobs is only parsed once. Rows from an older
+    resume_parser.PARSER_VERSION are treated as misses and overwritten.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    parser_version = models.PositiveIntegerField()
+    text = models.TextField(blank=True)
+    skills = models.JSONField(default=list, blank=True)
+    education = models.JSONField(default=list, blank=True)
+    score = models.IntegerField(default=0)
+    analyzed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'resume analyses'
+
+    def __str__(self):
+        return f"Resume {self.sha256[:12]} (parser v{self.parser_version})"
+
+
+class ResumeAnalysisJob(models.Model):
+    """
+    Queued text extraction and entity analysis of one resume, drained by
+    `manage.py process_resume_queue`. Candidates poll it for the outcome.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='resume_analyses')
+    application = models.ForeignKey('applications.Application', null=True, blank=True,
+                                    on_delete=models.SET_NULL, related_name='resume_analyses')
+    resume = models.FileField(upload_to='resumes/')
+    analysis = models.ForeignKey(ResumeAnalysis, null=True, blank=True, on_delete=models.SET_NULL,
+                                 related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    skills = models.JSONField(default=list, blank=True)
+    education = models.JSONField(default=list, blank=True)
+    resume_score = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Resume analysis #{self.pk} for {self.candidate.user.username} ({self.status})"
@@ -0,0 +1,145 @@
+"""
+Bulk re-analysis of every stored Candidate.resume, e.g. after a parser
+improvement.
+
+Candidates are streamed in chunks. For each chunk, resumes whose SHA-256 is
+already in ResumeAnalysis for the current PARSER_VERSION are reused; the
+rest have their text extracted in a process pool and go through the NER
+pipeline in token-budgeted mini-batches (ResumeParser.extract_entities_batch)
+instead of one sequence at a time. Results are cached and written back with
+bulk_update; since that skips Candidate.save() and its post_save receivers,
+updated_at and the matching change markers are maintained here.
+
+Resumes must be on storage with local paths.
+"""
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Candidate, ResumeAnalysis
+from .resume_parser import DEFAULT_BATCH_TOKENS, PARSER_VERSION, extract_resume_text, get_resume_parser
+from .tasks import file_sha256
+
+DEFAULT_CHUNK_SIZE = 256
+
+CANDIDATE_FIELDS = ('id', 'resume', 'skills', 'resume_score', 'professional_title', 'degree', 'city',
+                    'match_fingerprint', 'match_dirty', 'skill_ids', 'updated_at')
+
+
+def _chunks(queryset, size):
+    chunk = []
+    for row in queryset.iterator(chunk_size=size):
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_chunk(files, pool=None, max_tokens=DEFAULT_BATCH_TOKENS, force=False):
+    """
+    Returns ({sha256: ResumeAnalysis}, {sha256: error}, parsed) for
+    {sha256: local path}, parsing only files without a current cached result
+    (or every file with force).
+    """
+    analyses = {} if force else {
+        a.sha256: a for a in ResumeAnalysis.objects.filter(sha256__in=list(files), parser_version=PARSER_VERSION)
+    }
+    pending = [sha256 for sha256 in files if sha256 not in analyses]
+    extracted = (pool.map if pool else map)(extract_resume_text, [files[sha256] for sha256 in pending])
+
+    errors, texts = {}, {}
+    for sha256, (text, error) in zip(pending, extracted):
+        if error is None:
+            texts[sha256] = text
+        else:
+            errors[sha256] = error
+    if not texts:
+        return analyses, errors, 0
+
+    parser = get_resume_parser()
+    entities = parser.extract_entities_batch(list(texts.values()), max_tokens=max_tokens)
+    fresh = [
+        ResumeAnalysis(sha256=sha256, parser_version=PARSER_VERSION, text=text, skills=found['skills'],
+                       education=found['education'], score=parser.calculate_score(found['skills']))
+        for (sha256, text), found in zip(texts.items(), entities)
+    ]
+    ResumeAnalysis.objects.bulk_create(
+        fresh, update_conflicts=True, unique_fields=['sha256'],
+        update_fields=['parser_version', 'text', 'skills', 'education', 'score', 'analyzed_at'],
+    )
+    analyses.update((analysis.sha256, analysis) for analysis in fresh)
+    return analyses, errors, len(fresh)
+
+
+def apply_analyses(candidates, analyses):
+    """Merges analysed skills and scores into candidates; returns the ones that changed, saved with bulk_update."""
+    from matching.models import MatchQueueItem
+    from matching.tasks import enqueue_rematches
+    from matching.utils import MATCH_MARKER_FIELDS, candidate_fingerprint, track_matching_inputs
+
+    now, changed, dirty = timezone.now(), [], []
+    for candidate, sha256 in candidates:
+        analysis = analyses.get(sha256)
+        if analysis is None:
+            continue
+        skills = list(set(list(candidate.skills or []) + analysis.skills))
+        score = analysis.score or candidate.resume_score
+        if sorted(skills) == sorted(candidate.skills or []) and score == candidate.resume_score:
+            continue
+        candidate.skills, candidate.resume_score, candidate.updated_at = skills, score, now
+        # Same markers and queue item the Candidate post_save receiver produces
+        if track_matching_inputs(candidate, candidate_fingerprint(candidate), skills):
+            dirty.append(candidate.pk)
+        changed.append(candidate)
+
+    Candidate.objects.bulk_update(changed, ['skills', 'resume_score', 'updated_at', *MATCH_MARKER_FIELDS])
+    enqueue_rematches(MatchQueueItem.CANDIDATE, dirty)
+    return changed
+
+
+def reanalyze_resumes(candidates=None, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                      max_tokens=DEFAULT_BATCH_TOKENS, force=False, progress=None):
+    """
+    Re-analyzes the resumes of candidates (every candidate with one by
+    default) and returns a summary. progress(summary) is called after each
+    chunk.
+    """
+    if candidates is None:
+        candidates = Candidate.objects.all()
+    candidates = candidates.exclude(Q(resume='') | Q(resume__isnull=True)).only(*CANDIDATE_FIELDS).order_by('id')
+
+    summary = {'documents': 0, 'parsed': 0, 'cached': 0, 'failed': 0, 'updated': 0, 'seconds': 0.0,
+               'docs_per_second': 0.0}
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) \
+        if workers > 1 else nullcontext()
+    with pool as executor:
+        for chunk in _chunks(candidates, chunk_size):
+            files, hashed = {}, []
+            for candidate in chunk:
+                try:
+                    sha256 = file_sha256(candidate.resume)
+                    files[sha256] = candidate.resume.path
+                except (OSError, NotImplementedError):
+                    summary['failed'] += 1
+                    continue
+                hashed.append((candidate, sha256))
+
+            analyses, errors, parsed = analyze_chunk(files, executor, max_tokens=max_tokens, force=force)
+            summary['documents'] += len(chunk)
+            summary['parsed'] += parsed
+            summary['cached'] += sum(1 for _, sha256 in hashed if sha256 in analyses) - parsed
+            summary['failed'] += sum(1 for _, sha256 in hashed if sha256 in errors)
+            summary['updated'] += len(apply_analyses(hashed, analyses))
+
+            summary['seconds'] = time.perf_counter() - started
+            summary['docs_per_second'] = summary['documents'] / max(summary['seconds'], 1e-9)
+            if progress:
+                progress(summary)
+    return summary
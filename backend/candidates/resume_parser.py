@@ -1,18 +1,122 @@
+"""
+Resume text extraction and entity analysis.
+
+Loading the NER pipeline takes seconds and hundreds of MB, so a process
+shares a single ResumeParser (get_resume_parser()) whose pipeline is
+loaded on first use, or up front with warmup_resume_parser() when
+RESUME_PARSER_WARMUP is set. transformers is only imported then.
+
+Texts are split into overlapping windows of WINDOW_TOKENS tokens, so long
+resumes are covered past the model's 512-token limit while the attention
+size per sequence stays bounded. extract_entities_batch() runs the windows
+of many texts in padded mini-batches grouped by length (token_batches())
+and merges the entities found twice in overlaps (merge_entities()).
+extract_resume_text() is importable without Django so text extraction can
+run in worker processes.
+"""
+import logging
+import os
 import re
+import resource
+import threading
+import time
 from pdfminer.high_level import extract_text
 from docx import Document
-from transformers import pipeline
 from typing import Dict, List
 import warnings
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+logger = logging.getLogger(__name__)
+
+NER_MODEL = "bert-base-uncased"
+# Bump whenever extraction, entity or score logic changes; cached
+# ResumeAnalysis rows from older versions are then redone on next use
+PARSER_VERSION = 2
+# Padded tokens (longest sequence x batch size) fed to the pipeline at once
+DEFAULT_BATCH_TOKENS = 8192
+# Tokens per NER window, special tokens excluded, and how many tokens
+# consecutive windows share so entities cut at one edge are whole in the other
+WINDOW_TOKENS = 256
+WINDOW_OVERLAP = 32
+
+
+def _rss_bytes():
+    """
+    Current resident set size, or None where /proc is unavailable (e.g.
+    macOS); getrusage() only reports the peak, which cannot measure a load.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def cached_model_path():
+    """
+    Snapshot directory of NER_MODEL in the local Hugging Face cache, or None
+    while it has not been downloaded (the first load will fetch it).
+    """
+    hub = os.environ.get('HF_HUB_CACHE') or os.path.join(
+        os.environ.get('HF_HOME', os.path.expanduser('~/.cache/huggingface')), 'hub'
+    )
+    snapshots = os.path.join(hub, f"models--{NER_MODEL.replace('/', '--')}", 'snapshots')
+    try:
+        found = sorted(name for name in os.listdir(snapshots)
+                       if os.path.exists(os.path.join(snapshots, name, 'config.json')))
+    except OSError:
+        return None
+    return os.path.join(snapshots, found[-1]) if found else None
+
+
+def _load_pipeline():
+    from transformers import pipeline
+    return pipeline("ner", model=NER_MODEL, aggregation_strategy="simple")
+
+
 class ResumeParser:
     def __init__(self):
-        self.ner = pipeline("ner", model="bert-base-uncased", aggregation_strategy="simple")
+        self._ner = None
+        self._load_lock = threading.Lock()
+        # Pipelines are not safe to call from several threads at once
+        self._ner_lock = threading.Lock()
+        self.load_seconds = None
+        self.load_rss_bytes = None
         self.skill_pattern = re.compile(r"(?i)(python|react|django|machine\s*learning|sql)", re.IGNORECASE)
         self.education_pattern = re.compile(r"(?i)(b\.?sc|bachelor|m\.?sc|phd|degree)", re.IGNORECASE)
 
+    @property
+    def loaded(self) -> bool:
+        return self._ner is not None
+
+    @property
+    def ner(self):
+        if self._ner is None:
+            with self._load_lock:
+                if self._ner is None:
+                    started, rss = time.perf_counter(), _rss_bytes()
+                    ner = _load_pipeline()
+                    self.load_seconds = time.perf_counter() - started
+                    after = _rss_bytes()
+                    self.load_rss_bytes = after - rss if after is not None and rss is not None else None
+                    self._ner = ner
+        return self._ner
+
+    def warmup(self) -> None:
+        """Loads the pipeline and runs it once so the first request pays nothing."""
+        self.extract_entities("Python developer with a BSc degree")
+
+    def status(self) -> dict:
+        return {
+            "model": NER_MODEL,
+            "parser_version": PARSER_VERSION,
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "load_rss_bytes": self.load_rss_bytes,
+            "rss_bytes": _rss_bytes(),
+        }
+
     def extract_text_from_file(self, file_path: str) -> str:
         if file_path.lower().endswith('.pdf'):
             return self._extract_text_from_pdf(file_path)
@@ -35,7 +139,44 @@ class ResumeParser:
         return text.strip()
 
     def extract_entities(self, resume_text: str) -> Dict[str, List[str]]:
-        entities = self.ner(resume_text)
+        return self.extract_entities_batch([resume_text])[0]
+
+    def extract_entities_batch(self, texts: List[str], max_tokens: int = DEFAULT_BATCH_TOKENS) -> List[Dict[str, List[str]]]:
+        """extract_entities() for many texts, in mini-batches of at most max_tokens padded tokens."""
+        ner = self.ner
+        windows = [(doc, offset, window, tokens)
+                   for doc, text in enumerate(texts) for offset, window, tokens in self.windows(text)]
+        found = [[] for _ in texts]
+        # + 2 for [CLS] and [SEP]
+        for batch in token_batches([tokens + 2 for *_, tokens in windows], max_tokens):
+            with self._ner_lock:
+                outputs = ner([windows[i][2] for i in batch], batch_size=len(batch))
+            for i, entities in zip(batch, outputs):
+                doc, offset = windows[i][:2]
+                found[doc].extend(_shifted(entity, offset) for entity in entities)
+        return [self._collect_entities(text, merge_entities(entities)) for text, entities in zip(texts, found)]
+
+    def windows(self, text: str) -> List[tuple]:
+        """(character offset, text, token count) of the overlapping windows covering text."""
+        spans = self._token_spans(text)
+        windows, step = [], WINDOW_TOKENS - WINDOW_OVERLAP
+        for first in range(0, len(spans), step):
+            last = min(first + WINDOW_TOKENS, len(spans))
+            start, end = spans[first][0], spans[last - 1][1]
+            windows.append((start, text[start:end], last - first))
+            if last == len(spans):
+                break
+        return windows
+
+    def _token_spans(self, text: str) -> List[tuple]:
+        tokenizer = getattr(self.ner, "tokenizer", None)
+        if getattr(tokenizer, "is_fast", False):
+            encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+            return encoding["offset_mapping"]
+        # Slow tokenizers have no offsets; fall back to whitespace tokens
+        return [match.span() for match in re.finditer(r"\S+", text)]
+
+    def _collect_entities(self, resume_text: str, entities: list) -> Dict[str, List[str]]:
         skills = list({e["word"] for e in entities if e["entity_group"] == "SKILL"})
         education = list({e["word"] for e in entities if e["entity_group"] == "EDU"})
         if not skills:
@@ -52,7 +193,96 @@ class ResumeParser:
         entities = self.extract_entities(text)
         score = self.calculate_score(entities.get("skills", []))
         return {
+            "text": text,
             "skills": entities.get("skills", []),
             "education": entities.get("education", []),
             "score": score
         }
+
+
+def token_batches(lengths: List[int], max_tokens: int) -> List[List[int]]:
+    """
+    Groups indexes into batches of similar length whose padded size (the
+    longest length times the batch size) stays within max_tokens; a single
+    longer sequence gets a batch of its own.
+    """
+    batches, batch = [], []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so lengths[i] is the longest in the batch
+        if batch and lengths[i] * (len(batch) + 1) > max_tokens:
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _shifted(entity: dict, offset: int) -> dict:
+    if "start" not in entity:
+        return entity
+    return dict(entity, start=entity["start"] + offset, end=entity["end"] + offset)
+
+
+def merge_entities(entities: List[dict]) -> List[dict]:
+    """
+    Merges entities found by overlapping windows: exact duplicates, and
+    fragments cut at a window edge that lie inside a longer entity of the
+    same group, are dropped. Entities without offsets are deduplicated by word.
+    """
+    merged, seen_words, reach = [], set(), {}
+    positioned = sorted((e for e in entities if "start" in e), key=lambda e: (e["start"], -e["end"]))
+    for entity in positioned:
+        group = entity["entity_group"]
+        if entity["end"] <= reach.get(group, -1):
+            continue
+        reach[group] = entity["end"]
+        merged.append(entity)
+    for entity in entities:
+        key = (entity["entity_group"], entity["word"])
+        if "start" not in entity and key not in seen_words:
+            seen_words.add(key)
+            merged.append(entity)
+    return merged
+
+
+def extract_resume_text(file_path: str):
+    """(text, None) or (None, error) for a file; safe to run in a worker process."""
+    try:
+        return ResumeParser().extract_text_from_file(file_path), None
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+
+
+_parser = None
+_parser_lock = threading.Lock()
+
+
+def get_resume_parser() -> ResumeParser:
+    """The process-wide ResumeParser."""
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = ResumeParser()
+    return _parser
+
+
+def warmup_resume_parser(background: bool = True):
+    """Loads the shared parser's model, in a daemon thread unless background is False."""
+    parser = get_resume_parser()
+    if not background:
+        parser.warmup()
+        return None
+
+    def _warmup():
+        try:
+            parser.warmup()
+        except Exception:
+            logger.exception("Resume parser warmup failed; the model will load on first use")
+        else:
+            logger.info("Resume parser loaded in %.1fs", parser.load_seconds)
+
+    thread = threading.Thread(target=_warmup, name="resume-parser-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Candidate
+from .models import Candidate, ResumeAnalysisJob
+from .tasks import enqueue_resume_analysis
 from applications.models import Application
 from applications.serializers import JobPostingSerializer
 import logging
@@ -175,9 +176,6 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
         logger.info(f"🔍 Validated data: {validated_data}")
         
         try:
-            from .resume_parser import ResumeParser
-            import os
-            
             candidate = self._get_candidate()
             job_post = self.context.get("job_post")
             
@@ -205,19 +203,23 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
                 candidate.skills = all_skills
                 logger.info(f"✅ Updated candidate skills: {all_skills}")
 
-            # Analyze resume if uploaded (manual apply)
-            resume_file = validated_data.get('resume')
-            if resume_file:
-                logger.info(f"🔍 Analyzing uploaded resume: {resume_file.name}")
-                self._analyze_resume(resume_file, candidate)
-            else:
-                # For auto apply, use existing profile resume
-                if candidate.resume:
-                    logger.info(f"🔍 Using existing profile resume for auto apply")
-                    # Optionally re-analyze profile resume
-                    # self._analyze_resume(candidate.resume, candidate)
-                
-            candidate.save()
+            # Only additional skills can change here
+            candidate.save(update_fields=['skills'])
+
+            # Queue analysis of the uploaded resume (manual apply) once the
+            # skills above are saved; the worker merges its results later
+            self.analysis_job = None
+            if validated_data.get('resume'):
+                logger.info(f"🔍 Queueing analysis of uploaded resume: {application.resume.name}")
+                try:
+                    self.analysis_job = enqueue_resume_analysis(candidate, application.resume, application)
+                except Exception as e:
+                    # The application stands; a job that was queued is still picked up by the worker
+                    logger.exception(f"⚠️ Resume analysis could not be queued: {e}")
+                    self.analysis_job = application.resume_analyses.order_by('-pk').first()
+            elif candidate.resume:
+                logger.info(f"🔍 Using existing profile resume for auto apply")
+
             logger.info("✅ Application creation completed successfully")
             return application
             
@@ -228,49 +230,10 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
             logger.error(f"❌ Traceback: {traceback.format_exc()}")
             raise serializers.ValidationError(f"Failed to create application: {str(e)}")
 
-    def _analyze_resume(self, resume_file, candidate):
-        """Helper method to analyze resume and update candidate skills"""
-        try:
-            from .resume_parser import ResumeParser
-            import os
-            from tempfile import NamedTemporaryFile
-            
-            # Save file temporarily if needed
-            file_path = resume_file.path if hasattr(resume_file, 'path') else None
-            temp_file_created = False
-            
-            if not file_path:
-                # If InMemoryUploadedFile, save to temp
-                temp_file = NamedTemporaryFile(delete=False, suffix=os.path.splitext(resume_file.name)[-1])
-                for chunk in resume_file.chunks():
-                    temp_file.write(chunk)
-                temp_file.close()
-                file_path = temp_file.name
-                temp_file_created = True
-                
-            parser = ResumeParser()
-            result = parser.analyze_resume(file_path)
-            
-            # Update candidate profile
-            parsed_skills = result.get('skills', [])
-            if parsed_skills:
-                # Merge with existing skills
-                existing_skills = list(candidate.skills) if candidate.skills else []
-                all_skills = list(set(existing_skills + parsed_skills))
-                candidate.skills = all_skills
-                logger.info(f"✅ Parsed skills from resume: {parsed_skills}")
-                
-            resume_score = result.get('score', 0)
-            if resume_score:
-                candidate.resume_score = resume_score
-                logger.info(f"✅ Resume score: {resume_score}")
-                
-        except Exception as e:
-            logger.error(f"⚠️ Resume analysis failed: {str(e)} (continuing without analysis)")
-        finally:
-            # Clean up temp file if created
-            if temp_file_created and 'temp_file' in locals():
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
\ No newline at end of file
+
+class ResumeAnalysisJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ResumeAnalysisJob
+        fields = ['id', 'application', 'status', 'skills', 'education', 'resume_score', 'error',
+                  'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,189 @@
+"""
+Database-backed work queue for resume analysis.
+
+Applying only stores the resume and enqueues a ResumeAnalysisJob; the
+process_resume_queue command extracts the text, runs entity extraction and
+merges the results into the candidate, so apply latency does not depend on
+resume length or on the NER model. Jobs left running longer than
+RESUME_ANALYSIS_TIMEOUT (a worker that hung or died) are retried up to
+RESUME_ANALYSIS_MAX_ATTEMPTS times, then marked failed.
+
+Parser output is cached in ResumeAnalysis by the SHA-256 of the file, so a
+resume already analyzed by the current PARSER_VERSION costs one hash and
+one indexed lookup.
+"""
+import hashlib
+import logging
+import os
+from datetime import timedelta
+from tempfile import NamedTemporaryFile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import Candidate, ResumeAnalysis, ResumeAnalysisJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESUME_BATCH_SIZE = 10
+
+
+def enqueue_resume_analysis(candidate, resume, application=None):
+    """
+    Queues analysis of a stored resume file for candidate. A resume that is
+    already cached is applied right away instead, without the parser.
+    """
+    job = ResumeAnalysisJob.objects.create(candidate=candidate, application=application, resume=resume.name)
+    cached = cached_analysis(file_sha256(resume))
+    if cached is not None:
+        job.status, job.started_at, job.attempts = ResumeAnalysisJob.RUNNING, timezone.now(), 1
+        process_job(job, cached)
+    return job
+
+
+def requeue_stale_jobs():
+    """Returns timed-out running jobs to the queue, failing those out of attempts."""
+    timeout = getattr(settings, 'RESUME_ANALYSIS_TIMEOUT', 300)
+    max_attempts = getattr(settings, 'RESUME_ANALYSIS_MAX_ATTEMPTS', 3)
+    stale = ResumeAnalysisJob.objects.filter(
+        status=ResumeAnalysisJob.RUNNING, started_at__lt=timezone.now() - timedelta(seconds=timeout)
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=ResumeAnalysisJob.FAILED, finished_at=timezone.now(),
+        error=f"Timed out after {max_attempts} attempts.",
+    )
+    requeued = stale.update(status=ResumeAnalysisJob.PENDING)
+    return requeued, failed
+
+
+def queue_status():
+    """
+    Job counts per status, the enqueue time of the oldest pending job and
+    how many running jobs are past RESUME_ANALYSIS_TIMEOUT.
+    """
+    timeout = getattr(settings, 'RESUME_ANALYSIS_TIMEOUT', 300)
+    counts = dict.fromkeys((ResumeAnalysisJob.PENDING, ResumeAnalysisJob.RUNNING,
+                            ResumeAnalysisJob.COMPLETED, ResumeAnalysisJob.FAILED), 0)
+    counts.update(ResumeAnalysisJob.objects.order_by().values_list('status').annotate(Count('id')))
+    pending = ResumeAnalysisJob.objects.filter(status=ResumeAnalysisJob.PENDING)
+    return {
+        'jobs': counts,
+        'oldest_pending_at': pending.aggregate(oldest=Min('created_at'))['oldest'],
+        'stale_running': ResumeAnalysisJob.objects.filter(
+            status=ResumeAnalysisJob.RUNNING, started_at__lt=timezone.now() - timedelta(seconds=timeout)
+        ).count(),
+    }
+
+
+def claim_jobs(batch_size=DEFAULT_RESUME_BATCH_SIZE):
+    """Marks up to batch_size pending jobs running and returns them, oldest first."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ResumeAnalysisJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ResumeAnalysisJob.PENDING).order_by('created_at')[:batch_size]
+        )
+        for job in jobs:
+            job.status, job.started_at, job.attempts = ResumeAnalysisJob.RUNNING, now, job.attempts + 1
+        ResumeAnalysisJob.objects.bulk_update(jobs, ['status', 'started_at', 'attempts'])
+    return jobs
+
+
+def analyze_resume_file(resume):
+    """Runs the shared ResumeParser over a stored file."""
+    from .resume_parser import get_resume_parser
+
+    try:
+        return get_resume_parser().analyze_resume(resume.path)
+    except NotImplementedError:
+        pass
+    # Storage without local paths: analyze a temporary copy
+    with NamedTemporaryFile(delete=False, suffix=os.path.splitext(resume.name)[-1]) as temp_file:
+        with resume.open('rb') as source:
+            for chunk in source.chunks():
+                temp_file.write(chunk)
+    try:
+        return get_resume_parser().analyze_resume(temp_file.name)
+    finally:
+        os.unlink(temp_file.name)
+
+
+def file_sha256(resume):
+    digest = hashlib.sha256()
+    with resume.open('rb') as source:
+        for chunk in source.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_analysis(sha256):
+    """The ResumeAnalysis for sha256, or None when missing or from an older parser version."""
+    from .resume_parser import PARSER_VERSION
+
+    return ResumeAnalysis.objects.filter(sha256=sha256, parser_version=PARSER_VERSION).first()
+
+
+def get_or_analyze(resume):
+    """The cached ResumeAnalysis of a stored file, parsing it on a miss."""
+    from .resume_parser import PARSER_VERSION
+
+    sha256 = file_sha256(resume)
+    cached = cached_analysis(sha256)
+    if cached is not None:
+        return cached
+
+    result = analyze_resume_file(resume)
+    analysis, _ = ResumeAnalysis.objects.update_or_create(sha256=sha256, defaults={
+        'parser_version': PARSER_VERSION,
+        'text': result.get('text', ''),
+        'skills': result.get('skills', []),
+        'education': result.get('education', []),
+        'score': result.get('score', 0),
+    })
+    return analysis
+
+
+def process_job(job, analysis=None):
+    """Analyzes one claimed job (unless its analysis is given) and merges the results into its candidate."""
+    try:
+        analysis = analysis or get_or_analyze(job.resume)
+    except Exception as e:
+        logger.exception("Resume analysis #%s failed", job.pk)
+        job.status, job.error = ResumeAnalysisJob.FAILED, str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+
+    job.analysis = analysis
+    job.skills, job.education, job.resume_score = analysis.skills, analysis.education, analysis.score
+    with transaction.atomic():
+        candidate = Candidate.objects.select_for_update().get(pk=job.candidate_id)
+        update_fields = []
+        if job.skills:
+            candidate.skills = list(set(list(candidate.skills or []) + job.skills))
+            update_fields.append('skills')
+        if job.resume_score:
+            candidate.resume_score = job.resume_score
+            update_fields.append('resume_score')
+        if update_fields:
+            candidate.save(update_fields=update_fields)
+        job.status, job.error, job.finished_at = ResumeAnalysisJob.COMPLETED, '', timezone.now()
+        job.save(update_fields=['analysis', 'skills', 'education', 'resume_score', 'status', 'error',
+                                'attempts', 'started_at', 'finished_at'])
+    return job
+
+
+def process_batch(batch_size=DEFAULT_RESUME_BATCH_SIZE):
+    """Processes one claimed batch. Returns None when the queue is empty."""
+    requeue_stale_jobs()
+    jobs = claim_jobs(batch_size)
+    if not jobs:
+        return None
+
+    summary = {'jobs': len(jobs), 'completed': 0, 'failed': 0}
+    for job in jobs:
+        process_job(job)
+        summary[job.status] += 1
+    return summary
@@ -3,8 +3,22 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from candidates.models import Candidate
 from recruiters.models import Recruiter
-from applications.models import JobPost
+from applications.models import Application, JobPost
+from candidates import reanalysis, resume_parser, tasks
+from candidates.models import ResumeAnalysis, ResumeAnalysisJob
+from datetime import timedelta
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from docx import Document
+from io import BytesIO, StringIO
+from unittest import mock
+import json
+import os
+import re
 import tempfile
+import threading
 
 User = get_user_model()
 
@@ -61,3 +75,296 @@ class ApplyToJobTest(APITestCase):
 
         print("Response data:", response.data)  # ✅ Add this
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class ResumeParserCacheTest(TestCase):
+    def setUp(self):
+        resume_parser._parser = None
+        self.addCleanup(setattr, resume_parser, '_parser', None)
+
+    def _fake_pipeline(self):
+        return FakeNerPipeline()
+
+    def test_model_loads_once_per_process(self):
+        with mock.patch.object(resume_parser, '_load_pipeline', side_effect=self._fake_pipeline) as load:
+            parsers = []
+            threads = [threading.Thread(target=lambda: parsers.append(resume_parser.get_resume_parser()))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertFalse(parsers[0].loaded)
+
+            for parser in parsers:
+                self.assertIs(parser, parsers[0])
+                self.assertEqual(parser.extract_entities("Django developer")["skills"], ["django"])
+        self.assertEqual(load.call_count, 1)
+        self.assertIsNotNone(parsers[0].status()["load_seconds"])
+
+    def test_status_command_can_warm_up(self):
+        out = StringIO()
+        with mock.patch.object(resume_parser, '_load_pipeline', side_effect=self._fake_pipeline):
+            call_command('resume_parser_status', '--load', '--json', stdout=out)
+        status = json.loads(out.getvalue())
+        self.assertTrue(status["load"]["loaded"])
+        self.assertGreaterEqual(status["load"]["load_seconds"], 0)
+
+    def test_memory_is_unreported_without_proc(self):
+        with mock.patch.object(resume_parser, '_load_pipeline', side_effect=self._fake_pipeline), \
+                mock.patch('builtins.open', side_effect=FileNotFoundError):
+            parser = resume_parser.get_resume_parser()
+            parser.ner
+            status = parser.status()
+        self.assertIsNone(status["rss_bytes"])
+        self.assertIsNone(status["load_rss_bytes"])
+        self.assertIsNotNone(status["load_seconds"])
+
+    def test_cached_model_is_found_on_disk(self):
+        hf_home = self.enterContext(tempfile.TemporaryDirectory())
+        with mock.patch.dict('os.environ', {'HF_HOME': hf_home}):
+            self.assertIsNone(resume_parser.cached_model_path())
+            snapshot = os.path.join(hf_home, 'hub', f'models--{resume_parser.NER_MODEL}', 'snapshots', 'abc123')
+            os.makedirs(snapshot)
+            open(os.path.join(snapshot, 'config.json'), 'w').close()
+            self.assertEqual(resume_parser.cached_model_path(), snapshot)
+
+
+class ResumeAnalysisQueueTest(APITestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        recruiter_user = User.objects.create_user(
+            username='queue-recruiter', email='queue-recruiter@example.com', password='pass', role='recruiter'
+        )
+        recruiter = Recruiter.objects.create(user=recruiter_user)
+        self.job = JobPost.objects.create(
+            recruiter=recruiter, title="Backend Developer", description="APIs", industry="Tech",
+            duration_of_internship=3,
+        )
+        self.candidate_user = User.objects.create_user(
+            username='queue-candidate', email='queue-candidate@example.com', password='pass', role='candidate'
+        )
+        self.candidate = Candidate.objects.create(
+            user=self.candidate_user, professional_title='Dev', degree='BSc', graduation_year=2023,
+            phone='123456789', city='Lagos', gender='M', languages='English', employment_type='Full-time',
+            skills=['sql'],
+        )
+        self.client.force_authenticate(user=self.candidate_user)
+
+    def _apply(self):
+        resume = SimpleUploadedFile('cv.pdf', b'%PDF-1.4 resume', content_type='application/pdf')
+        return self.client.post(f'/api/candidates/apply/{self.job.id}/', {
+            'resume': resume, 'duration_of_internship': 3,
+        }, format='multipart')
+
+    def test_apply_queues_analysis_instead_of_running_it(self):
+        with mock.patch('candidates.tasks.analyze_resume_file') as analyze:
+            response = self._apply()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        analyze.assert_not_called()
+        self.assertEqual(response.data['resume_analysis']['status'], ResumeAnalysisJob.PENDING)
+
+        result = {'skills': ['python'], 'education': ['BSc'], 'score': 2}
+        with mock.patch('candidates.tasks.analyze_resume_file', return_value=result):
+            call_command('process_resume_queue', '--once', stdout=StringIO())
+
+        polled = self.client.get(response.data['resume_analysis']['status_url'])
+        self.assertEqual(polled.data['status'], ResumeAnalysisJob.COMPLETED)
+        self.assertEqual(polled.data['skills'], ['python'])
+        self.candidate.refresh_from_db()
+        self.assertEqual(sorted(self.candidate.skills), ['python', 'sql'])
+        self.assertEqual(self.candidate.resume_score, 2)
+
+    def test_failed_and_hung_jobs(self):
+        self._apply()
+        job = ResumeAnalysisJob.objects.get()
+        with mock.patch('candidates.tasks.analyze_resume_file', side_effect=ValueError("Unsupported file format.")):
+            self.assertEqual(tasks.process_batch(), {'jobs': 1, 'completed': 0, 'failed': 1})
+        job.refresh_from_db()
+        self.assertEqual(job.error, "Unsupported file format.")
+
+        # A job a dead worker left running goes back to the queue until it runs out of attempts
+        started = timezone.now() - timedelta(hours=1)
+        ResumeAnalysisJob.objects.filter(pk=job.pk).update(status=ResumeAnalysisJob.RUNNING, started_at=started)
+        self.assertEqual(tasks.requeue_stale_jobs(), (1, 0))
+        ResumeAnalysisJob.objects.filter(pk=job.pk).update(
+            status=ResumeAnalysisJob.RUNNING, started_at=started, attempts=3,
+        )
+        self.assertEqual(tasks.requeue_stale_jobs(), (0, 1))
+
+    def test_status_command_reports_the_shared_queue(self):
+        self._apply()
+        ResumeAnalysisJob.objects.create(
+            candidate=self.candidate, resume='resumes/cv.pdf', status=ResumeAnalysisJob.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1), attempts=1,
+        )
+
+        out = StringIO()
+        with mock.patch.object(resume_parser, '_load_pipeline') as load:
+            call_command('resume_parser_status', '--json', stdout=out)
+        load.assert_not_called()
+        status = json.loads(out.getvalue())
+        self.assertEqual(status['queue']['jobs'], {'pending': 1, 'running': 1, 'completed': 0, 'failed': 0})
+        self.assertEqual(status['queue']['stale_running'], 1)
+        self.assertNotIn('load', status)
+
+    def test_analysis_errors_do_not_fail_the_application(self):
+        with mock.patch('candidates.tasks.file_sha256', side_effect=OSError("storage unavailable")):
+            response = self._apply()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        application = Application.objects.get()
+        job = ResumeAnalysisJob.objects.get()
+        self.assertEqual((job.application_id, job.status), (application.pk, ResumeAnalysisJob.PENDING))
+        self.assertEqual(response.data['resume_analysis']['id'], job.pk)
+
+    def test_candidates_only_see_their_own_jobs(self):
+        self._apply()
+        job = ResumeAnalysisJob.objects.get()
+        other = User.objects.create_user(
+            username='queue-other', email='queue-other@example.com', password='pass', role='candidate'
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(f'/api/candidates/resume-analysis/jobs/{job.id}/').status_code, 404)
+
+    def test_identical_resumes_are_analyzed_once_per_parser_version(self):
+        for name in ('first.pdf', 'second.pdf'):
+            ResumeAnalysisJob.objects.create(
+                candidate=self.candidate, resume=SimpleUploadedFile(name, b'%PDF-1.4 same resume'),
+            )
+        result = {'text': 'Python developer', 'skills': ['python'], 'education': [], 'score': 2}
+        with mock.patch('candidates.tasks.analyze_resume_file', return_value=result) as analyze:
+            self.assertEqual(tasks.process_batch()['completed'], 2)
+            self.assertEqual(analyze.call_count, 1)
+            self.assertEqual(ResumeAnalysis.objects.get().text, 'Python developer')
+
+            job = ResumeAnalysisJob.objects.first()
+            with mock.patch.object(resume_parser, 'PARSER_VERSION', resume_parser.PARSER_VERSION + 1):
+                tasks.get_or_analyze(job.resume)
+            self.assertEqual(analyze.call_count, 2)
+        self.assertEqual(ResumeAnalysis.objects.get().parser_version, resume_parser.PARSER_VERSION + 1)
+
+    def test_repeat_upload_is_answered_at_apply_time(self):
+        with mock.patch('candidates.tasks.analyze_resume_file',
+                        return_value={'skills': ['python'], 'education': [], 'score': 2}):
+            self._apply()
+            tasks.process_batch()
+        other_job = JobPost.objects.create(
+            recruiter=self.job.recruiter, title="Data Engineer", description="Pipelines", industry="Tech",
+            duration_of_internship=3,
+        )
+        self.job = other_job
+        with mock.patch('candidates.tasks.analyze_resume_file') as analyze:
+            response = self._apply()
+        analyze.assert_not_called()
+        self.assertEqual(response.data['resume_analysis']['status'], ResumeAnalysisJob.COMPLETED)
+
+
+class FakeNerPipeline:
+    """
+    Tags "django" and "flask" as skills, with offsets like the real pipeline;
+    records every batch size and the longest input it was called with.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.longest = 0
+
+    def _tag(self, text):
+        return [{"entity_group": "SKILL", "word": m.group().lower(), "start": m.start(), "end": m.end()}
+                for m in re.finditer(r"(?i)\b(django|flask)\b", text)]
+
+    def __call__(self, texts, batch_size=None):
+        self.batches.append(len(texts))
+        self.longest = max([self.longest] + [len(text.split()) for text in texts])
+        return [self._tag(text) for text in texts]
+
+
+class ResumeReanalysisTest(TestCase):
+    def setUp(self):
+        self.media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        resume_parser._parser = None
+        self.addCleanup(setattr, resume_parser, '_parser', None)
+        self.ner = FakeNerPipeline()
+        self.enterContext(mock.patch.object(resume_parser, '_load_pipeline', return_value=self.ner))
+
+        self.candidates = []
+        for i, body in enumerate(["Django and REST APIs", "Django developer", "Accountant", "Django " * 50]):
+            user = User.objects.create_user(username=f'bulk-{i}', email=f'bulk-{i}@example.com', password='pass',
+                                            role='candidate')
+            self.candidates.append(Candidate.objects.create(
+                user=user, professional_title='Dev', degree='BSc', graduation_year=2023, phone='1', city='Lagos',
+                gender='M', languages='English', employment_type='Full-time', skills=['sql'],
+                resume=self._docx(f'bulk-{i}.docx', body),
+            ))
+        Candidate.objects.update(match_dirty=False)
+
+    def _docx(self, name, body):
+        document = Document()
+        document.add_paragraph(body)
+        buffer = BytesIO()
+        document.save(buffer)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_token_batches_respect_the_padded_budget(self):
+        lengths = [5, 100, 3, 50, 60, 7]
+        batches = resume_parser.token_batches(lengths, 120)
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(len(lengths))))
+        for batch in batches:
+            self.assertTrue(len(batch) == 1 or max(lengths[i] for i in batch) * len(batch) <= 120)
+
+    def test_reanalysis_updates_skills_in_batches_and_reuses_the_cache(self):
+        from matching.models import MatchQueueItem
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reanalyze_resumes', '--workers', '1', '--chunk-size', '3', '--max-tokens', '40', stdout=out)
+
+        self.assertIn("docs/s", out.getvalue())
+        self.assertEqual(sum(self.ner.batches), 4)
+        self.assertGreater(max(self.ner.batches), 1)
+        updated = Candidate.objects.get(pk=self.candidates[0].pk)
+        self.assertEqual(sorted(updated.skills), ['django', 'sql'])
+        self.assertEqual(updated.resume_score, 2)
+        self.assertTrue(updated.match_dirty)
+        self.assertFalse(Candidate.objects.get(pk=self.candidates[2].pk).match_dirty)
+        queued = set(MatchQueueItem.objects.filter(entity_type=MatchQueueItem.CANDIDATE).values_list('entity_id', flat=True))
+        self.assertEqual(queued, set(Candidate.objects.filter(match_dirty=True).values_list('pk', flat=True)))
+        self.assertIn(updated.pk, queued)
+
+        summary = reanalysis.reanalyze_resumes()
+        self.assertEqual((summary['parsed'], summary['cached'], summary['updated']), (0, 4, 0))
+        self.assertEqual(sum(self.ner.batches), 4)
+
+
+class EntityWindowTest(TestCase):
+    def setUp(self):
+        self.ner = FakeNerPipeline()
+        self.enterContext(mock.patch.object(resume_parser, '_load_pipeline', return_value=self.ner))
+        self.parser = resume_parser.ResumeParser()
+
+    def test_long_resumes_are_covered_by_bounded_windows(self):
+        words = [f"w{i}" for i in range(1000)]
+        words[5], words[240], words[999] = "Python", "Django", "Flask"
+        text = " ".join(words)
+
+        windows = self.parser.windows(text)
+        self.assertEqual(windows[0][0], 0)
+        self.assertTrue(windows[-1][1].endswith("Flask"))
+        for (offset, window, tokens), (next_offset, _, _) in zip(windows, windows[1:]):
+            self.assertLessEqual(tokens, resume_parser.WINDOW_TOKENS)
+            # Consecutive windows overlap
+            self.assertLess(next_offset, offset + len(window))
+
+        entities = self.parser.extract_entities(text)
+        self.assertEqual(sorted(entities["skills"]), ["django", "flask"])
+        self.assertEqual(self.ner.batches, [len(windows)])
+        self.assertLessEqual(self.ner.longest, resume_parser.WINDOW_TOKENS)
+
+    def test_overlapping_entities_are_merged(self):
+        skill = {"entity_group": "SKILL", "word": "machine learning", "start": 10, "end": 26}
+        fragment = {"entity_group": "SKILL", "word": "learning", "start": 18, "end": 26}
+        degree = {"entity_group": "EDU", "word": "bsc", "start": 18, "end": 21}
+        merged = resume_parser.merge_entities([fragment, skill, dict(skill), degree])
+        self.assertEqual(merged, [skill, degree])
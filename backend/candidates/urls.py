@@ -22,5 +22,6 @@ urlpatterns = [
     path('applications/<int:pk>/withdraw/', CandidateWithdrawView.as_view(), name='withdraw-application'),
     #resume_anaylisis
     path('resume-analysis/', ResumeAnalysisView.as_view(), name='resume-analysis'),
+    path('resume-analysis/jobs/<int:pk>/', ResumeAnalysisJobView.as_view(), name='resume-analysis-job'),
 ]
 
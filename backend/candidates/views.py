@@ -1,20 +1,22 @@
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.core.mail import send_mail
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 
-from .models import Candidate
+from .models import Candidate, ResumeAnalysisJob
 from .permissions import IsCandidateUser
-from .serializers import CandidateProfileSerializer, MyApplicationSerializer
+from .serializers import CandidateProfileSerializer, MyApplicationSerializer, ResumeAnalysisJobSerializer
 
 
 from candidates.serializers import ApplicationCreateSerializer  
 from applications.models import JobPost, Application
-from matching.models import CandidateJobMatch
+from matching.models import CandidateJobMatch, CandidateTopMatch
 from matching.serializers import CandidateJobMatchSerializer
+from matching.topk import get_top_k
 
 from users.utils import create_notification
 from django.utils import timezone
@@ -47,8 +49,17 @@ class ApplyToJobView(APIView):
         serializer = ApplicationCreateSerializer(data=request.data, context=context)
 
         if serializer.is_valid():
-            serializer.save()
-            return Response({'message': 'Application submitted successfully.'}, status=status.HTTP_201_CREATED)
+            application = serializer.save()
+            data = {'message': 'Application submitted successfully.', 'application_id': application.id}
+            # Resume analysis runs in process_resume_queue; the candidate polls its status
+            job = serializer.analysis_job
+            if job:
+                data['resume_analysis'] = {
+                    'id': job.id,
+                    'status': job.status,
+                    'status_url': reverse('resume-analysis-job', args=[job.id]),
+                }
+            return Response(data, status=status.HTTP_201_CREATED)
 
         print("Serializer errors:", serializer.errors)
 
@@ -70,12 +81,22 @@ class CandidateDashboardMatchesView(APIView):
             if not candidate:
                 return Response({'error': 'Candidate profile not found.'}, status=404)
 
-        # Filter matches by only jobs that are active and not expired
-        matches = CandidateJobMatch.objects.filter(
+        # Read from the top-K projection, keeping only jobs that are active and not expired
+        limit = 10
+        today = timezone.now().date()
+        matches = [top.match for top in CandidateTopMatch.objects.filter(
             candidate=candidate,
-            job_post__is_active=True,
-            job_post__application_deadline__gte=timezone.now().date()
-        ).order_by('-total_score')[:10]
+            match__job_post__is_active=True,
+            match__job_post__application_deadline__gte=today
+        ).select_related('match__candidate__user', 'match__job_post').order_by('rank')[:limit]]
+
+        # A full projection may have cut visible matches that rank below closed jobs
+        if len(matches) < limit and CandidateTopMatch.objects.filter(candidate=candidate).count() >= get_top_k():
+            matches = CandidateJobMatch.objects.filter(
+                candidate=candidate,
+                job_post__is_active=True,
+                job_post__application_deadline__gte=today
+            ).select_related('candidate__user', 'job_post').order_by('-total_score', 'id')[:limit]
 
         serializer = CandidateJobMatchSerializer(matches, many=True)
         return Response({'top_matches': serializer.data})
@@ -95,10 +116,11 @@ class CandidateStatsView(APIView):
             "total_matches": matches.count(),
             "top_matched_jobs": [
                 {
-                    "job_title": match.job_post.title,
-                    "score": match.total_score
+                    "job_title": top.match.job_post.title,
+                    "score": top.total_score
                 }
-                for match in matches.order_by("-total_score")[:5]
+                for top in CandidateTopMatch.objects.filter(candidate=candidate)
+                .select_related('match__job_post').order_by("rank")[:5]
             ]
         }
         return Response(stats)
@@ -113,7 +135,7 @@ class ToggleUniversityViewPermission(APIView):
             return Response({'error': 'Candidate profile not found.'}, status=404)
 
         candidate.can_university_view = not candidate.can_university_view
-        candidate.save()
+        candidate.save(update_fields=['can_university_view'])
 
         return Response({
             'can_university_view': candidate.can_university_view,
@@ -252,7 +274,18 @@ class ResumeAnalysisView(APIView):
             return Response({"error": "Candidate profile not found."}, status=404)
 
         serializer = CandidateProfileSerializer(candidate)
+        latest = candidate.resume_analyses.first()
         return Response({
             "skills": serializer.data.get("skills", []),
-            "resume_score": serializer.data.get("resume_score", 0)
-        })
\ No newline at end of file
+            "resume_score": serializer.data.get("resume_score", 0),
+            "analysis": ResumeAnalysisJobSerializer(latest).data if latest else None,
+        })
+
+
+class ResumeAnalysisJobView(generics.RetrieveAPIView):
+    """Status of one of the candidate's queued resume analyses."""
+    serializer_class = ResumeAnalysisJobSerializer
+    permission_classes = [IsAuthenticated, IsCandidateUser]
+
+    def get_queryset(self):
+        return ResumeAnalysisJob.objects.filter(candidate__user=self.request.user)
\ No newline at end of file
@@ -1,7 +1,11 @@
 from django.contrib import admin
-from .models import CandidateJobMatch
+from .engine import rematch_entities, rescore_pairs
+from .models import CandidateJobMatch, MatchingRun, MatchQueueItem, ScoreWeights
+from .runs import create_run
 from django.core.management import call_command
 from django.contrib import messages
+from django.shortcuts import redirect
+from django.urls import reverse
 
 @admin.register(CandidateJobMatch)
 class CandidateJobMatchAdmin(admin.ModelAdmin):
@@ -9,13 +13,96 @@ class CandidateJobMatchAdmin(admin.ModelAdmin):
     list_filter = ('location_match', 'industry_match', 'duration_match', 'professional_title_match')
     search_fields = ('candidate__user__email', 'job_post__title')
 
-    actions = ['run_matching_engine']
+    actions = ['run_matching_engine', 'rematch_selected_entities', 'start_full_run']
+
+    def _report(self, request, summary):
+        self.message_user(
+            request,
+            f"✅ Scored {summary['pairs_scored']} pairs: {summary['updated']} matches updated, "
+            f"{summary['created']} created.",
+            messages.SUCCESS,
+        )
 
     def run_matching_engine(self, request, queryset):
         try:
-            call_command('run_matching')  # 👈 Calls our custom management command
-            self.message_user(request, "✅ Matching engine executed successfully.", messages.SUCCESS)
+            self._report(request, rescore_pairs(queryset.values_list('candidate_id', 'job_post_id')))
+        except Exception as e:
+            self.message_user(request, f"❌ Error rescoring matches: {e}", messages.ERROR)
+
+    run_matching_engine.short_description = "⚙️ Rescore selected matches"
+
+    def rematch_selected_entities(self, request, queryset):
+        try:
+            self._report(request, rematch_entities(
+                set(queryset.values_list('candidate_id', flat=True)),
+                set(queryset.values_list('job_post_id', flat=True)),
+            ))
         except Exception as e:
-            self.message_user(request, f"❌ Error running matching engine: {e}", messages.ERROR)
+            self.message_user(request, f"❌ Error rematching: {e}", messages.ERROR)
+
+    rematch_selected_entities.short_description = "🔁 Rematch the candidates and jobs of selected matches"
+
+    def start_full_run(self, request, queryset):
+        # Executed by the process_matching_runs worker; progress is tracked on the MatchingRun
+        run = create_run()
+        self.message_user(request, f"✅ {run} queued. Progress updates after every shard.", messages.SUCCESS)
+        return redirect(reverse('admin:matching_matchingrun_change', args=[run.pk]))
+
+    start_full_run.short_description = "⚙️ Queue a full matching run (ignores the selection)"
+
+
+@admin.register(MatchQueueItem)
+class MatchQueueItemAdmin(admin.ModelAdmin):
+    list_display = ('entity_type', 'entity_id', 'enqueued_at')
+    list_filter = ('entity_type',)
+
+
+@admin.register(ScoreWeights)
+class ScoreWeightsAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'professional_title_match', 'skill_match_score', 'degree_match', 'location_match',
+                    'duration_match', 'industry_match', 'has_resume', 'text_similarity', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+
+    actions = ['activate_and_recompute']
+
+    def activate_and_recompute(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Select exactly one weights version to activate.", messages.ERROR)
+            return
+        weights = queryset.get()
+        weights.is_active = True
+        weights.save()
+        try:
+            call_command('recompute_total_scores')
+            self.message_user(request, f"✅ {weights} activated and match scores recomputed.", messages.SUCCESS)
+        except Exception as e:
+            self.message_user(request, f"❌ Error recomputing match scores: {e}", messages.ERROR)
+
+    activate_and_recompute.short_description = "⚖️ Activate weights and recompute match scores"
+
+
+@admin.register(MatchingRun)
+class MatchingRunAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'status', 'progress_display', 'candidates_done', 'pairs_scored',
+                    'created', 'updated', 'started_at', 'duration')
+    list_filter = ('status',)
+    readonly_fields = ('status', 'params', 'progress_display', 'candidates_total', 'candidates_done',
+                       'pairs_scored', 'created', 'updated', 'started_at', 'last_checkpoint_at',
+                       'finished_at', 'duration', 'error')
+    exclude = ('shards', 'completed_shards')
+
+    actions = ['resume_runs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="Progress")
+    def progress_display(self, obj):
+        return f"{len(obj.completed_shards)}/{len(obj.shards)} shards ({obj.progress:.0%})"
+
+    def resume_runs(self, request, queryset):
+        # Runs whose worker died mid-run are left "running" and resumed by the worker on their own
+        resumed = queryset.filter(status=MatchingRun.FAILED).update(status=MatchingRun.PENDING)
+        self.message_user(request, f"✅ Queued {resumed} failed run(s) to resume.", messages.SUCCESS)
 
-    run_matching_engine.short_description = "⚙️ Run Matching Engine (All Candidates & Jobs)"
+    resume_runs.short_description = "▶️ Resume selected runs from their last checkpoint"
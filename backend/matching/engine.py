@@ -0,0 +1,764 @@
+"""
+Batch matching engine.
+
+Loads candidate and job features once, encodes them as NumPy arrays and
+scores candidate x job pairs in vectorized blocks instead of walking the
+cross product in Python with per-pair queries.
+
+Encoded features are snapshotted to MATCHING_INDEX_DIR/engine after every
+full load, tagged with the time the load started. Later loads memory-map
+the snapshot and only read and encode rows whose updated_at is past that
+watermark, plus an id-only query per model to drop deleted rows. The
+snapshot is discarded when title clusters were reset since it was taken.
+
+run_streaming() is the bounded-memory alternative for full runs: jobs are
+encoded once and candidates are read with .iterator() in fixed-size
+batches, so resident memory depends on the batch and job count only.
+"""
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from applications.models import Application, JobPost
+from candidates.models import Candidate
+from .index import MatchIndex
+from .models import CandidateJobMatch, MATCH_FIELDS
+from .skills import assign_skill_ids, bitset_overlap, pack_bitsets, unpack_bitsets
+from .snapshots import load_arrays, save_arrays, store_dir
+from .text import JobText, SparseRows, candidate_tokens, job_tokens, term_counts, weigh
+from .titles import assign_title_clusters, clear_title_memo, cluster_version, clusters_unchanged, normalize_title
+from .topk import refresh_top_matches
+from .utils import canonical_skill
+from .weights import get_active_weights
+
+DEFAULT_BLOCK_SIZE = 512     # candidates scored per vectorized pass
+DEFAULT_CHUNK_SIZE = 1000    # rows per upsert statement
+DEFAULT_STREAM_BATCH_SIZE = 5000  # candidates resident at once in streaming runs
+
+SNAPSHOT_FORMAT = 2
+# Rows saved just before the watermark may commit after the snapshot read them
+WATERMARK_SLACK = timedelta(minutes=1)
+
+CANDIDATE_FIELDS = ('id', 'professional_title', 'degree', 'city', 'skills', 'skill_ids', 'resume')
+JOB_FIELDS = ('id', 'title', 'industry', 'location', 'required_skills', 'skill_ids', 'duration_of_internship',
+              'description', 'updated_at')
+
+
+
+# ---------- Encoding ----------
+
+def _normalize(value):
+    return (value or '').strip().lower()
+
+
+def _title_code(title, titles, clusters):
+    normalized = normalize_title(title)
+    return titles.encode(clusters[normalized] if normalized else '')
+
+
+def _resolve_skill_ids(rows, field):
+    """Fills in skill_ids for rows saved before the column was maintained."""
+    pending = [r for r in rows if not r['skill_ids'] and r[field]]
+    ids = assign_skill_ids([s for r in pending for s in r[field]])
+    for r in pending:
+        r['skill_ids'] = sorted({ids[canonical_skill(s)] for s in r[field]})
+
+
+class Vocabulary:
+    """Assigns dense integer codes to strings shared by candidates and jobs."""
+
+    def __init__(self, keys=()):
+        self.codes = {key: code for code, key in enumerate(keys)}
+
+    def encode(self, value):
+        return self.codes.setdefault(value, len(self.codes))
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class Features:
+    """
+    Encoded rows in id order: the fixed-width ARRAYS, skill codes per row and
+    hashed term counts. Instances can be sliced, concatenated and persisted
+    as flat arrays, which is what makes snapshots possible.
+    """
+
+    ARRAYS = ('ids',)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_parts(cls, arrays, skill_codes, terms):
+        features = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(features, name, arrays[name])
+        features.skill_codes = skill_codes
+        features.skill_count = np.array([len(c) for c in skill_codes], dtype=np.int32)
+        features.terms = terms
+        return features
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        return self.from_parts(
+            {name: getattr(self, name)[rows] for name in self.ARRAYS},
+            [self.skill_codes[i] for i in rows.tolist()],
+            self.terms.take(rows),
+        )
+
+    @classmethod
+    def concat(cls, parts):
+        nonempty = [p for p in parts if len(p)]
+        if len(nonempty) == 1:
+            return nonempty[0]
+        return cls.from_parts(
+            {name: np.concatenate([getattr(p, name) for p in parts]) for name in cls.ARRAYS},
+            [codes for p in parts for codes in p.skill_codes],
+            SparseRows.concat([p.terms for p in parts]),
+        )
+
+    def to_arrays(self, prefix):
+        skill_indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(self.skill_count, out=skill_indptr[1:])
+        arrays = {f"{prefix}{name}": getattr(self, name) for name in self.ARRAYS}
+        arrays.update({
+            f"{prefix}skill_indptr": skill_indptr,
+            f"{prefix}skill_codes": np.fromiter((c for codes in self.skill_codes for c in codes),
+                                                dtype=np.int64, count=int(skill_indptr[-1])),
+            f"{prefix}term_indptr": self.terms.indptr,
+            f"{prefix}term_indices": self.terms.indices,
+            f"{prefix}term_counts": self.terms.data,
+        })
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        skill_indptr = arrays[f"{prefix}skill_indptr"]
+        codes = np.asarray(arrays[f"{prefix}skill_codes"]).tolist()
+        return cls.from_parts(
+            {name: arrays[f"{prefix}{name}"] for name in cls.ARRAYS},
+            [codes[a:b] for a, b in zip(skill_indptr[:-1].tolist(), skill_indptr[1:].tolist())],
+            SparseRows(arrays[f"{prefix}term_indptr"], arrays[f"{prefix}term_indices"], arrays[f"{prefix}term_counts"]),
+        )
+
+
+class CandidateFeatures(Features):
+    ARRAYS = ('ids', 'title', 'city', 'computer_degree', 'has_resume')
+
+    def __init__(self, rows, titles, cities, skills, title_clusters):
+        self.ids = np.array([r['id'] for r in rows], dtype=np.int64)
+        self.title = np.array([_title_code(r['professional_title'], titles, title_clusters) for r in rows], dtype=np.int32)
+        self.city = np.array([cities.encode(_normalize(r['city'])) for r in rows], dtype=np.int32)
+        self.computer_degree = np.array(['computer' in (r['degree'] or '').lower() for r in rows], dtype=bool)
+        self.has_resume = np.array([bool(r['resume']) for r in rows], dtype=bool)
+        self.skill_codes = [sorted({skills.encode(i) for i in r['skill_ids']}) for r in rows]
+        self.skill_count = np.array([len(c) for c in self.skill_codes], dtype=np.int32)
+        self.terms = term_counts([candidate_tokens(r) for r in rows])
+
+
+class JobFeatures(Features):
+    ARRAYS = ('ids', 'title', 'city', 'tech_industry', 'duration', 'updated_at')
+
+    def __init__(self, rows, titles, cities, skills, title_clusters):
+        self.ids = np.array([r['id'] for r in rows], dtype=np.int64)
+        self.title = np.array([_title_code(r['title'], titles, title_clusters) for r in rows], dtype=np.int32)
+        self.city = np.array([cities.encode(_normalize(r['location'])) for r in rows], dtype=np.int32)
+        self.tech_industry = np.array(['tech' in (r['industry'] or '').lower() for r in rows], dtype=bool)
+        self.duration = np.array([r['duration_of_internship'] for r in rows], dtype=np.int64)
+        self.updated_at = np.array([r['updated_at'].timestamp() for r in rows], dtype=np.float64)
+        self.skill_codes = [sorted({skills.encode(i) for i in r['skill_ids']}) for r in rows]
+        self.skill_count = np.array([len(c) for c in self.skill_codes], dtype=np.int32)
+        self.terms = term_counts([job_tokens(r) for r in rows])
+
+
+def _by_id(features):
+    if np.all(features.ids[:-1] < features.ids[1:]):
+        return features
+    return features.take(np.argsort(features.ids, kind='stable'))
+
+
+# ---------- Snapshots ----------
+
+def save_snapshot(candidates, jobs, vocabularies, watermark):
+    arrays = candidates.to_arrays('candidate_')
+    arrays.update(jobs.to_arrays('job_'))
+    return save_arrays(store_dir('engine'), arrays, {
+        'format': SNAPSHOT_FORMAT,
+        'watermark': watermark.isoformat(),
+        'title_clusters': cluster_version(),
+        'vocabularies': {name: list(vocabulary.codes) for name, vocabulary in vocabularies.items()},
+        'candidates': len(candidates),
+        'jobs': len(jobs),
+    })
+
+
+def load_snapshot():
+    """Returns (candidates, jobs, vocabularies, watermark) from the snapshot, or None."""
+    stored = load_arrays(store_dir('engine'))
+    if stored is None or stored[1].get('format') != SNAPSHOT_FORMAT:
+        return None
+    arrays, meta = stored
+    if not clusters_unchanged(meta['title_clusters']):
+        # Titles were reclustered: stored title codes and memoized clusters are stale
+        clear_title_memo()
+        return None
+    return (
+        CandidateFeatures.from_arrays(arrays, 'candidate_'),
+        JobFeatures.from_arrays(arrays, 'job_'),
+        {name: Vocabulary(keys) for name, keys in meta['vocabularies'].items()},
+        parse_datetime(meta['watermark']),
+    )
+
+
+# ---------- Scored pairs ----------
+
+class ScoredPairs:
+    """Component and total scores for a set of (candidate, job) index pairs."""
+
+    def __init__(self, candidate_ids, job_ids, components, total):
+        self.candidate_ids = candidate_ids
+        self.job_ids = job_ids
+        self.components = components
+        self.total = total
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    def filter(self, mask):
+        return ScoredPairs(
+            self.candidate_ids[mask],
+            self.job_ids[mask],
+            {name: values[mask] for name, values in self.components.items()},
+            self.total[mask],
+        )
+
+    @classmethod
+    def concat(cls, parts):
+        parts = list(parts)
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(empty, empty, {name: np.empty(0) for name in MATCH_FIELDS}, np.empty(0))
+        return cls(
+            np.concatenate([p.candidate_ids for p in parts]),
+            np.concatenate([p.job_ids for p in parts]),
+            {name: np.concatenate([p.components[name] for p in parts]) for name in MATCH_FIELDS},
+            np.concatenate([p.total for p in parts]),
+        )
+
+    def iter_rows(self):
+        columns = [self.components[name].tolist() for name in MATCH_FIELDS]
+        for i, (candidate_id, job_id) in enumerate(zip(self.candidate_ids.tolist(), self.job_ids.tolist())):
+            row = {name: column[i] for name, column in zip(MATCH_FIELDS, columns)}
+            row['total_score'] = round(float(self.total[i]), 4)
+            yield candidate_id, job_id, row
+
+
+# ---------- Engine ----------
+
+class MatchingEngine:
+    """
+    Scores every candidate against every active job in vectorized blocks.
+
+    Uses the same component rules as the run_matching command, except that
+    titles are compared by titles_match equivalence cluster, and the same
+    weights as calculate_total_score (the active ScoreWeights). With
+    rescore=False only missing pairs are written; with rescore=True
+    existing matches are updated in place.
+
+    With prune=True (the default unless MATCHING_ZERO_OVERLAP_FALLBACK is
+    "score") only pairs sharing a skill, city, industry or title, or
+    linked by an application, are scored; zero-overlap pairs are skipped.
+    """
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, chunk_size=DEFAULT_CHUNK_SIZE, rescore=False, prune=None,
+                 snapshot=None):
+        self.block_size = block_size
+        self.chunk_size = chunk_size
+        self.rescore = rescore
+        if prune is None:
+            prune = getattr(settings, 'MATCHING_ZERO_OVERLAP_FALLBACK', 'skip') != 'score'
+        self.prune = prune
+        if snapshot is None:
+            snapshot = getattr(settings, 'MATCHING_ENGINE_SNAPSHOT', True)
+        self.snapshot = snapshot
+        self.candidates = None
+        self.jobs = None
+        self.job_text = None
+
+    # ----- Loading -----
+
+    def _encode(self, candidate_rows, job_rows):
+        titles, cities, skills = (self.vocabularies[k] for k in ('titles', 'cities', 'skills'))
+        _resolve_skill_ids(candidate_rows, 'skills')
+        _resolve_skill_ids(job_rows, 'required_skills')
+        # Titles are compared by equivalence cluster, computed once per distinct title
+        title_clusters = assign_title_clusters(
+            [r['professional_title'] for r in candidate_rows] + [r['title'] for r in job_rows]
+        )
+        return (
+            CandidateFeatures(candidate_rows, titles, cities, skills, title_clusters),
+            JobFeatures(job_rows, titles, cities, skills, title_clusters),
+        )
+
+    def _unchanged(self, stored, fresh, queryset):
+        """
+        Splits the rows of queryset that are not in fresh into snapshot
+        features and the ids the snapshot does not have. Rows deleted or
+        filtered out since the snapshot are dropped here.
+        """
+        ids = np.fromiter(queryset.order_by('id').values_list('id', flat=True), dtype=np.int64)
+        ids = ids[~np.isin(ids, fresh.ids)]
+        position = self._index_of(stored.ids, ids)
+        if len(position) == len(stored) and np.array_equal(position, np.arange(len(stored))):
+            # Nothing changed: keep the memory-mapped arrays as they are
+            return stored, []
+        return stored.take(position[position >= 0]), ids[position < 0].tolist()
+
+    def load_features(self, candidates=None, jobs=None):
+        """
+        Encodes candidates (all by default) and jobs (all active by default),
+        from the snapshot where it is current. Full loads refresh the snapshot.
+        """
+        full = candidates is None and jobs is None
+        if candidates is None:
+            candidates = Candidate.objects.all()
+        if jobs is None:
+            jobs = JobPost.active_jobs.all()
+
+        watermark = timezone.now()
+        snapshot = load_snapshot() if self.snapshot else None
+        if snapshot is None:
+            self.vocabularies = {'titles': Vocabulary(), 'cities': Vocabulary(), 'skills': Vocabulary()}
+            self.candidates, self.jobs = self._encode(
+                list(candidates.order_by('id').values(*CANDIDATE_FIELDS)),
+                list(jobs.order_by('id').values(*JOB_FIELDS)),
+            )
+            changed = True
+        else:
+            stored_candidates, stored_jobs, self.vocabularies, since = snapshot
+            since -= WATERMARK_SLACK
+            candidate_rows = list(candidates.filter(updated_at__gte=since).order_by('id').values(*CANDIDATE_FIELDS))
+            job_rows = list(jobs.filter(updated_at__gte=since).order_by('id').values(*JOB_FIELDS))
+            fresh_candidates, fresh_jobs = self._encode(candidate_rows, job_rows)
+
+            kept_candidates, missing_candidates = self._unchanged(stored_candidates, fresh_candidates, candidates)
+            kept_jobs, missing_jobs = self._unchanged(stored_jobs, fresh_jobs, jobs)
+            # e.g. jobs reactivated with queryset.update(), which leaves updated_at alone
+            extra_candidates, extra_jobs = self._encode(
+                list(candidates.filter(id__in=missing_candidates).values(*CANDIDATE_FIELDS)) if missing_candidates else [],
+                list(jobs.filter(id__in=missing_jobs).values(*JOB_FIELDS)) if missing_jobs else [],
+            )
+
+            self.candidates = _by_id(CandidateFeatures.concat([kept_candidates, fresh_candidates, extra_candidates]))
+            self.jobs = _by_id(JobFeatures.concat([kept_jobs, fresh_jobs, extra_jobs]))
+            changed = (
+                candidate_rows or job_rows or missing_candidates or missing_jobs
+                or len(kept_candidates) != len(stored_candidates) or len(kept_jobs) != len(stored_jobs)
+            )
+
+        if full and self.snapshot and changed:
+            save_snapshot(self.candidates, self.jobs, self.vocabularies, watermark)
+        return self
+
+    def load(self, candidates=None, jobs=None):
+        self.load_features(candidates, jobs)
+        if candidates is None:
+            candidates = Candidate.objects.all()
+        if jobs is None:
+            jobs = JobPost.active_jobs.all()
+        self._prepare(candidates, jobs)
+        return self
+
+    def stream(self, candidates=None, jobs=None, batch_size=DEFAULT_STREAM_BATCH_SIZE):
+        """
+        Yields self loaded with successive batches of batch_size candidates
+        against a job table encoded once. Candidates are read with
+        .iterator() and only the columns the features need.
+        """
+        if candidates is None:
+            candidates = Candidate.objects.all()
+        if jobs is None:
+            jobs = JobPost.active_jobs.all()
+
+        self.vocabularies = {'titles': Vocabulary(), 'cities': Vocabulary(), 'skills': Vocabulary()}
+        _, self.jobs = self._encode([], list(jobs.order_by('id').values(*JOB_FIELDS)))
+        rows = candidates.order_by('id').values(*CANDIDATE_FIELDS).iterator(chunk_size=batch_size)
+        first = True
+        while batch := list(islice(rows, batch_size)):
+            self.candidates, _ = self._encode(batch, [])
+            self._prepare(candidates.filter(id__in=self.candidates.ids.tolist()), jobs, jobs_changed=first)
+            first = False
+            yield self
+
+    def _prepare(self, candidates, jobs, jobs_changed=True):
+        """Derives everything scoring needs from the loaded features."""
+        width = len(self.vocabularies['skills'])
+        self.weights = get_active_weights()
+
+        self.candidate_bits = pack_bitsets(self.candidates.skill_codes, width)
+        # New candidates can grow the skill vocabulary, which widens the bitsets
+        if jobs_changed or width != self._bits_width:
+            self.job_bits = pack_bitsets(self.jobs.skill_codes, width)
+            self._dense_job_skills = None
+            self._bits_width = width
+
+        if not self.weights['text_similarity']:
+            # Weighted out of the total: skip the job index and the per-pair products
+            self.job_text = self.candidate_text = None
+        else:
+            # TF-IDF rows are tiny next to the job matrix, which is memory-mapped
+            if jobs_changed or self.job_text is None:
+                self.job_text = JobText(self.jobs.ids, self.jobs.updated_at, self.jobs.terms)
+            self.candidate_text = weigh(self.candidates.terms, self.job_text.idf)
+
+        self._load_applications(candidates, jobs)
+        self._load_existing(candidates, jobs)
+        if self.prune:
+            self.index = self._build_index()
+
+    def _build_index(self):
+        """Indexes rows by skill, city, title and industry keys."""
+        titles, cities, skills = (self.vocabularies[k] for k in ('titles', 'cities', 'skills'))
+        city_base = len(skills)
+        title_base = city_base + len(cities)
+        industry_key = title_base + len(titles)
+        empty_city = cities.codes.get('')
+        empty_title = titles.codes.get('')
+
+        def keys_for(features, flags):
+            row_keys = []
+            for codes, city, title, flag in zip(features.skill_codes, features.city.tolist(),
+                                                features.title.tolist(), flags.tolist()):
+                keys = list(codes)
+                if city != empty_city:
+                    keys.append(city_base + city)
+                if title != empty_title:
+                    keys.append(title_base + title)
+                if flag:
+                    keys.append(industry_key)
+                row_keys.append(keys)
+            return row_keys
+
+        return MatchIndex(
+            keys_for(self.candidates, self.candidates.computer_degree),
+            keys_for(self.jobs, self.jobs.tech_industry),
+            skill_key_limit=city_base,
+            job_count=len(self.jobs),
+            extra_pair_keys=self._extra_pair_keys(),
+        )
+
+    def _extra_pair_keys(self):
+        # Existing matches are always rescored so scores cannot go stale when
+        # a pair stops sharing any key.
+        if self.rescore:
+            return np.union1d(self._application_keys, self._existing_keys)
+        return self._application_keys
+
+    def _pair_keys(self, candidate_index, job_index):
+        return candidate_index.astype(np.int64) * max(len(self.jobs), 1) + job_index
+
+    def _index_of(self, ids, values):
+        """Maps database ids to row indexes, returning -1 for unknown ids."""
+        values = np.asarray(values, dtype=np.int64)
+        if not len(ids) or not len(values):
+            return np.full(len(values), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+        return np.where(ids[pos] == values, pos, -1)
+
+    def _pairs_for(self, rows):
+        rows = list(rows)
+        if not rows:
+            return np.empty(0, dtype=np.int64), rows
+        ci = self._index_of(self.candidates.ids, [r[0] for r in rows])
+        ji = self._index_of(self.jobs.ids, [r[1] for r in rows])
+        known = (ci >= 0) & (ji >= 0)
+        return self._pair_keys(ci[known], ji[known]), [r for r, k in zip(rows, known) if k]
+
+    def _load_applications(self, candidates, jobs):
+        self.applications = {
+            (candidate_id, job_id): duration
+            for candidate_id, job_id, duration in Application.objects.filter(
+                candidate__in=candidates.values('id'),
+                job_post__in=jobs.values('id'),
+            ).values_list('candidate_id', 'job_post_id', 'duration_of_internship').iterator()
+        }
+        keys, rows = self._pairs_for((c, j, d) for (c, j), d in self.applications.items())
+        durations = np.array([r[2] for r in rows], dtype=np.int64)
+        order = np.argsort(keys)
+        self._application_keys = keys[order]
+        self._application_durations = durations[order]
+
+    def _load_existing(self, candidates, jobs):
+        existing = CandidateJobMatch.objects.filter(
+            candidate__in=candidates.values('id'),
+            job_post__in=jobs.values('id'),
+        ).values_list('candidate_id', 'job_post_id', 'id').iterator()
+        keys, rows = self._pairs_for(existing)
+        pks = np.array([r[2] for r in rows], dtype=np.int64)
+        order = np.argsort(keys)
+        self._existing_keys = keys[order]
+        self._existing_pks = pks[order]
+
+    # ----- Scoring -----
+
+    def _lookup(self, sorted_keys, keys):
+        if not len(sorted_keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return np.where(sorted_keys[pos] == keys, pos, -1)
+
+    def _text_similarity(self, ci, ji):
+        """Text similarity of each pair only, or zeros when its weight is 0."""
+        if self.job_text is None:
+            return np.zeros(len(ci), dtype=np.float64)
+        rows, inverse = np.unique(ci, return_inverse=True)
+        similarity = self.job_text.pair_similarity(self.candidate_text.take(rows), inverse, ji)
+        return np.round(similarity.astype(np.float64), 4)
+
+    def score_pairs(self, ci, ji, overlap=None):
+        """
+        Scores index pairs. overlap is the shared-skill count per pair; when
+        omitted it is computed with a popcount over the skill bitsets.
+        """
+        c, j = self.candidates, self.jobs
+        if overlap is None:
+            overlap = bitset_overlap(self.candidate_bits[ci], self.job_bits[ji])
+
+        job_skill_count = j.skill_count[ji]
+        skill_score = np.where(
+            (c.skill_count[ci] > 0) & (job_skill_count > 0),
+            overlap / np.maximum(job_skill_count, 1),
+            0.0,
+        )
+        skill_score = np.round(skill_score, 4)
+
+        application = self._lookup(self._application_keys, self._pair_keys(ci, ji))
+        duration_match = np.zeros(len(ci), dtype=bool)
+        applied = application >= 0
+        duration_match[applied] = self._application_durations[application[applied]] == j.duration[ji[applied]]
+
+        tech_degree = c.computer_degree[ci] & j.tech_industry[ji]
+        components = {
+            'professional_title_match': c.title[ci] == j.title[ji],
+            'skill_match_score': skill_score,
+            'degree_match': tech_degree,
+            'location_match': c.city[ci] == j.city[ji],
+            'duration_match': duration_match,
+            'industry_match': tech_degree,
+            'has_resume': c.has_resume[ci],
+            'text_similarity': self._text_similarity(ci, ji),
+        }
+        total = np.zeros(len(ci), dtype=np.float64)
+        for name in MATCH_FIELDS:
+            total += self.weights[name] * components[name]
+
+        return ScoredPairs(c.ids[ci], j.ids[ji], components, total)
+
+    def score_block(self, start, stop):
+        """Scores candidates[start:stop] against every loaded job they overlap with."""
+        if self.prune:
+            return self.score_pairs(*self.index.pairs(start, stop))
+
+        jobs = len(self.jobs)
+        ci = np.repeat(np.arange(start, stop, dtype=np.int64), jobs)
+        ji = np.tile(np.arange(jobs, dtype=np.int64), stop - start)
+        # A dense BLAS product beats per-pair popcounts on the full product
+        width = len(self.vocabularies['skills'])
+        if self._dense_job_skills is None:
+            self._dense_job_skills = unpack_bitsets(self.job_bits, width)
+        block = unpack_bitsets(self.candidate_bits[start:stop], width)
+        overlap = (block @ self._dense_job_skills.T).ravel()
+        return self.score_pairs(ci, ji, overlap)
+
+    # ----- Writing -----
+
+    def prepare(self, scored):
+        """
+        Returns (pairs to write, how many of them are new). Pairs that
+        already have a match are dropped unless rescoring.
+        """
+        ci = self._index_of(self.candidates.ids, scored.candidate_ids)
+        ji = self._index_of(self.jobs.ids, scored.job_ids)
+        missing = self._lookup(self._existing_keys, self._pair_keys(ci, ji)) < 0
+        if not self.rescore:
+            scored = scored.filter(missing)
+        return scored, int(missing.sum())
+
+    def write(self, scored):
+        """Creates missing matches and, when rescoring, updates existing ones; returns (created, updated)."""
+        scored, created = self.prepare(scored)
+        CandidateJobMatch.objects.upsert_scored(scored, self.chunk_size)
+        return created, len(scored) - created
+
+    def _score_loaded(self, summary, touched_candidates, touched_jobs):
+        """
+        Scores and writes the loaded candidates block by block. Scored pairs
+        are turned into rows and flushed chunk_size at a time, so a block
+        never holds more than one chunk of row objects.
+        """
+        if not len(self.jobs):
+            return
+        for start in range(0, len(self.candidates), self.block_size):
+            stop = min(start + self.block_size, len(self.candidates))
+            self._flush(self.score_block(start, stop), summary, touched_candidates, touched_jobs)
+
+    def _flush(self, scored, summary, touched_candidates, touched_jobs):
+        summary['pairs_scored'] += len(scored)
+        for offset in range(0, len(scored), self.chunk_size):
+            chunk, created = self.prepare(scored.filter(slice(offset, offset + self.chunk_size)))
+            CandidateJobMatch.objects.upsert_scored(chunk, self.chunk_size)
+            touched_candidates.update(np.unique(chunk.candidate_ids).tolist())
+            touched_jobs.update(np.unique(chunk.job_ids).tolist())
+            summary['created'] += created
+            summary['updated'] += len(chunk) - created
+
+    def run(self):
+        if self.candidates is None:
+            self.load()
+
+        summary = {'candidates': len(self.candidates), 'jobs': len(self.jobs),
+                   'pairs_scored': 0, 'created': 0, 'updated': 0}
+        touched_candidates, touched_jobs = set(), set()
+        self._score_loaded(summary, touched_candidates, touched_jobs)
+        refresh_top_matches(touched_candidates, touched_jobs)
+        return summary
+
+    def run_streaming(self, candidates=None, jobs=None, batch_size=DEFAULT_STREAM_BATCH_SIZE):
+        """Runs the engine batch by batch with stream(); see the module docstring."""
+        summary = {'candidates': 0, 'jobs': 0, 'pairs_scored': 0, 'created': 0, 'updated': 0, 'batches': 0}
+        touched_jobs = set()
+        for _ in self.stream(candidates, jobs, batch_size):
+            touched_candidates = set()
+            self._score_loaded(summary, touched_candidates, touched_jobs)
+            # Batches own their candidates, so those projections are final now
+            refresh_top_matches(candidate_ids=touched_candidates)
+            summary['candidates'] += len(self.candidates)
+            summary['batches'] += 1
+        summary['jobs'] = len(self.jobs) if self.jobs is not None else 0
+        refresh_top_matches(job_ids=touched_jobs)
+        return summary
+
+
+def run_batch_matching(candidates=None, jobs=None, **options):
+    """Loads features for the given querysets and runs the batch engine."""
+    return MatchingEngine(**options).load(candidates, jobs).run()
+
+
+def rescore_pairs(pairs, **options):
+    """
+    Rescores exactly the given (candidate_id, job_post_id) pairs in bulk,
+    whether or not the job is still active, and returns the summary.
+    Pairs whose candidate or job no longer exists are skipped.
+    """
+    pairs = list(pairs)
+    candidate_ids = sorted({c for c, _ in pairs})
+    job_ids = sorted({j for _, j in pairs})
+    # The prefilter index is only needed to discover pairs, not to score given ones
+    engine = MatchingEngine(**dict(options, rescore=True, prune=False)).load(
+        Candidate.objects.filter(id__in=candidate_ids), JobPost.objects.filter(id__in=job_ids)
+    )
+    ci = engine._index_of(engine.candidates.ids, [c for c, _ in pairs])
+    ji = engine._index_of(engine.jobs.ids, [j for _, j in pairs])
+    known = (ci >= 0) & (ji >= 0)
+
+    summary = {'candidates': len(candidate_ids), 'jobs': len(job_ids), 'pairs_scored': 0, 'created': 0, 'updated': 0}
+    touched_candidates, touched_jobs = set(), set()
+    engine._flush(engine.score_pairs(ci[known], ji[known]), summary, touched_candidates, touched_jobs)
+    refresh_top_matches(touched_candidates, touched_jobs)
+    return summary
+
+
+def run_scoped_matching(candidates=None, jobs=None, since=None, **options):
+    """
+    Rescores candidates x jobs in place, defaulting to every candidate and
+    every active job. With since, only pairs whose candidate or job was
+    updated at or after it are scored.
+    """
+    options['rescore'] = True
+    if candidates is None:
+        candidates = Candidate.objects.all()
+    if jobs is None:
+        jobs = JobPost.active_jobs.all()
+    if since is None:
+        return run_batch_matching(candidates, jobs, **options)
+    return merge_summaries(
+        run_batch_matching(candidates.filter(updated_at__gte=since), jobs, **options),
+        run_batch_matching(candidates.exclude(updated_at__gte=since), jobs.filter(updated_at__gte=since), **options),
+    )
+
+
+def rematch_entities(candidate_ids=(), job_ids=(), **options):
+    """
+    Rescores the given candidates against every active job and every
+    other candidate against the given jobs, so each pair is scored once.
+    """
+    candidate_ids, job_ids = list(candidate_ids), list(job_ids)
+    summaries = []
+    if candidate_ids:
+        summaries.append(run_scoped_matching(candidates=Candidate.objects.filter(id__in=candidate_ids), **options))
+    if job_ids:
+        summaries.append(run_scoped_matching(
+            candidates=Candidate.objects.exclude(id__in=candidate_ids),
+            jobs=JobPost.active_jobs.filter(id__in=job_ids),
+            **options
+        ))
+    return merge_summaries({'candidates': 0, 'jobs': 0, 'pairs_scored': 0, 'created': 0, 'updated': 0}, *summaries)
+
+
+def run_streaming_matching(candidates=None, jobs=None, batch_size=DEFAULT_STREAM_BATCH_SIZE, **options):
+    """Runs the engine over candidates in bounded-memory batches."""
+    return MatchingEngine(**options).run_streaming(candidates, jobs, batch_size)
+
+
+def merge_summaries(*summaries):
+    merged = {}
+    for summary in summaries:
+        for key, value in summary.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def clear_dirty(model, rows, batch_size=200):
+    """Clears match_dirty for rows whose fingerprint is unchanged since they were read."""
+    for start in range(0, len(rows), batch_size):
+        condition = Q()
+        for pk, fingerprint in rows[start:start + batch_size]:
+            condition |= Q(pk=pk, match_fingerprint=fingerprint)
+        model.objects.filter(condition).update(match_dirty=False)
+
+
+def run_incremental_matching(**options):
+    """
+    Rescores only pairs touching candidates or jobs whose matching inputs
+    changed since the last incremental run, updating matches in place.
+    """
+    options['rescore'] = True
+    dirty_candidates = list(Candidate.objects.filter(match_dirty=True).values_list('pk', 'match_fingerprint'))
+    dirty_jobs = list(JobPost.objects.filter(match_dirty=True).values_list('pk', 'match_fingerprint'))
+
+    summaries = []
+    if dirty_candidates:
+        summaries.append(run_batch_matching(
+            candidates=Candidate.objects.filter(match_dirty=True), **options
+        ))
+    if dirty_jobs:
+        summaries.append(run_batch_matching(
+            candidates=Candidate.objects.exclude(match_dirty=True),
+            jobs=JobPost.active_jobs.filter(match_dirty=True),
+            **options
+        ))
+
+    clear_dirty(Candidate, dirty_candidates)
+    clear_dirty(JobPost, dirty_jobs)
+
+    summary = merge_summaries({'candidates': 0, 'jobs': 0, 'pairs_scored': 0, 'created': 0, 'updated': 0}, *summaries)
+    summary['dirty_candidates'] = len(dirty_candidates)
+    summary['dirty_jobs'] = len(dirty_jobs)
+    return summary
+
@@ -0,0 +1,74 @@
+"""
+Inverted index over matching keys.
+
+Candidates and jobs are indexed under their canonical skills, normalized
+city, industry and title. Pairs are only generated for rows sharing at
+least one key, so the number of pairs scored grows with the actual overlap
+instead of candidates x jobs.
+"""
+import numpy as np
+
+
+def _expand_ranges(starts, lengths):
+    """Concatenates arange(start, start + length) for every range."""
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+def _postings(row_keys):
+    rows = np.repeat(np.arange(len(row_keys), dtype=np.int64), [len(k) for k in row_keys])
+    keys = np.fromiter((key for keys in row_keys for key in keys), dtype=np.int64, count=len(rows))
+    return rows, keys
+
+
+class MatchIndex:
+    """
+    Maps integer keys to candidate and job row indexes.
+
+    Keys below skill_key_limit are skill keys; every shared skill key adds
+    one to the pair's overlap count, which the engine uses as the skill
+    intersection size. extra_pair_keys are pair keys (ci * job_count + ji)
+    that are always generated, e.g. pairs with an application.
+    """
+
+    def __init__(self, candidate_keys, job_keys, skill_key_limit, job_count, extra_pair_keys=None):
+        self.skill_key_limit = skill_key_limit
+        self.job_count = max(job_count, 1)
+
+        self.candidate_rows, self.candidate_keys = _postings(candidate_keys)
+
+        job_rows, keys = _postings(job_keys)
+        order = np.argsort(keys, kind='stable')
+        self.job_rows = job_rows[order]
+        self.job_keys = keys[order]
+
+        if extra_pair_keys is None:
+            extra_pair_keys = np.empty(0, dtype=np.int64)
+        self.extra_pair_keys = np.sort(extra_pair_keys)
+
+    def pairs(self, start, stop):
+        """Returns (ci, ji, overlap) for candidates[start:stop] sharing a key with a job."""
+        lo, hi = np.searchsorted(self.candidate_rows, [start, stop])
+        rows = self.candidate_rows[lo:hi]
+        keys = self.candidate_keys[lo:hi]
+
+        first = np.searchsorted(self.job_keys, keys, side='left')
+        last = np.searchsorted(self.job_keys, keys, side='right')
+        lengths = last - first
+
+        ci = np.repeat(rows, lengths)
+        ji = self.job_rows[_expand_ranges(first, lengths)]
+        pair_keys = ci * self.job_count + ji
+        is_skill = np.repeat(keys < self.skill_key_limit, lengths)
+
+        e_lo, e_hi = np.searchsorted(self.extra_pair_keys, [start * self.job_count, stop * self.job_count])
+        unique_keys = np.unique(np.concatenate([pair_keys, self.extra_pair_keys[e_lo:e_hi]]))
+
+        skill_keys, skill_counts = np.unique(pair_keys[is_skill], return_counts=True)
+        overlap = np.zeros(len(unique_keys), dtype=np.float32)
+        overlap[np.searchsorted(unique_keys, skill_keys)] = skill_counts
+
+        return unique_keys // self.job_count, unique_keys % self.job_count, overlap
@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from matching.perf import run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark run_matching, the matching signal receivers, the rematch queue worker and the "
+        "recommendation functions at several scales and print wall time, query counts and peak memory as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='500,2000',
+            help="Comma-separated candidate counts to benchmark.",
+        )
+        parser.add_argument(
+            '--jobs-ratio', type=float, default=0.1,
+            help="Jobs created per candidate at each scale.",
+        )
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the generated data.")
+        parser.add_argument('--output', help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(n) for n in options['scales'].split(',') if n.strip()]
+        except ValueError:
+            raise CommandError("--scales must be a comma-separated list of integers.")
+
+        report = json.dumps(
+            {'scales': run_benchmarks(scales, jobs_ratio=options['jobs_ratio'], seed=options['seed'])},
+            indent=2,
+        )
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(report)
+        self.stdout.write(report)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from matching.text import build_job_index, index_dir
+
+
+class Command(BaseCommand):
+    help = "Rebuild the persisted TF-IDF index of active job titles, skills and descriptions."
+
+    def handle(self, *args, **options):
+        index = build_job_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Indexed {len(index)} jobs ({len(index.postings)} postings) in {index_dir()}."
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from matching.server import MatchingState, serve
+
+
+class Command(BaseCommand):
+    help = "Serve candidate/job recommendations from in-memory feature tables kept current by polling."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help="Interface to bind; keep it local.")
+        parser.add_argument('--port', type=int, default=8765, help="Port to listen on.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds between updated_at watermark polls.",
+        )
+        parser.add_argument(
+            '--full-reload-interval', type=float, default=600.0,
+            help="Seconds between full reloads, which pick up deleted rows.",
+        )
+
+        parser.add_argument(
+            '--cold', action='store_true',
+            help="Ignore the saved snapshot and load everything from the database.",
+        )
+
+    def handle(self, *args, **options):
+        state = None if options['cold'] else MatchingState.restore()
+        if state is None:
+            state = MatchingState()
+        else:
+            self.stdout.write("Restored snapshot; applying changes since it was taken.")
+            state.prune()
+        state.refresh()
+        state.save()
+        self.stdout.write(
+            f"Loaded {len(state.jobs)} active jobs and {len(state.candidates)} seeking candidates."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Matching server listening on http://{options['host']}:{options['port']}/"
+        ))
+        serve(
+            state, options['host'], options['port'],
+            poll_interval=options['poll_interval'],
+            full_reload_interval=options['full_reload_interval'],
+            log=self.stdout.write,
+        )
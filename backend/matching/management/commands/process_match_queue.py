@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from matching.tasks import process_batch, DEFAULT_QUEUE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Drain the rematch queue filled by the Candidate and JobPost post_save receivers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_QUEUE_BATCH_SIZE,
+            help="Number of queued entities rescored per batch.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty instead of polling for new work.",
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=5.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            summary = process_batch(options['batch_size'])
+            if summary is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            processed += summary['items']
+            self.stdout.write(
+                f"Rematched {summary['items']} entities: {summary['pairs_scored']} pairs scored, "
+                f"{summary['created']} created, {summary['updated']} updated."
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Match queue drained. {processed} entities processed."))
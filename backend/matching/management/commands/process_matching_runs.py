@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from matching.models import MatchingRun
+from matching.runs import process_next_run
+
+
+class Command(BaseCommand):
+    help = "Execute matching runs queued from the admin or the run-matching API, one at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once no run is waiting instead of polling for new ones.",
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=10.0,
+            help="Seconds to wait between polls when no run is waiting.",
+        )
+
+    def handle(self, *args, **options):
+        executed = 0
+        while True:
+            run = process_next_run()
+            if run is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            executed += 1
+            if run.status == MatchingRun.COMPLETED:
+                self.stdout.write(f"{run}: {run.created} matches created, {run.updated} updated.")
+            else:
+                self.stderr.write(f"{run} failed:\n{run.error}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ No matching runs waiting. {executed} runs executed."))
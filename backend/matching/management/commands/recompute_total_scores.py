@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from matching.models import ScoreWeights
+from matching.topk import rebuild_top_matches
+from matching.weights import recompute_total_scores, RECOMPUTE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Rewrite total_score for every match from its stored components and the active weights."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--weights-version', type=int,
+            help="Activate this ScoreWeights version before recomputing.",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=RECOMPUTE_CHUNK_SIZE,
+            help="Number of primary keys covered by each UPDATE.",
+        )
+
+    def handle(self, *args, **options):
+        if options['weights_version']:
+            try:
+                weights = ScoreWeights.objects.get(pk=options['weights_version'])
+            except ScoreWeights.DoesNotExist:
+                raise CommandError(f"ScoreWeights version {options['weights_version']} does not exist.")
+            weights.is_active = True
+            weights.save()
+
+        updated = recompute_total_scores(chunk_size=options['chunk_size'])
+        # Rankings change with the weights, so the top-K projections are rebuilt too
+        rebuild_top_matches()
+        self.stdout.write(self.style.SUCCESS(f"✅ Recomputed total_score for {updated} matches."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from matching.models import CandidateTopMatch, JobTopMatch
+from matching.topk import rebuild_top_matches
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-job and per-candidate top-K match tables from CandidateJobMatch."
+
+    def handle(self, *args, **options):
+        rebuild_top_matches()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Top matches rebuilt. {JobTopMatch.objects.count()} job rows, "
+            f"{CandidateTopMatch.objects.count()} candidate rows."
+        ))
@@ -1,43 +1,179 @@
-from django.core.management.base import BaseCommand
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from applications.models import JobPost
 from candidates.models import Candidate
-from applications.models import JobPost, Application
-from matching.models import CandidateJobMatch
-from matching.utils import calculate_skill_score, calculate_total_score
+from matching.engine import (
+    MatchingEngine, run_incremental_matching, run_scoped_matching, run_streaming_matching,
+    DEFAULT_BLOCK_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_STREAM_BATCH_SIZE,
+)
+from matching.models import MatchingRun
+from matching.parallel import run_sharded_matching, DEFAULT_SHARD_SIZE
+from matching.runs import create_run, execute_run
+
+
+def _id_list(value):
+    try:
+        return [int(i) for i in value.split(',') if i.strip()]
+    except ValueError:
+        raise CommandError(f"Expected comma-separated ids, got {value!r}.")
+
+
+def _moment(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Expected a date or datetime, got {value!r}.")
+        moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
 
 
 class Command(BaseCommand):
     help = "Run matching algorithm for all candidates and job posts."
 
-    def handle(self, *args, **kwargs):
-        candidates = Candidate.objects.all()
-        job_posts = JobPost.active_jobs.all()
-        match_count = 0
-
-        for candidate in candidates:
-            for job in job_posts:
-                if CandidateJobMatch.objects.filter(candidate=candidate, job_post=job).exists():
-                    continue
-
-                # Try to find an application from the candidate to this job
-                application = Application.objects.filter(candidate=candidate, job_post=job).first()
-                if application:
-                    duration_match = str(application.duration_of_internship) == str(job.duration_of_internship)
-                else:
-                    duration_match = False  # or True, depending on your fallback logic
-
-                match = CandidateJobMatch(
-                    candidate=candidate,
-                    job_post=job,
-                    professional_title_match=(candidate.professional_title.strip().lower() == job.title.strip().lower()),
-                    skill_match_score=calculate_skill_score(candidate.skills, job.required_skills),
-                    degree_match=('computer' in candidate.degree.lower() and 'tech' in job.industry.lower()),
-                    location_match=(candidate.city.lower() == job.location.lower()),
-                    duration_match=duration_match,
-                    industry_match=('tech' in job.industry.lower() and 'computer' in candidate.degree.lower()),
-                    has_resume=bool(candidate.resume),
-                )
-                calculate_total_score(match)
-                match.save()
-                match_count += 1
-
-        self.stdout.write(self.style.SUCCESS(f"✅ Matching completed. {match_count} matches created."))
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rescore', action='store_true',
+            help="Update existing matches in place instead of only creating missing ones.",
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="Only rescore pairs touching candidates or jobs whose matching inputs changed.",
+        )
+        parser.add_argument(
+            '--no-prune', action='store_true',
+            help="Score every candidate x job pair, including pairs sharing no skill, city, industry or title.",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help="Score ID-range shards of candidates in this many worker processes.",
+        )
+        parser.add_argument(
+            '--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+            help="Number of candidates per shard when using --workers.",
+        )
+        parser.add_argument(
+            '--checkpoint', action='store_true',
+            help="Record the run as a MatchingRun that checkpoints after every shard and can be resumed.",
+        )
+        parser.add_argument(
+            '--resume', type=int, metavar='RUN_ID',
+            help="Resume an interrupted MatchingRun from its last checkpoint.",
+        )
+        parser.add_argument(
+            '--candidates', type=_id_list, metavar='IDS',
+            help="Rescore only these candidates (comma-separated ids).",
+        )
+        parser.add_argument(
+            '--jobs', type=_id_list, metavar='IDS',
+            help="Rescore only these jobs (comma-separated ids), active or not.",
+        )
+        parser.add_argument(
+            '--since', type=_moment, metavar='DATETIME',
+            help="Rescore only pairs whose candidate or job was updated at or after this date or datetime.",
+        )
+        parser.add_argument(
+            '--stream', action='store_true',
+            help="Read candidates in batches with a bounded memory footprint instead of loading them all.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_STREAM_BATCH_SIZE,
+            help="Number of candidates resident at once when using --stream.",
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=DEFAULT_BLOCK_SIZE,
+            help="Number of candidates scored per vectorized pass.",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Number of rows written per bulk statement.",
+        )
+
+    def handle(self, *args, **options):
+        engine_options = dict(
+            block_size=options['block_size'],
+            chunk_size=options['chunk_size'],
+            prune=False if options['no_prune'] else None,
+        )
+        if options['workers'] and options['incremental']:
+            raise CommandError("--workers cannot be combined with --incremental.")
+        if options['incremental'] and (options['checkpoint'] or options['resume']):
+            raise CommandError("--incremental runs are not checkpointed.")
+        if options['stream'] and (options['workers'] or options['incremental'] or options['checkpoint'] or options['resume']):
+            raise CommandError("--stream is a single-process full run and cannot be combined with other modes.")
+        scoped = options['candidates'] is not None or options['jobs'] is not None or options['since'] is not None
+        if scoped and (options['workers'] or options['incremental'] or options['checkpoint']
+                       or options['resume'] or options['stream']):
+            raise CommandError("--candidates, --jobs and --since cannot be combined with other modes.")
+
+        if options['resume'] or options['checkpoint']:
+            run = self._checkpointed_run(options, engine_options)
+            summary = {
+                'pairs_scored': run.pairs_scored, 'candidates': run.candidates_done,
+                'jobs': JobPost.active_jobs.count(), 'created': run.created, 'updated': run.updated,
+            }
+            self.stdout.write(f"{run} finished {len(run.completed_shards)}/{len(run.shards)} shards.")
+        elif options['workers']:
+            summary = run_sharded_matching(
+                workers=options['workers'],
+                shard_size=options['shard_size'],
+                progress=self._report_shard,
+                rescore=options['rescore'],
+                **engine_options
+            )
+            self.stdout.write(f"Processed {summary['shards']} shards with {options['workers']} workers.")
+        elif scoped:
+            summary = run_scoped_matching(
+                candidates=Candidate.objects.filter(id__in=options['candidates']) if options['candidates'] is not None else None,
+                jobs=JobPost.objects.filter(id__in=options['jobs']) if options['jobs'] is not None else None,
+                since=options['since'],
+                **engine_options
+            )
+        elif options['stream']:
+            summary = run_streaming_matching(
+                batch_size=options['batch_size'], rescore=options['rescore'], **engine_options
+            )
+            self.stdout.write(f"Streamed {summary['batches']} batches of up to {options['batch_size']} candidates.")
+        elif options['incremental']:
+            summary = run_incremental_matching(**engine_options)
+            self.stdout.write(
+                f"{summary['dirty_candidates']} changed candidates, {summary['dirty_jobs']} changed jobs."
+            )
+        else:
+            engine = MatchingEngine(rescore=options['rescore'], **engine_options)
+            summary = engine.load().run()
+
+        self.stdout.write(
+            f"Scored {summary['pairs_scored']} pairs "
+            f"({summary['candidates']} candidates x {summary['jobs']} jobs)."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Matching completed. {summary['created']} matches created, {summary['updated']} updated."
+        ))
+
+    def _checkpointed_run(self, options, engine_options):
+        if options['resume']:
+            try:
+                run = MatchingRun.objects.get(pk=options['resume'])
+            except MatchingRun.DoesNotExist:
+                raise CommandError(f"Matching run {options['resume']} does not exist.")
+            if run.status == MatchingRun.COMPLETED:
+                raise CommandError(f"{run} already completed.")
+        else:
+            run = create_run(
+                workers=options['workers'] or 1,
+                shard_size=options['shard_size'],
+                rescore=options['rescore'],
+                **engine_options
+            )
+        return execute_run(run)
+
+    def _report_shard(self, shard_no, total, shard, summary):
+        first_id, last_id = shard
+        self.stdout.write(
+            f"[{shard_no}/{total}] candidates {first_id}-{last_id}: {summary['pairs_scored']} pairs scored, "
+            f"{summary['created']} created, {summary['updated']} updated."
+        )
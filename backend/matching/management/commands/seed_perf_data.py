@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from matching.perf import seed_perf_data
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, candidates, recruiters, universities, jobs, applications and matches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=1000, help="Number of candidates to create.")
+        parser.add_argument('--jobs', type=int, default=100, help="Number of job posts to create.")
+        parser.add_argument(
+            '--recruiters', type=int, default=None,
+            help="Number of recruiters to create (default: one per five jobs).",
+        )
+        parser.add_argument('--universities', type=int, default=20, help="Number of universities to create.")
+        parser.add_argument(
+            '--applications', type=int, default=2,
+            help="Average number of applications per candidate.",
+        )
+        parser.add_argument('--no-matches', action='store_true', help="Skip running the matching engine afterwards.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the generated distributions.")
+
+    def handle(self, *args, **options):
+        created = seed_perf_data(
+            candidates=options['candidates'],
+            jobs=options['jobs'],
+            recruiters=options['recruiters'],
+            universities=options['universities'],
+            applications_per_candidate=options['applications'],
+            matches=not options['no_matches'],
+            seed=options['seed'],
+        )
+        summary = ", ".join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"✅ Created {summary}."))
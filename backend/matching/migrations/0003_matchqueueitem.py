@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0002_alter_candidatejobmatch_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchQueueItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('candidate', 'Candidate'), ('job_post', 'Job Post')], max_length=20)),
+                ('entity_id', models.BigIntegerField()),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['enqueued_at'],
+                'unique_together': {('entity_type', 'entity_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0015_jobpost_match_dirty_jobpost_match_fingerprint'),
+        ('candidates', '0016_candidate_match_dirty_candidate_match_fingerprint'),
+        ('matching', '0003_matchqueueitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateTopMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('total_score', models.FloatField()),
+            ],
+            options={
+                'ordering': ['candidate', 'rank'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobTopMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('total_score', models.FloatField()),
+            ],
+            options={
+                'ordering': ['job_post', 'rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='candidatejobmatch',
+            index=models.Index(fields=['job_post', '-total_score'], name='matching_ca_job_pos_2f4916_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatejobmatch',
+            index=models.Index(fields=['candidate', '-total_score'], name='matching_ca_candida_4b457c_idx'),
+        ),
+        migrations.AddField(
+            model_name='candidatetopmatch',
+            name='candidate',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_matches', to='candidates.candidate'),
+        ),
+        migrations.AddField(
+            model_name='candidatetopmatch',
+            name='match',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_rankings', to='matching.candidatejobmatch'),
+        ),
+        migrations.AddField(
+            model_name='jobtopmatch',
+            name='job_post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_matches', to='applications.jobpost'),
+        ),
+        migrations.AddField(
+            model_name='jobtopmatch',
+            name='match',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_rankings', to='matching.candidatejobmatch'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='candidatetopmatch',
+            unique_together={('candidate', 'rank')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobtopmatch',
+            unique_together={('job_post', 'rank')},
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0004_candidatetopmatch_jobtopmatch_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NormalizedTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, unique=True)),
+                ('cluster_id', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+        ),
+    ]
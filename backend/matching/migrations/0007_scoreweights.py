@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0006_skill'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreWeights',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('professional_title_match', models.FloatField(default=0.2)),
+                ('skill_match_score', models.FloatField(default=0.3)),
+                ('degree_match', models.FloatField(default=0.1)),
+                ('location_match', models.FloatField(default=0.1)),
+                ('duration_match', models.FloatField(default=0.1)),
+                ('industry_match', models.FloatField(default=0.1)),
+                ('has_resume', models.FloatField(default=0.1)),
+                ('is_active', models.BooleanField(db_index=True, default=False)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'score weights',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
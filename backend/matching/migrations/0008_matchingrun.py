@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0007_scoreweights'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('shards', models.JSONField(blank=True, default=list)),
+                ('completed_shards', models.JSONField(blank=True, default=list)),
+                ('candidates_total', models.PositiveIntegerField(default=0)),
+                ('candidates_done', models.PositiveIntegerField(default=0)),
+                ('pairs_scored', models.PositiveBigIntegerField(default=0)),
+                ('created', models.PositiveBigIntegerField(default=0)),
+                ('updated', models.PositiveBigIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('last_checkpoint_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0008_matchingrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidatejobmatch',
+            name='text_similarity',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='scoreweights',
+            name='text_similarity',
+            field=models.FloatField(default=0.0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0009_candidatejobmatch_text_similarity_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matchqueueitem',
+            name='entity_type',
+            field=models.CharField(choices=[('candidate', 'Candidate'), ('job_post', 'Job Post'), ('application', 'Application')], max_length=20),
+        ),
+    ]
@@ -1,4 +1,82 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+
+# Per-pair score components, in upsert column order
+MATCH_FIELDS = (
+    'professional_title_match',
+    'skill_match_score',
+    'degree_match',
+    'location_match',
+    'duration_match',
+    'industry_match',
+    'has_resume',
+    'text_similarity',
+)
+
+
+class CandidateJobMatchManager(models.Manager):
+    """
+    The one write path for match scores: every writer (engine runs, shards,
+    pair rescores, streaming) goes through upsert_scored() or upsert(), which
+    run one executemany() of INSERT ... ON CONFLICT (candidate, job_post)
+    DO UPDATE per batch. created_at is only set on insert.
+    """
+
+    def _upsert_sql(self, connection):
+        quote = connection.ops.quote_name
+        columns = ['candidate_id', 'job_post_id', *MATCH_FIELDS, 'total_score', 'created_at']
+        updates = ', '.join(f'{quote(c)} = excluded.{quote(c)}' for c in (*MATCH_FIELDS, 'total_score'))
+        return (
+            f'INSERT INTO {quote(self.model._meta.db_table)} ({", ".join(map(quote, columns))}) '
+            f'VALUES ({", ".join(["%s"] * len(columns))}) '
+            f'ON CONFLICT ({quote("candidate_id")}, {quote("job_post_id")}) DO UPDATE SET {updates}'
+        )
+
+    def _upsert_rows(self, rows, batch_size):
+        """rows are (candidate_id, job_post_id, *MATCH_FIELDS, total_score) tuples."""
+        connection = connections[self.db]
+        sql = self._upsert_sql(connection)
+        created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        rows = [(*row, created_at) for row in rows]
+        for start in range(0, len(rows), batch_size):
+            with transaction.atomic(using=self.db), connection.cursor() as cursor:
+                cursor.executemany(sql, rows[start:start + batch_size])
+        return len(rows)
+
+    def upsert_scored(self, scored, batch_size=1000):
+        """
+        Upserts score arrays straight from the engine: candidate_ids,
+        job_ids, components ({field: array}) and total, already weighted.
+        Building model instances would cost more than the database work.
+        """
+        if not len(scored.candidate_ids):
+            return 0
+        columns = [scored.candidate_ids.tolist(), scored.job_ids.tolist()]
+        for name in MATCH_FIELDS:
+            values = scored.components[name]
+            columns.append(values.tolist() if values.dtype == bool else values.astype(float).tolist())
+        columns.append(scored.total.astype(float).round(4).tolist())
+        return self._upsert_rows(zip(*columns), batch_size)
+
+    def upsert(self, matches, batch_size=1000, compute_total=True):
+        """
+        Upserts unsaved CandidateJobMatch instances. total_score is computed
+        in memory unless compute_total is False.
+        """
+        from .utils import calculate_total_score
+        from .weights import get_active_weights
+
+        matches = list(matches)
+        if compute_total:
+            weights = get_active_weights()
+            for match in matches:
+                calculate_total_score(match, weights)
+        return self._upsert_rows(
+            [(m.candidate_id, m.job_post_id, *(getattr(m, f) for f in MATCH_FIELDS), m.total_score) for m in matches],
+            batch_size,
+        )
+
 
 class CandidateJobMatch(models.Model):
     candidate = models.ForeignKey('candidates.Candidate', on_delete=models.CASCADE)
@@ -11,14 +89,187 @@ class CandidateJobMatch(models.Model):
     duration_match = models.BooleanField(default=False)
     industry_match = models.BooleanField(default=False)
     has_resume = models.BooleanField(default=False)
+    text_similarity = models.FloatField(default=0.0)
 
     total_score = models.FloatField(default=0.0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CandidateJobMatchManager()
+
     class Meta:
         unique_together = ('candidate', 'job_post')
         ordering = ['-total_score']
+        indexes = [
+            models.Index(fields=['job_post', '-total_score']),
+            models.Index(fields=['candidate', '-total_score']),
+        ]
 
     def __str__(self):
         return f"{self.candidate.user.email} - {self.job_post.title} ({self.total_score:.2f})"
 
+
+
+class MatchQueueItem(models.Model):
+    """
+    A pending "rematch entity X" task, deduplicated per entity. Application
+    items score only that application's (candidate, job) pair.
+    """
+    CANDIDATE = 'candidate'
+    JOB_POST = 'job_post'
+    APPLICATION = 'application'
+    ENTITY_CHOICES = [
+        (CANDIDATE, 'Candidate'),
+        (JOB_POST, 'Job Post'),
+        (APPLICATION, 'Application'),
+    ]
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    entity_id = models.BigIntegerField()
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('entity_type', 'entity_id')
+        ordering = ['enqueued_at']
+
+    def __str__(self):
+        return f"Rematch {self.entity_type} #{self.entity_id}"
+
+
+class JobTopMatch(models.Model):
+    """Best MATCHING_TOP_K matches per job, maintained whenever the engine writes scores."""
+    job_post = models.ForeignKey('applications.JobPost', on_delete=models.CASCADE, related_name='top_matches')
+    match = models.ForeignKey(CandidateJobMatch, on_delete=models.CASCADE, related_name='job_rankings')
+    rank = models.PositiveIntegerField()
+    total_score = models.FloatField()
+
+    class Meta:
+        unique_together = ('job_post', 'rank')
+        ordering = ['job_post', 'rank']
+
+    def __str__(self):
+        return f"Job #{self.job_post_id} rank {self.rank} ({self.total_score:.2f})"
+
+
+class CandidateTopMatch(models.Model):
+    """Best MATCHING_TOP_K matches per candidate, maintained whenever the engine writes scores."""
+    candidate = models.ForeignKey('candidates.Candidate', on_delete=models.CASCADE, related_name='top_matches')
+    match = models.ForeignKey(CandidateJobMatch, on_delete=models.CASCADE, related_name='candidate_rankings')
+    rank = models.PositiveIntegerField()
+    total_score = models.FloatField()
+
+    class Meta:
+        unique_together = ('candidate', 'rank')
+        ordering = ['candidate', 'rank']
+
+    def __str__(self):
+        return f"Candidate #{self.candidate_id} rank {self.rank} ({self.total_score:.2f})"
+
+
+class NormalizedTitle(models.Model):
+    """
+    Cluster assignment for one distinct normalized professional/job title.
+    cluster_id is the pk of the cluster's representative title.
+    """
+    title = models.CharField(max_length=200, unique=True)
+    cluster_id = models.PositiveIntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"{self.title} → {self.cluster_id}"
+
+
+class Skill(models.Model):
+    """Canonical skill vocabulary; ids are stored in Candidate/JobPost.skill_ids."""
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ScoreWeights(models.Model):
+    """
+    A version of the total_score weights. The newest active row is used by the
+    engine and calculate_total_score; activating a version deactivates the
+    others. Run `recompute_total_scores` afterwards to re-rank stored matches.
+    """
+    professional_title_match = models.FloatField(default=0.20)
+    skill_match_score = models.FloatField(default=0.30)
+    degree_match = models.FloatField(default=0.10)
+    location_match = models.FloatField(default=0.10)
+    duration_match = models.FloatField(default=0.10)
+    industry_match = models.FloatField(default=0.10)
+    has_resume = models.FloatField(default=0.10)
+    text_similarity = models.FloatField(default=0.0)
+
+    is_active = models.BooleanField(default=False, db_index=True)
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name_plural = 'score weights'
+
+    def __str__(self):
+        return f"Weights v{self.pk}{' (active)' if self.is_active else ''}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.is_active:
+                ScoreWeights.objects.exclude(pk=self.pk).filter(is_active=True).update(is_active=False)
+
+    def as_dict(self):
+        from .utils import SCORE_WEIGHTS
+        return {field: getattr(self, field) for field in SCORE_WEIGHTS}
+
+
+class MatchingRun(models.Model):
+    """
+    History and checkpoint of one full matching run. Candidates are split
+    into ID-range shards when the run is created; every written shard is
+    recorded in completed_shards, so a run that dies can resume from there.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    params = models.JSONField(default=dict, blank=True)
+    shards = models.JSONField(default=list, blank=True)  # [first_id, last_id] per shard
+    completed_shards = models.JSONField(default=list, blank=True)  # indexes into shards
+
+    candidates_total = models.PositiveIntegerField(default=0)
+    candidates_done = models.PositiveIntegerField(default=0)
+    pairs_scored = models.PositiveBigIntegerField(default=0)
+    created = models.PositiveBigIntegerField(default=0)
+    updated = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_checkpoint_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Matching run #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        if not self.shards:
+            return 1.0 if self.status == self.COMPLETED else 0.0
+        return len(self.completed_shards) / len(self.shards)
+
+    @property
+    def duration(self):
+        if not self.started_at:
+            return None
+        return (self.finished_at or self.last_checkpoint_at or self.started_at) - self.started_at
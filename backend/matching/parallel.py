@@ -0,0 +1,129 @@
+"""
+Sharded, multi-process execution of the batch engine.
+
+Candidates are split into ID-range shards that worker processes score with
+their own database connections. Workers only read and send back compact
+score arrays (ScoredPairs), not row objects; every write goes through the
+parent process with CandidateJobMatch.objects.upsert_scored(), like any
+other engine write, and a bounded number of shards is kept in flight so
+SQLite never sees concurrent writers.
+
+Workers are spawned, so this module must stay importable before
+django.setup(); models and the engine are imported inside functions.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.db import connections
+
+DEFAULT_SHARD_SIZE = 2000
+
+
+def shard_ranges(candidates=None, shard_size=DEFAULT_SHARD_SIZE):
+    """Splits candidates into inclusive (first_id, last_id) ranges of shard_size rows."""
+    from candidates.models import Candidate
+
+    if candidates is None:
+        candidates = Candidate.objects.all()
+    ids = list(candidates.order_by('id').values_list('id', flat=True))
+    return [
+        (ids[start], ids[min(start + shard_size, len(ids)) - 1])
+        for start in range(0, len(ids), shard_size)
+    ]
+
+
+def _init_worker():
+    import django
+    django.setup()
+    # Never share the parent's connection; each worker opens its own
+    connections.close_all()
+
+
+def score_shard(first_id, last_id, engine_options):
+    """Scores one shard and returns its summary, the ScoredPairs to write and how many are new."""
+    from candidates.models import Candidate
+    from .engine import MatchingEngine, ScoredPairs
+
+    engine = MatchingEngine(**engine_options).load(
+        candidates=Candidate.objects.filter(id__gte=first_id, id__lte=last_id)
+    )
+    summary = {'candidates': len(engine.candidates), 'pairs_scored': 0}
+    parts, created = [], 0
+    if len(engine.jobs):
+        for start in range(0, len(engine.candidates), engine.block_size):
+            stop = min(start + engine.block_size, len(engine.candidates))
+            scored = engine.score_block(start, stop)
+            summary['pairs_scored'] += len(scored)
+            scored, new = engine.prepare(scored)
+            parts.append(scored)
+            created += new
+    return summary, ScoredPairs.concat(parts), created
+
+
+def run_sharded_matching(workers=1, shard_size=DEFAULT_SHARD_SIZE, chunk_size=None,
+                         progress=None, shards=None, **engine_options):
+    """
+    Runs the engine over candidate shards in a ProcessPoolExecutor and
+    returns the merged summary. progress(shard_no, total, shard, summary) is
+    called as each shard is written. shards defaults to shard_ranges().
+    """
+    from applications.models import JobPost
+    from .engine import MatchingEngine, DEFAULT_CHUNK_SIZE
+    from .models import CandidateJobMatch
+    from .text import ensure_job_index
+    from .topk import refresh_top_matches
+    from .weights import get_active_weights
+
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+
+    if shards is None:
+        shards = shard_ranges(shard_size=shard_size)
+    # Refresh the feature snapshot and text index once here rather than in
+    # every worker; workers then only apply their own small deltas
+    engine = MatchingEngine(**engine_options)
+    text = bool(get_active_weights()['text_similarity'])
+    if engine.snapshot:
+        jobs = engine.load_features().jobs
+        if text:
+            ensure_job_index(jobs.ids, jobs.updated_at)
+    elif text:
+        ensure_job_index()
+    totals = {'candidates': 0, 'jobs': JobPost.active_jobs.count(), 'pairs_scored': 0,
+              'created': 0, 'updated': 0, 'shards': len(shards)}
+
+    touched_jobs = set()
+
+    def _write(shard_no, shard, result):
+        summary, scored, created = result
+        CandidateJobMatch.objects.upsert_scored(scored, chunk_size)
+        summary['created'], summary['updated'] = created, len(scored) - created
+        # Shards own their candidates, so those projections can be refreshed right away
+        refresh_top_matches(candidate_ids=set(scored.candidate_ids.tolist()))
+        touched_jobs.update(scored.job_ids.tolist())
+        for key, value in summary.items():
+            totals[key] += value
+        if progress:
+            progress(shard_no, len(shards), shard, summary)
+
+    if workers <= 1:
+        for shard_no, shard in enumerate(shards, start=1):
+            _write(shard_no, shard, score_shard(*shard, engine_options))
+        refresh_top_matches(job_ids=touched_jobs)
+        return totals
+
+    connections.close_all()
+    max_in_flight = workers * 2
+    pending = {}
+    queue = list(enumerate(shards, start=1))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        while queue or pending:
+            while queue and len(pending) < max_in_flight:
+                shard_no, shard = queue.pop(0)
+                pending[pool.submit(score_shard, *shard, engine_options)] = (shard_no, shard)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard_no, shard = pending.pop(future)
+                _write(shard_no, shard, future.result())
+    refresh_top_matches(job_ids=touched_jobs)
+    return totals
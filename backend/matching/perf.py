@@ -0,0 +1,261 @@
+"""
+Synthetic volume and benchmarks for the matching engine.
+
+seed_perf_data() bulk-creates users, universities, recruiters, candidates,
+jobs, applications and (optionally) matches with skewed, realistic skill,
+city, title and industry distributions. run_benchmarks() seeds each scale
+inside a transaction that is rolled back afterwards and measures wall time,
+query count and peak Python memory of the main matching entry points.
+Snapshots and indexes written meanwhile go to a temporary
+MATCHING_INDEX_DIR, since the rollback cannot remove files.
+"""
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from applications.models import Application, JobPost
+from candidates.models import Candidate, normalized_key
+from recruiters.models import Recruiter
+from universities.models import University
+from users.models import User
+
+from .skills import assign_skill_ids, clear_skill_memo
+from .titles import clear_title_memo
+from .utils import canonical_skill
+
+BATCH_SIZE = 500
+SAMPLE_SIZE = 20
+STREAM_BATCH_SIZE = 500
+
+SKILLS = [
+    "Python", "JavaScript", "SQL", "React", "Django", "Excel", "Communication", "Java", "HTML", "CSS",
+    "Node.js", "TypeScript", "Git", "Data Analysis", "Machine Learning", "AWS", "Docker", "PostgreSQL",
+    "Research", "Writing", "Figma", "C++", "C#", "Go", "Kotlin", "Swift", "Flutter", "Power BI",
+    "Tableau", "Linux", "Networking", "Accounting", "Marketing", "SEO", "Sales", "Public Speaking",
+    "Project Management", "Photoshop", "Legal Drafting", "Statistics", "R", "PHP", "Laravel", "Vue",
+    "Angular", "Kubernetes", "MongoDB", "Redis", "GraphQL", "Spring", "ReactJS", "JS", "python3",
+]
+# Zipf-like popularity: a handful of skills dominate, the tail is long
+SKILL_WEIGHTS = [1 / (rank + 1) for rank in range(len(SKILLS))]
+
+CITIES = ["Lagos", "Abuja", "Port Harcourt", "Ibadan", "Kano", "Enugu", "Benin City", "Kaduna", "Remote"]
+CITY_WEIGHTS = [35, 20, 10, 8, 6, 6, 5, 4, 6]
+
+TITLES = [
+    "Software Engineer", "Frontend Developer", "Frontend Engineer", "Web Developer", "React Developer",
+    "Backend Developer", "Backend Engineer", "Data Analyst", "Data Scientist", "Legal Researcher",
+    "Legal Analyst", "Product Designer", "Marketing Associate", "Accountant", "DevOps Engineer",
+]
+INDUSTRIES = ["Tech", "Finance", "Law", "Marketing", "Healthcare", "Education"]
+INDUSTRY_WEIGHTS = [45, 15, 10, 12, 10, 8]
+DEGREES = ["Computer Science", "Computer Engineering", "Law", "Economics", "Accounting", "Mass Communication", "Statistics"]
+DURATIONS = [3, 6, 12]
+
+
+def _users(tag, role, count, password):
+    users = [
+        User(username=f"perf-{tag}-{role}-{i}", email=f"perf-{tag}-{role}-{i}@perf.example.com",
+             role=role, password=password)
+        for i in range(count)
+    ]
+    return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+
+def _skills(rng, low, high):
+    return sorted(set(rng.choices(SKILLS, SKILL_WEIGHTS, k=rng.randint(low, high))))
+
+
+def seed_perf_data(candidates=1000, jobs=100, recruiters=None, universities=20,
+                   applications_per_candidate=2, matches=True, seed=0):
+    """Creates a synthetic dataset and returns the number of rows created per model."""
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:8]
+    password = make_password(None)
+    recruiters = recruiters or max(jobs // 5, 1)
+    today = timezone.now().date()
+
+    skill_ids = assign_skill_ids(SKILLS)
+
+    def ids_for(skills):
+        return sorted({skill_ids[canonical_skill(s)] for s in skills})
+
+    university_rows = University.objects.bulk_create([
+        University(user=user, name=f"University {i}", phone="0800000000", website="https://example.com",
+                   location=rng.choices(CITIES, CITY_WEIGHTS)[0], type="Public", courses="", year=1960 + i % 60)
+        for i, user in enumerate(_users(tag, 'university', universities, password))
+    ], batch_size=BATCH_SIZE)
+
+    recruiter_rows = Recruiter.objects.bulk_create([
+        Recruiter(user=user, company_name=f"Company {i}", recruiter_name=f"Recruiter {i}", phone="0800000000",
+                  location=rng.choices(CITIES, CITY_WEIGHTS)[0], industry=rng.choices(INDUSTRIES, INDUSTRY_WEIGHTS)[0],
+                  company_size="11-50", duration_of_internship=str(rng.choice(DURATIONS)))
+        for i, user in enumerate(_users(tag, 'recruiter', recruiters, password))
+    ], batch_size=BATCH_SIZE)
+
+    candidate_rows = []
+    for user in _users(tag, 'candidate', candidates, password):
+        city = rng.choices(CITIES, CITY_WEIGHTS)[0]
+        employment_type = rng.choices(INDUSTRIES, INDUSTRY_WEIGHTS)[0]
+        skills = _skills(rng, 2, 8)
+        candidate_rows.append(Candidate(
+            user=user, professional_title=rng.choice(TITLES),
+            university=rng.choice(university_rows) if university_rows else None,
+            degree=rng.choice(DEGREES), graduation_year=rng.randint(2018, 2026), phone="0800000000",
+            city=city, gender=rng.choice(["Male", "Female"]), languages="English",
+            employment_type=employment_type, resume="resumes/perf.pdf" if rng.random() < 0.7 else None,
+            skills=skills, skill_ids=ids_for(skills),
+            city_key=normalized_key(city), employment_type_key=normalized_key(employment_type),
+        ))
+    candidate_rows = Candidate.objects.bulk_create(candidate_rows, batch_size=BATCH_SIZE)
+
+    job_rows = []
+    for _ in range(jobs):
+        location = rng.choices(CITIES, CITY_WEIGHTS)[0]
+        industry = rng.choices(INDUSTRIES, INDUSTRY_WEIGHTS)[0]
+        skills = _skills(rng, 2, 6)
+        deadline = rng.choice([None, today + timedelta(days=rng.randint(1, 90)), today - timedelta(days=rng.randint(1, 30))])
+        job_rows.append(JobPost(
+            recruiter=rng.choice(recruiter_rows), title=rng.choice(TITLES), description="Synthetic job post",
+            location=location, industry=industry, required_skills=skills, skill_ids=ids_for(skills),
+            duration_of_internship=rng.choice(DURATIONS), application_deadline=deadline,
+            is_active=rng.random() < 0.9,
+            location_key=normalized_key(location), industry_key=normalized_key(industry),
+        ))
+    job_rows = JobPost.objects.bulk_create(job_rows, batch_size=BATCH_SIZE)
+
+    application_rows = []
+    for candidate in candidate_rows:
+        count = min(rng.randint(0, applications_per_candidate * 2), len(job_rows))
+        for job in rng.sample(job_rows, count):
+            duration = job.duration_of_internship if rng.random() < 0.6 else rng.choice(DURATIONS)
+            application_rows.append(Application(
+                candidate=candidate, job_post=job, resume="resumes/perf.pdf",
+                status=rng.choice(['pending', 'pending', 'accepted', 'rejected']),
+                duration_of_internship=duration,
+            ))
+    Application.objects.bulk_create(application_rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    created = {
+        'universities': len(university_rows),
+        'recruiters': len(recruiter_rows),
+        'candidates': len(candidate_rows),
+        'jobs': len(job_rows),
+        'applications': len(application_rows),
+        'matches': 0,
+    }
+    if matches:
+        from .engine import run_batch_matching
+        prefix = f"perf-{tag}-"
+        created['matches'] = run_batch_matching(
+            candidates=Candidate.objects.filter(user__username__startswith=prefix),
+            jobs=JobPost.active_jobs.filter(recruiter__user__username__startswith=prefix),
+        )['created']
+    return created
+
+
+# ---------- Benchmarks ----------
+
+def measure(fn):
+    """Runs fn() and returns (result, {seconds, queries, peak_memory_kb})."""
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = fn()
+            seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {
+        'seconds': round(seconds, 4),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def _benchmark_scale(candidates, jobs, seed):
+    from .models import MatchQueueItem
+    from .tasks import process_batch
+    from .utils import match_candidate_to_jobs, match_jobpost_to_candidates
+
+    _, seeding = measure(lambda: seed_perf_data(candidates=candidates, jobs=jobs, matches=False, seed=seed))
+    results = {'seed_perf_data': seeding}
+
+    _, results['run_matching'] = measure(lambda: call_command('run_matching', stdout=StringIO()))
+    _, results['run_matching_rescore'] = measure(
+        lambda: call_command('run_matching', rescore=True, stdout=StringIO())
+    )
+    _, results['run_matching_stream'] = measure(
+        lambda: call_command('run_matching', rescore=True, stream=True, batch_size=STREAM_BATCH_SIZE, stdout=StringIO())
+    )
+
+    sample_candidates = list(Candidate.objects.order_by('-id')[:SAMPLE_SIZE])
+    sample_jobs = list(JobPost.active_jobs.order_by('-id')[:SAMPLE_SIZE])
+
+    def save_all():
+        # Changing skills moves the fingerprint, so every receiver does its full work
+        for candidate in sample_candidates:
+            candidate.skills = candidate.skills + ["Benchmarking"]
+            candidate.save()
+        for job in sample_jobs:
+            job.required_skills = job.required_skills + ["Benchmarking"]
+            job.save()
+
+    _, results['signal_receivers'] = measure(save_all)
+    results['signal_receivers']['calls'] = len(sample_candidates) + len(sample_jobs)
+
+    # The receivers enqueue on commit, which never comes inside the rolled-back
+    # transaction, so queue the same items directly and time the worker's side
+    MatchQueueItem.objects.bulk_create(
+        [MatchQueueItem(entity_type=MatchQueueItem.CANDIDATE, entity_id=c.pk) for c in sample_candidates]
+        + [MatchQueueItem(entity_type=MatchQueueItem.JOB_POST, entity_id=j.pk) for j in sample_jobs],
+        ignore_conflicts=True,
+    )
+
+    def drain_queue():
+        while process_batch() is not None:
+            pass
+
+    _, results['process_match_queue'] = measure(drain_queue)
+    results['process_match_queue']['calls'] = len(sample_candidates) + len(sample_jobs)
+
+    _, results['match_candidate_to_jobs'] = measure(
+        lambda: [list(match_candidate_to_jobs(c)) for c in sample_candidates]
+    )
+    results['match_candidate_to_jobs']['calls'] = len(sample_candidates)
+
+    _, results['match_jobpost_to_candidates'] = measure(
+        lambda: [list(match_jobpost_to_candidates(j)) for j in sample_jobs]
+    )
+    results['match_jobpost_to_candidates']['calls'] = len(sample_jobs)
+    return results
+
+
+def run_benchmarks(scales, jobs_ratio=0.1, seed=0):
+    """
+    Benchmarks each candidate count in scales against max(1, n * jobs_ratio)
+    jobs. Data for every scale is rolled back once it has been measured and
+    its on-disk matching state is discarded.
+    """
+    report = []
+    for candidates in scales:
+        jobs = max(int(candidates * jobs_ratio), 1)
+        with tempfile.TemporaryDirectory() as index_dir, override_settings(MATCHING_INDEX_DIR=index_dir):
+            with transaction.atomic():
+                results = _benchmark_scale(candidates, jobs, seed)
+                transaction.set_rollback(True)
+        # Vocabulary rows created for this scale were rolled back with it
+        clear_skill_memo()
+        clear_title_memo()
+        report.append({'candidates': candidates, 'jobs': jobs, 'results': results})
+    return report
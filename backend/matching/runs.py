@@ -0,0 +1,120 @@
+"""
+Checkpointed, resumable matching runs.
+
+A MatchingRun fixes its candidate shards up front and records each shard
+as soon as its scores are written. Resuming skips recorded shards; a
+shard that was cut off halfway is simply rescored, which is safe because
+writes are upserts.
+
+Pending runs double as a queue: the admin and the API only create them,
+and the process_matching_runs command claims and executes them one at a
+time, outside the web workers. A running run holds the lock until it
+finishes or goes MATCHING_RUN_TIMEOUT seconds without a checkpoint (its
+worker died), after which the next claim resumes it.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MatchingRun
+from .parallel import run_sharded_matching, shard_ranges, DEFAULT_SHARD_SIZE
+
+
+def create_run(workers=1, shard_size=DEFAULT_SHARD_SIZE, chunk_size=None, **engine_options):
+    """Records a pending run over the current candidates; execute it with execute_run()."""
+    from candidates.models import Candidate
+
+    return MatchingRun.objects.create(
+        params=dict(engine_options, workers=workers, shard_size=shard_size, chunk_size=chunk_size),
+        shards=[list(shard) for shard in shard_ranges(shard_size=shard_size)],
+        candidates_total=Candidate.objects.count(),
+    )
+
+
+def execute_run(run):
+    """Runs (or resumes) every shard of run that has not been written yet."""
+    from applications.models import JobPost
+    from .topk import refresh_top_matches
+
+    params = dict(run.params)
+    workers = params.pop('workers', 1)
+    params.pop('shard_size', None)
+    completed = set(run.completed_shards)
+    resumed = bool(completed)
+    positions = {tuple(shard): index for index, shard in enumerate(run.shards)}
+    pending = [tuple(shard) for index, shard in enumerate(run.shards) if index not in completed]
+
+    now = timezone.now()
+    run.status = MatchingRun.RUNNING
+    run.started_at = run.started_at or now
+    run.last_checkpoint_at = now
+    run.error = ''
+    run.save(update_fields=['status', 'started_at', 'last_checkpoint_at', 'error'])
+
+    def checkpoint(shard_no, total, shard, summary):
+        run.completed_shards = run.completed_shards + [positions[tuple(shard)]]
+        run.candidates_done += summary['candidates']
+        run.pairs_scored += summary['pairs_scored']
+        run.created += summary['created']
+        run.updated += summary['updated']
+        run.last_checkpoint_at = timezone.now()
+        run.save(update_fields=[
+            'completed_shards', 'candidates_done', 'pairs_scored', 'created', 'updated', 'last_checkpoint_at',
+        ])
+
+    try:
+        run_sharded_matching(workers=workers, shards=pending, progress=checkpoint, **params)
+        if resumed:
+            # Job rankings touched by shards written before the interruption
+            # were never refreshed, so refresh every active job's projection
+            refresh_top_matches(job_ids=JobPost.active_jobs.values_list('id', flat=True))
+    except Exception:
+        run.status = MatchingRun.FAILED
+        run.error = traceback.format_exc()
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'error', 'finished_at'])
+        raise
+
+    run.status = MatchingRun.COMPLETED
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at'])
+    return run
+
+
+def claim_run():
+    """
+    Marks the next run to execute running and returns it: a stale running
+    run first, then the oldest pending one. Returns None when the queue is
+    empty or another run is still in progress.
+    """
+    timeout = getattr(settings, 'MATCHING_RUN_TIMEOUT', 3600)
+    now = timezone.now()
+    with transaction.atomic():
+        # Locking every unfinished run serializes concurrent claims
+        runs = list(
+            MatchingRun.objects.select_for_update()
+            .filter(status__in=[MatchingRun.PENDING, MatchingRun.RUNNING]).order_by('created_at')
+        )
+        stale = [r for r in runs if r.status == MatchingRun.RUNNING
+                 and (r.last_checkpoint_at or r.created_at) < now - timedelta(seconds=timeout)]
+        if any(r.status == MatchingRun.RUNNING for r in runs if r not in stale):
+            return None
+        run = next(iter(stale), None) or next((r for r in runs if r.status == MatchingRun.PENDING), None)
+        if run is not None:
+            run.status, run.last_checkpoint_at = MatchingRun.RUNNING, now
+            run.save(update_fields=['status', 'last_checkpoint_at'])
+    return run
+
+
+def process_next_run():
+    """Claims and executes one run; returns it, or None when there was nothing to do."""
+    run = claim_run()
+    if run is not None:
+        try:
+            execute_run(run)
+        except Exception:
+            pass  # recorded on the run
+    return run
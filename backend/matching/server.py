@@ -0,0 +1,414 @@
+"""
+In-memory recommendation server.
+
+MatchingState keeps array-backed feature tables for active jobs and
+seeking candidates, plus each candidate's latest application duration,
+and answers the same questions as match_candidate_to_jobs /
+match_jobpost_to_candidates without touching the database. It is kept
+current by polling updated_at watermarks; a periodic full reload picks up
+deletions, which leave no row to poll.
+
+The state is snapshotted to MATCHING_INDEX_DIR/server with its watermarks,
+so a restart maps the snapshot copy-on-write, drops deleted rows with two
+id-only queries (prune) and polls only what changed since.
+
+`manage.py matching_server` serves it over local HTTP:
+
+    GET /candidates/<id>/jobs     -> {"ids": [job ids]}
+    GET /jobs/<id>/candidates     -> {"ids": [candidate ids]}
+
+Views call query_server() and fall back to the database when
+MATCHING_SERVER_URL is unset, the server is down or it does not know the
+entity (404).
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import URLError
+from urllib.request import urlopen
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from applications.models import Application, JobPost
+from candidates.models import Candidate
+
+from .engine import WATERMARK_SLACK, Vocabulary
+from .skills import known_skill_ids
+from .snapshots import load_arrays, save_arrays, store_dir
+from .utils import skill_score_from_ids
+
+DEFAULT_SKILL_THRESHOLD = 0.4
+FALLBACK_LIMIT = 10
+NO_DURATION = -1
+NO_DEADLINE = 0
+SNAPSHOT_FORMAT = 1
+
+
+def _skill_array(row, field):
+    ids = row['skill_ids'] or known_skill_ids(row[field])
+    return np.asarray(ids, dtype=np.int64)
+
+
+class FeatureTable:
+    """
+    Fixed-width numpy columns addressed by slot, with an id -> slot map.
+    Removed slots are reused, so incremental updates never rebuild arrays.
+    """
+
+    def __init__(self, columns, capacity=1024):
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.skills = [None] * capacity
+        self.slots = {}
+        self.free = []
+        self.size = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        for name, column in self.columns.items():
+            self.columns[name] = np.resize(column, capacity)
+        self.ids = np.resize(self.ids, capacity)
+        self.alive = np.concatenate([self.alive, np.zeros(capacity - len(self.alive), dtype=bool)])
+        self.skills.extend([None] * (capacity - len(self.skills)))
+
+    def upsert(self, entity_id, skills, **values):
+        slot = self.slots.get(entity_id)
+        if slot is None:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                if self.size == len(self.ids):
+                    self._grow()
+                slot = self.size
+                self.size += 1
+            self.slots[entity_id] = slot
+            self.ids[slot] = entity_id
+            self.alive[slot] = True
+        for name, value in values.items():
+            self.columns[name][slot] = value
+        self.skills[slot] = skills
+        return slot
+
+    def remove(self, entity_id):
+        slot = self.slots.pop(entity_id, None)
+        if slot is not None:
+            self.alive[slot] = False
+            self.skills[slot] = None
+            self.free.append(slot)
+
+    def row(self, entity_id):
+        return self.slots.get(entity_id)
+
+    def col(self, name):
+        return self.columns[name][:self.size]
+
+    def to_arrays(self, prefix):
+        empty = np.empty(0, dtype=np.int64)
+        skills = [self.skills[slot] if self.alive[slot] else empty for slot in range(self.size)]
+        skill_indptr = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in skills], out=skill_indptr[1:])
+        arrays = {f"{prefix}{name}": column[:self.size] for name, column in self.columns.items()}
+        arrays.update({
+            f"{prefix}ids": self.ids[:self.size],
+            f"{prefix}alive": self.alive[:self.size],
+            f"{prefix}skill_indptr": skill_indptr,
+            f"{prefix}skill_ids": np.concatenate(skills) if skills else empty,
+        })
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, columns, arrays, prefix):
+        table = cls(columns)
+        size = len(arrays[f"{prefix}ids"])
+        if not size:
+            return table
+        # Copy-on-write maps: pages are only copied once a slot is updated
+        table.columns = {name: arrays[f"{prefix}{name}"] for name in columns}
+        table.ids = arrays[f"{prefix}ids"]
+        table.alive = arrays[f"{prefix}alive"]
+        indptr, ids = arrays[f"{prefix}skill_indptr"], arrays[f"{prefix}skill_ids"]
+        table.skills = [ids[indptr[slot]:indptr[slot + 1]] for slot in range(size)]
+        table.size = size
+        table.slots = {int(table.ids[slot]): slot for slot in np.flatnonzero(table.alive).tolist()}
+        table.free = np.flatnonzero(~table.alive).tolist()
+        return table
+
+
+class MatchingState:
+    """Array-backed copy of everything the recommendation functions read."""
+
+    JOB_COLUMNS = {'place': np.int32, 'industry': np.int32, 'duration': np.int64, 'deadline': np.int64, 'created': np.float64}
+    CANDIDATE_COLUMNS = {'place': np.int32, 'industry': np.int32, 'duration': np.int64}
+
+    def __init__(self):
+        self.places = Vocabulary()      # JobPost.location_key / Candidate.city_key
+        self.industries = Vocabulary()  # JobPost.industry_key / Candidate.employment_type_key
+        self.jobs = FeatureTable(self.JOB_COLUMNS)
+        self.candidates = FeatureTable(self.CANDIDATE_COLUMNS)
+        self.latest_application = {}  # candidate id -> (applied_at, duration)
+        self.watermarks = {}
+        self.seen = {}  # poll name -> {id: updated_at} returned by the last poll
+        self.lock = threading.RLock()
+
+    # ----- Loading -----
+
+    def _poll(self, name, queryset):
+        """Rows of queryset changed since the last poll, advancing the watermark."""
+        watermark = self.watermarks.get(name)
+        if watermark is not None:
+            # Rows saved just before the watermark may commit after the last poll read past them
+            queryset = queryset.filter(updated_at__gte=watermark - WATERMARK_SLACK)
+        rows = list(queryset.order_by('updated_at'))
+        if rows:
+            self.watermarks[name] = rows[-1]['updated_at']
+        # The slack returns rows already applied; keep only unseen versions
+        seen = self.seen.get(name, {})
+        self.seen[name] = {row['id']: row['updated_at'] for row in rows}
+        return [row for row in rows if seen.get(row['id']) != row['updated_at']]
+
+    def refresh(self):
+        """Applies every job, candidate and application change since the last call."""
+        jobs = self._poll('jobs', JobPost.objects.values(
+            'id', 'is_active', 'location_key', 'industry_key', 'duration_of_internship',
+            'application_deadline', 'created_at', 'required_skills', 'skill_ids', 'updated_at',
+        ))
+        candidates = self._poll('candidates', Candidate.objects.values(
+            'id', 'is_seeking', 'city_key', 'employment_type_key', 'skills', 'skill_ids', 'updated_at',
+        ))
+        applications = self._poll('applications', Application.objects.values(
+            'id', 'candidate_id', 'applied_at', 'duration_of_internship', 'updated_at',
+        ))
+
+        with self.lock:
+            for row in jobs:
+                if not row['is_active']:
+                    self.jobs.remove(row['id'])
+                    continue
+                deadline = row['application_deadline']
+                self.jobs.upsert(
+                    row['id'], _skill_array(row, 'required_skills'),
+                    place=self.places.encode(row['location_key']),
+                    industry=self.industries.encode(row['industry_key']),
+                    duration=row['duration_of_internship'],
+                    deadline=deadline.toordinal() if deadline else NO_DEADLINE,
+                    created=row['created_at'].timestamp(),
+                )
+            for row in applications:
+                latest = self.latest_application.get(row['candidate_id'])
+                if latest is None or row['applied_at'] >= latest[0]:
+                    self.latest_application[row['candidate_id']] = (row['applied_at'], row['duration_of_internship'])
+                    slot = self.candidates.row(row['candidate_id'])
+                    if slot is not None:
+                        self.candidates.columns['duration'][slot] = row['duration_of_internship']
+            for row in candidates:
+                if not row['is_seeking']:
+                    self.candidates.remove(row['id'])
+                    continue
+                latest = self.latest_application.get(row['id'])
+                self.candidates.upsert(
+                    row['id'], _skill_array(row, 'skills'),
+                    place=self.places.encode(row['city_key']),
+                    industry=self.industries.encode(row['employment_type_key']),
+                    duration=latest[1] if latest else NO_DURATION,
+                )
+        return len(jobs) + len(candidates) + len(applications)
+
+    def prune(self):
+        """Drops jobs and candidates deleted, deactivated or no longer seeking by any means."""
+        active = set(JobPost.active_jobs.values_list('id', flat=True))
+        seeking = set(Candidate.objects.filter(is_seeking=True).values_list('id', flat=True))
+        with self.lock:
+            for table, keep in ((self.jobs, active), (self.candidates, seeking)):
+                for entity_id in [i for i in table.slots if i not in keep]:
+                    table.remove(entity_id)
+
+    # ----- Snapshots -----
+
+    def save(self):
+        with self.lock:
+            arrays = self.jobs.to_arrays('job_')
+            arrays.update(self.candidates.to_arrays('candidate_'))
+            latest = list(self.latest_application.items())
+            arrays.update({
+                'application_candidates': np.array([c for c, _ in latest], dtype=np.int64),
+                'application_applied_at': np.array([a.timestamp() for _, (a, _) in latest], dtype=np.float64),
+                'application_durations': np.array([d for _, (_, d) in latest], dtype=np.int64),
+            })
+            meta = {
+                'format': SNAPSHOT_FORMAT,
+                'places': list(self.places.codes),
+                'industries': list(self.industries.codes),
+                'watermarks': {name: mark.isoformat() for name, mark in self.watermarks.items()},
+            }
+        return save_arrays(store_dir('server'), arrays, meta)
+
+    @classmethod
+    def restore(cls):
+        """State from the last snapshot, or None. Call prune() and refresh() before serving it."""
+        stored = load_arrays(store_dir('server'), mmap_mode='c')
+        if stored is None or stored[1].get('format') != SNAPSHOT_FORMAT:
+            return None
+        arrays, meta = stored
+        state = cls()
+        state.places = Vocabulary(meta['places'])
+        state.industries = Vocabulary(meta['industries'])
+        state.jobs = FeatureTable.from_arrays(cls.JOB_COLUMNS, arrays, 'job_')
+        state.candidates = FeatureTable.from_arrays(cls.CANDIDATE_COLUMNS, arrays, 'candidate_')
+        state.latest_application = {
+            candidate_id: (datetime.fromtimestamp(applied_at, dt_timezone.utc), duration)
+            for candidate_id, applied_at, duration in zip(
+                arrays['application_candidates'].tolist(),
+                arrays['application_applied_at'].tolist(),
+                arrays['application_durations'].tolist(),
+            )
+        }
+        state.watermarks = {name: datetime.fromisoformat(mark) for name, mark in meta['watermarks'].items()}
+        return state
+
+    # ----- Queries -----
+
+    def _open_job_mask(self):
+        deadline = self.jobs.col('deadline')
+        today = timezone.now().date().toordinal()
+        return self.jobs.alive[:self.jobs.size] & ((deadline == NO_DEADLINE) | (deadline >= today))
+
+    def candidate_jobs(self, candidate_id, skill_threshold=DEFAULT_SKILL_THRESHOLD):
+        """Job ids in match_candidate_to_jobs order, or None for an unknown candidate."""
+        with self.lock:
+            c = self.candidates.row(candidate_id)
+            if c is None:
+                return None
+            cols = self.candidates.columns
+            place, industry, duration = cols['place'][c], cols['industry'][c], cols['duration'][c]
+            candidate_skills = self.candidates.skills[c]
+            open_jobs = self._open_job_mask() & (self.jobs.col('industry') == industry)
+
+            matches = []
+            if duration != NO_DURATION:
+                mask = open_jobs & (self.jobs.col('place') == place) & (self.jobs.col('duration') == duration)
+                matches = [
+                    slot for slot in np.flatnonzero(mask).tolist()
+                    if skill_score_from_ids(candidate_skills, self.jobs.skills[slot]) >= skill_threshold
+                ]
+                matches = self._newest_first(matches)
+            if not matches:
+                matches = self._newest_first(np.flatnonzero(open_jobs).tolist())[:FALLBACK_LIMIT]
+            return self.jobs.ids[matches].tolist()
+
+    def _newest_first(self, slots):
+        created = self.jobs.col('created')
+        return sorted(slots, key=lambda slot: created[slot], reverse=True)
+
+    def job_candidates(self, job_id, skill_threshold=DEFAULT_SKILL_THRESHOLD):
+        """Candidate ids in match_jobpost_to_candidates order, or None for an unknown job."""
+        with self.lock:
+            j = self.jobs.row(job_id)
+            if j is None:
+                return None
+            cols = self.jobs.columns
+            place, industry, duration = cols['place'][j], cols['industry'][j], cols['duration'][j]
+            job_skills = self.jobs.skills[j]
+            candidates = self.candidates
+            same_industry = candidates.alive[:candidates.size] & (candidates.col('industry') == industry)
+
+            mask = same_industry & (candidates.col('place') == place) & (candidates.col('duration') == duration)
+            matches = [
+                slot for slot in np.flatnonzero(mask).tolist()
+                if skill_score_from_ids(candidates.skills[slot], job_skills) >= skill_threshold
+            ]
+            ids = sorted(candidates.ids[matches].tolist())
+            if not ids:
+                ids = sorted(candidates.ids[np.flatnonzero(same_industry)].tolist())[:FALLBACK_LIMIT]
+            return ids
+
+
+# ---------- HTTP ----------
+
+def make_handler(state):
+    routes = {'candidates': ('jobs', state.candidate_jobs), 'jobs': ('candidates', state.job_candidates)}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.strip('/').split('/')
+            route = routes.get(parts[0]) if len(parts) == 3 else None
+            if route is None or parts[2] != route[0] or not parts[1].isdigit():
+                return self._reply(404, {'error': 'Unknown route.'})
+            ids = route[1](int(parts[1]))
+            if ids is None:
+                return self._reply(404, {'error': 'Unknown entity.'})
+            self._reply(200, {'ids': ids})
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(state, host, port, poll_interval=2.0, full_reload_interval=600.0, log=None):
+    """Serves state over HTTP while a background thread keeps it current."""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    stop = threading.Event()
+
+    def poll():
+        nonlocal state
+        last_reload = time.monotonic()
+        while not stop.wait(poll_interval):
+            close_old_connections()
+            try:
+                if time.monotonic() - last_reload >= full_reload_interval:
+                    fresh = MatchingState()
+                    fresh.refresh()
+                    state = fresh
+                    server.RequestHandlerClass = make_handler(fresh)
+                    fresh.save()
+                    last_reload = time.monotonic()
+                    if log:
+                        log(f"Reloaded {len(fresh.jobs)} jobs, {len(fresh.candidates)} candidates.")
+                else:
+                    changed = state.refresh()
+                    if changed and log:
+                        log(f"Applied {changed} changes.")
+            except Exception as e:
+                if log:
+                    log(f"Refresh failed: {e}")
+
+    thread = threading.Thread(target=poll, name='matching-server-poll', daemon=True)
+    thread.start()
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+
+
+def query_server(path):
+    """
+    GETs path from MATCHING_SERVER_URL and returns the id list, or None when
+    the server is not configured, unreachable, slow or does not know the entity.
+    """
+    base = getattr(settings, 'MATCHING_SERVER_URL', None)
+    if not base:
+        return None
+    timeout = getattr(settings, 'MATCHING_SERVER_TIMEOUT', 0.05)
+    try:
+        with urlopen(f"{base.rstrip('/')}/{path.lstrip('/')}", timeout=timeout) as response:
+            return json.loads(response.read())['ids']
+    except (URLError, OSError, ValueError, KeyError):
+        return None
@@ -1,63 +1,94 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from candidates.models import Candidate
-from applications.models import JobPost, Application
-from .models import CandidateJobMatch
-from .utils import calculate_skill_score, calculate_total_score
+from applications.models import Application, JobPost
+from .models import CandidateJobMatch, MatchQueueItem
+from .tasks import enqueue_rematch
+from .utils import (
+    CANDIDATE_MATCH_FIELDS, JOBPOST_MATCH_FIELDS, MATCH_MARKER_FIELDS, candidate_fingerprint, jobpost_fingerprint,
+    track_matching_inputs,
+)
 
-@receiver(post_save, sender=Candidate)
-def auto_match_on_candidate_save(sender, instance, **kwargs):
-    candidate = instance
-    jobs = JobPost.active_jobs.all()
 
-    for job in jobs:
-        if CandidateJobMatch.objects.filter(candidate=candidate, job_post=job).exists():
-            continue
-        _create_match(candidate, job)
+def _track_matching_inputs(instance, fingerprint, skills):
+    """
+    Marks instance dirty and returns True when its matching inputs changed.
+    Written with update() so saves using update_fields still persist the
+    markers.
+    """
+    if not track_matching_inputs(instance, fingerprint, skills):
+        return False
+    type(instance).objects.filter(pk=instance.pk).update(
+        **{field: getattr(instance, field) for field in MATCH_MARKER_FIELDS}
+    )
+    return True
+
+
+def _touches(update_fields, match_fields):
+    return update_fields is None or not match_fields.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=Candidate)
+def auto_match_on_candidate_save(sender, instance, update_fields=None, **kwargs):
+    if not _touches(update_fields, CANDIDATE_MATCH_FIELDS):
+        return
+    if _track_matching_inputs(instance, candidate_fingerprint(instance), instance.skills):
+        enqueue_rematch(MatchQueueItem.CANDIDATE, instance.pk)
 
 
 @receiver(post_save, sender=JobPost)
-def auto_match_on_jobpost_save(sender, instance, **kwargs):
+def auto_match_on_jobpost_save(sender, instance, update_fields=None, **kwargs):
     job = instance
-    if not job.is_active:
+    if not _touches(update_fields, JOBPOST_MATCH_FIELDS):
         return
+    changed = _track_matching_inputs(job, jobpost_fingerprint(job), job.required_skills)
+    if changed and job.is_active:
+        enqueue_rematch(MatchQueueItem.JOB_POST, job.pk)
 
-    candidates = Candidate.objects.all()
-    for candidate in candidates:
-        if CandidateJobMatch.objects.filter(candidate=candidate, job_post=job).exists():
-            continue
-        _create_match(candidate, job)
-
-def _create_match(candidate, job):
-    from applications.models import Application
-
-    professional_title_match = candidate.professional_title.strip().lower() == job.title.strip().lower()
-    skill_score = calculate_skill_score(candidate.skills, job.required_skills)
-    location_match = candidate.city.strip().lower() == job.location.strip().lower()
-
-    # Try to find an application from the candidate to this job
-    application = Application.objects.filter(candidate=candidate, job_post=job).first()
-    if application:
-        duration_match = str(application.duration_of_internship) == str(job.duration_of_internship)
-    else:
-        duration_match = False  # or True, depending on your logic
-
-    industry_match = (
-        candidate.degree and 
-        candidate.professional_title.strip().lower() == job.industry.strip().lower()
-    )
-    has_resume = bool(candidate.resume)
-
-    match = CandidateJobMatch(
-        candidate=candidate,
-        job_post=job,
-        professional_title_match=professional_title_match,
-        skill_match_score=skill_score,
-        degree_match=True,  # Placeholder
-        location_match=location_match,
+
+def rescore_application_pair(candidate_id, job_post_id, duration_match, score_missing=True, application_id=None):
+    """
+    Rewrites duration_match and total_score of one (candidate, job) match
+    with a single UPDATE and refreshes the pair's top-K rows. If the pair
+    was never scored (pruned for having no overlap), score_missing is set
+    and the job is active, the application is queued so process_match_queue
+    scores that pair; nothing is scored inside the request.
+    """
+    from .topk import refresh_top_matches
+    from .weights import get_active_weights, total_score_expression
+
+    updated = CandidateJobMatch.objects.filter(candidate_id=candidate_id, job_post_id=job_post_id).update(
         duration_match=duration_match,
-        industry_match=industry_match,
-        has_resume=has_resume,
+        total_score=total_score_expression(get_active_weights(), known={'duration_match': duration_match}),
+    )
+    if updated:
+        refresh_top_matches(candidate_ids=[candidate_id], job_ids=[job_post_id])
+    elif score_missing and application_id is not None and JobPost.active_jobs.filter(pk=job_post_id).exists():
+        enqueue_rematch(MatchQueueItem.APPLICATION, application_id)
+
+
+@receiver(post_save, sender=Application)
+def rescore_pair_on_application_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'duration_of_internship' not in update_fields:
+        return
+    job = instance.job_post
+    rescore_application_pair(
+        instance.candidate_id, job.pk, instance.duration_of_internship == job.duration_of_internship,
+        application_id=instance.pk,
     )
-    calculate_total_score(match)
-    match.save()
+
+
+@receiver(post_delete, sender=Application)
+def rescore_pair_on_application_delete(sender, instance, **kwargs):
+    rescore_application_pair(instance.candidate_id, instance.job_post_id, False, score_missing=False)
+
+
+@receiver(post_delete, sender=CandidateJobMatch)
+def refresh_top_matches_on_match_delete(sender, instance, **kwargs):
+    """
+    Deleting a match, or the candidate or job it belongs to, cascades its
+    top-K rows away; refill the owners' projections from the matches left.
+    """
+    from .topk import refresh_top_matches_on_commit
+
+    refresh_top_matches_on_commit(candidate_ids=[instance.candidate_id], job_ids=[instance.job_post_id])
@@ -0,0 +1,81 @@
+"""
+Canonical skill vocabulary.
+
+Skills are canonicalized with SKILL_ALIASES ("ReactJS" -> "react") and
+given stable integer ids in the Skill table, memoized per process.
+Candidates and jobs store their sorted id arrays in skill_ids so overlap is
+an intersect on int arrays; the batch engine packs them into bitsets and
+counts overlap with a popcount.
+"""
+import numpy as np
+
+from .models import Skill
+from .utils import canonical_skill
+
+LOOKUP_CHUNK_SIZE = 500
+
+_skill_memo = {}
+
+
+def _memoize(names):
+    """Loads the ids of names not memoized yet; returns the names still unknown."""
+    missing = sorted(n for n in names if n not in _skill_memo)
+    for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+        chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+        _skill_memo.update(Skill.objects.filter(name__in=chunk).values_list('name', 'id'))
+    return [n for n in missing if n not in _skill_memo]
+
+
+def assign_skill_ids(names):
+    """Returns {canonical name: Skill id}, creating vocabulary rows as needed."""
+    wanted = {canonical_skill(n) for n in names}
+    missing = _memoize(wanted)
+    if missing:
+        Skill.objects.bulk_create([Skill(name=n) for n in missing], ignore_conflicts=True)
+        _memoize(missing)
+    return {n: _skill_memo[n] for n in wanted}
+
+
+def skill_ids(skills):
+    """Sorted, de-duplicated Skill ids for a raw skill list."""
+    return sorted(set(assign_skill_ids(skills or []).values()))
+
+
+def known_skill_ids(skills):
+    """
+    Like skill_ids(), but lookup-only for read paths: skills without a
+    vocabulary row are left out instead of created.
+    """
+    wanted = {canonical_skill(n) for n in skills or []}
+    _memoize(wanted)
+    return sorted({_skill_memo[n] for n in wanted if n in _skill_memo})
+
+
+def entity_skill_ids(entity, field):
+    """Stored skill_ids of a Candidate/JobPost, looked up from `field` if not yet filled in."""
+    raw = getattr(entity, field)
+    return entity.skill_ids if entity.skill_ids or not raw else known_skill_ids(raw)
+
+
+def clear_skill_memo():
+    _skill_memo.clear()
+
+
+# ---------- Bitsets ----------
+
+def pack_bitsets(code_lists, width):
+    """Packs lists of dense skill codes into one uint8 bitset row per entity."""
+    bits = np.zeros((len(code_lists), max(width, 1)), dtype=bool)
+    for row, codes in enumerate(code_lists):
+        if codes:
+            bits[row, codes] = True
+    return np.packbits(bits, axis=1)
+
+
+def unpack_bitsets(packed, width):
+    return np.unpackbits(packed, axis=1, count=max(width, 1)).astype(np.float32)
+
+
+def bitset_overlap(a, b):
+    """Popcount of a & b per row."""
+    return np.bitwise_count(a & b).sum(axis=1, dtype=np.int32)
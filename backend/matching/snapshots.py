@@ -0,0 +1,67 @@
+"""
+Versioned on-disk array stores.
+
+save_arrays() writes a fresh directory of .npy files plus meta.json under
+root and then repoints root/CURRENT at it with an atomic rename, so
+readers never see a half-written version. Writers to one store are
+serialized by a lock file, and each save keeps the version it replaced, so
+a reader that resolved CURRENT just before the swap can still open it;
+anything older is removed.
+load_arrays() memory-maps the current version, so processes loading the
+same store share the page cache instead of each holding a copy.
+
+Every store lives in its own subdirectory of MATCHING_INDEX_DIR.
+"""
+import fcntl
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+
+def store_dir(name):
+    root = getattr(settings, 'MATCHING_INDEX_DIR', Path(settings.BASE_DIR) / 'matching_index')
+    return Path(root) / name
+
+
+def save_arrays(root, arrays, meta):
+    """Writes {name: array} and a JSON-serializable meta dict as the current version of root."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / 'LOCK', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        version = root / f"v{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        version.mkdir()
+        for name, array in arrays.items():
+            np.save(version / f"{name}.npy", np.asarray(array))
+        (version / 'meta.json').write_text(json.dumps(meta))
+
+        try:
+            previous = (root / 'CURRENT').read_text().strip()
+        except OSError:
+            previous = None
+        pointer = root / f"CURRENT.{uuid.uuid4().hex[:8]}"
+        pointer.write_text(version.name)
+        os.replace(pointer, root / 'CURRENT')
+        # Processes still mapping an old version keep their open files
+        for old in root.glob('v*'):
+            if old.name not in (version.name, previous):
+                shutil.rmtree(old, ignore_errors=True)
+    return version
+
+
+def load_arrays(root, mmap_mode='r'):
+    """Returns ({name: memory-mapped array}, meta) for the current version, or None."""
+    root = Path(root)
+    try:
+        version = root / (root / 'CURRENT').read_text().strip()
+        meta = json.loads((version / 'meta.json').read_text())
+        arrays = {path.stem: np.load(path, mmap_mode=mmap_mode) for path in version.glob('*.npy')}
+    except (OSError, ValueError):
+        return None
+    return arrays, meta
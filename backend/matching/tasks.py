@@ -0,0 +1,81 @@
+"""
+Database-backed work queue for rematching.
+
+post_save receivers enqueue one row per changed entity once the surrounding
+transaction commits; the process_match_queue command drains it in batches
+so request latency does not depend on table size.
+"""
+from django.db import transaction
+
+from applications.models import Application, JobPost
+from candidates.models import Candidate
+from .engine import run_batch_matching, rescore_pairs, clear_dirty, merge_summaries
+from .models import MatchQueueItem
+
+DEFAULT_QUEUE_BATCH_SIZE = 100
+
+
+def enqueue_rematches(entity_type, entity_ids):
+    """Queues a rematch of each entity after commit; duplicates are ignored."""
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+
+    def _enqueue():
+        MatchQueueItem.objects.bulk_create(
+            [MatchQueueItem(entity_type=entity_type, entity_id=entity_id) for entity_id in entity_ids],
+            ignore_conflicts=True,
+        )
+    transaction.on_commit(_enqueue)
+
+
+def enqueue_rematch(entity_type, entity_id):
+    """Queues a rematch of one entity after commit; duplicates are ignored."""
+    enqueue_rematches(entity_type, [entity_id])
+
+
+def claim_batch(batch_size=DEFAULT_QUEUE_BATCH_SIZE):
+    """Removes up to batch_size items from the queue and returns them."""
+    with transaction.atomic():
+        items = list(
+            MatchQueueItem.objects.select_for_update(skip_locked=True).order_by('enqueued_at')[:batch_size]
+        )
+        MatchQueueItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+    return items
+
+
+def process_batch(batch_size=DEFAULT_QUEUE_BATCH_SIZE, **options):
+    """
+    Rescores the entities in one claimed batch. Returns None when the queue
+    is empty. Claimed rows are deleted up front; if the worker dies the
+    entities stay marked dirty and the next incremental run picks them up.
+    """
+    items = claim_batch(batch_size)
+    if not items:
+        return None
+
+    candidate_ids = [i.entity_id for i in items if i.entity_type == MatchQueueItem.CANDIDATE]
+    job_ids = [i.entity_id for i in items if i.entity_type == MatchQueueItem.JOB_POST]
+    application_ids = [i.entity_id for i in items if i.entity_type == MatchQueueItem.APPLICATION]
+    candidates = Candidate.objects.filter(pk__in=candidate_ids)
+    jobs = JobPost.objects.filter(pk__in=job_ids)
+    dirty_candidates = list(candidates.values_list('pk', 'match_fingerprint'))
+    dirty_jobs = list(jobs.values_list('pk', 'match_fingerprint'))
+
+    options['rescore'] = True
+    summaries = []
+    if candidate_ids:
+        summaries.append(run_batch_matching(candidates=candidates, **options))
+    if job_ids:
+        summaries.append(run_batch_matching(jobs=jobs.filter(is_active=True), **options))
+    pairs = list(Application.objects.filter(pk__in=application_ids, job_post__is_active=True)
+                 .values_list('candidate_id', 'job_post_id'))
+    if pairs:
+        summaries.append(rescore_pairs(pairs, **options))
+
+    clear_dirty(Candidate, dirty_candidates)
+    clear_dirty(JobPost, dirty_jobs)
+
+    summary = merge_summaries({'pairs_scored': 0, 'created': 0, 'updated': 0}, *summaries)
+    summary['items'] = len(items)
+    return summary
@@ -1,23 +1,64 @@
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient, force_authenticate
-from matching.models import CandidateJobMatch
+from matching.models import CandidateJobMatch, CandidateTopMatch, JobTopMatch, MatchQueueItem
 from matching.permissions import IsCandidateUser, IsRecruiterUser
 from candidates.models import Candidate
 from recruiters.models import Recruiter
 from applications.models import JobPost
 from matching.utils import calculate_skill_score, calculate_total_score
+from io import StringIO
+from django.core.management import call_command
+import pickle
+import tempfile
+from concurrent.futures import Future
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
-class MatchingSignalAndPermissionTests(TestCase):
+
+class MatchingTestCase(TestCase):
+    def setUp(self):
+        from matching.skills import clear_skill_memo
+        from matching.titles import clear_title_memo
+        # The title and skill memos outlive the per-test transaction rollback
+        clear_title_memo()
+        clear_skill_memo()
+        # Each test gets its own index directory, so snapshots never land in backend/matching_index
+        index_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MATCHING_INDEX_DIR=index_dir))
+
+
+def make_recruiter(username, **fields):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass', role='recruiter')
+    defaults = dict(company_name="Tech Inc", recruiter_name="Jane", phone="1234567890", location="Lagos", industry="Tech", company_size="11-50", duration_of_internship="6")
+    defaults.update(fields)
+    return Recruiter.objects.create(user=user, **defaults)
+
+
+def make_candidate(username, **fields):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass', role='candidate')
+    defaults = dict(professional_title="Software Engineer", degree="Computer Science", graduation_year=2024, phone="1234567890", city="Lagos", gender="Male", languages="English", employment_type="intern", resume="resume.pdf", skills=["python", "django"])
+    defaults.update(fields)
+    return Candidate.objects.create(user=user, **defaults)
+
+
+def make_job(recruiter, **fields):
+    defaults = dict(title="Software Engineer", description="Job desc", location="Lagos", required_skills=["python", "django"], duration_of_internship=6, industry="Tech", is_active=True)
+    defaults.update(fields)
+    return JobPost.objects.create(recruiter=recruiter, **defaults)
+
+
+class MatchingSignalAndPermissionTests(MatchingTestCase):
     def setUp(self):
+        super().setUp()
         self.user = User.objects.create_user(username='user', email='user@example.com', password='testpass')
-        self.candidate_user = User.objects.create_user(username='candidate', email='cand@example.com', password='testpass')
-        self.recruiter_user = User.objects.create_user(username='recruiter', email='rec@example.com', password='testpass')
-        self.candidate = Candidate.objects.create(user=self.candidate_user, professional_title="Software Engineer", degree="Computer Science", graduation_year=2024, phone="1234567890", city="Lagos", gender="Male", languages="English", employment_type="intern", resume="resume.pdf", location="Lagos", skills=["python", "django"], duration_of_internship=6)
-        self.recruiter = Recruiter.objects.create(user=self.recruiter_user, company_name="Tech Inc", recruiter_name="John Doe", phone="1234567890", location="Lagos", industry="Tech", company_size="10-50", duration_of_internship="6")
+        self.candidate = make_candidate('candidate')
+        self.candidate_user = self.candidate.user
+        self.recruiter = make_recruiter('recruiter', recruiter_name="John Doe", company_size="10-50")
+        self.recruiter_user = self.recruiter.user
 
     def test_is_candidate_user_permission(self):
         request = RequestFactory().get('/')
@@ -32,21 +73,25 @@ class MatchingSignalAndPermissionTests(TestCase):
         self.assertTrue(perm.has_permission(request, None))
 
     def test_run_auto_matching_signal(self):
-        job = JobPost.objects.create(recruiter=self.recruiter, title="Software Engineer", description="Job desc", location="Lagos", required_skills=["python", "django"], duration_of_internship=6, industry="Tech", is_active=True)
+        from django.core.management import call_command
+        with self.captureOnCommitCallbacks(execute=True):
+            job = JobPost.objects.create(recruiter=self.recruiter, title="Software Engineer", description="Job desc", location="Lagos", required_skills=["python", "django"], duration_of_internship=6, industry="Tech", is_active=True)
+        call_command('process_match_queue', '--once', stdout=StringIO())
         match = CandidateJobMatch.objects.filter(candidate=self.candidate, job_post=job)
         self.assertTrue(match.exists())
 
 
-class MatchingViewTests(TestCase):
+class MatchingViewTests(MatchingTestCase):
     def setUp(self):
+        super().setUp()
         self.client = APIClient()
 
         self.admin_user = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass')
-        self.recruiter_user = User.objects.create_user(username='recruiter', email='recruiter@example.com', password='pass')
-        self.candidate_user = User.objects.create_user(username='candidate', email='candidate@example.com', password='pass')
 
-        self.recruiter = Recruiter.objects.create(user=self.recruiter_user, company_name="Tech Inc", recruiter_name="Jane", phone="1234567890", location="Lagos", industry="Tech", company_size="11-50", duration_of_internship="6")
-        self.candidate = Candidate.objects.create(user=self.candidate_user, professional_title="Software Engineer", degree="Computer Science", graduation_year=2025, phone="1234567890", city="Lagos", gender="Male", languages="English", employment_type="intern", resume="resume.pdf", location="Lagos", skills=["python", "django"], duration_of_internship=6)
+        self.recruiter = make_recruiter('recruiter')
+        self.recruiter_user = self.recruiter.user
+        self.candidate = make_candidate('candidate', graduation_year=2025)
+        self.candidate_user = self.candidate.user
 
         self.job_post = JobPost.objects.create(recruiter=self.recruiter, title="Software Engineer", description="...", location="Lagos", required_skills=["python", "django"], duration_of_internship=6, industry="Tech", is_active=True)
 
@@ -55,9 +100,9 @@ class MatchingViewTests(TestCase):
     def test_admin_can_run_matching_engine(self):
         self.client.login(email='admin@example.com', password='pass')
         self.client.force_authenticate(user=self.admin_user)
-        url = reverse('run-matching-engine')
+        url = reverse('run-matching')
         response = self.client.post(url)
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.status_code, 202)
 
     def test_candidate_can_view_matches(self):
         self.client.login(email='candidate@example.com', password='pass')
@@ -70,7 +115,1112 @@ class MatchingViewTests(TestCase):
     def test_recruiter_can_view_matches(self):
         self.client.login(email='recruiter@example.com', password='pass')
         self.client.force_authenticate(user=self.recruiter_user)
-        url = reverse('recruiter-top-matches')
+        url = reverse('recruiter-matches')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTrue(len(response.data) >= 1)
+
+
+class MatchingEngineTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter = make_recruiter('engine-recruiter')
+        self.alice = make_candidate('alice')
+        self.bob = make_candidate('bob', professional_title="Legal Researcher", degree="Law", city="Abuja", skills=["Research"], resume=None)
+        self.backend_job = make_job(self.recruiter, required_skills=["Python", "SQL"])
+        self.law_job = make_job(self.recruiter, title="Legal Researcher", location="Abuja", industry="Law", required_skills=["research", "writing"])
+        make_job(self.recruiter, is_active=False)
+        CandidateJobMatch.objects.all().delete()
+
+    def test_engine_scores_every_active_pair_with_command_rules(self):
+        from matching.engine import MatchingEngine
+
+        summary = MatchingEngine(prune=False).load().run()
+
+        self.assertEqual(summary['created'], 4)
+        match = CandidateJobMatch.objects.get(candidate=self.alice, job_post=self.backend_job)
+        self.assertTrue(match.professional_title_match)
+        self.assertEqual(match.skill_match_score, calculate_skill_score(self.alice.skills, self.backend_job.required_skills))
+        self.assertTrue(match.degree_match)
+        self.assertTrue(match.location_match)
+        self.assertFalse(match.duration_match)
+        self.assertTrue(match.has_resume)
+        self.assertAlmostEqual(match.total_score, 0.75)
+
+        law = CandidateJobMatch.objects.get(candidate=self.bob, job_post=self.law_job)
+        self.assertEqual(law.skill_match_score, 0.5)
+        self.assertFalse(law.has_resume)
+        self.assertAlmostEqual(law.total_score, 0.45)
+
+    def test_engine_only_rescores_existing_matches_when_asked(self):
+        from matching.engine import MatchingEngine
+
+        CandidateJobMatch.objects.create(candidate=self.alice, job_post=self.backend_job, total_score=0.0)
+        summary = MatchingEngine(prune=False).load().run()
+        self.assertEqual((summary['created'], summary['updated']), (3, 0))
+        self.assertEqual(CandidateJobMatch.objects.get(candidate=self.alice, job_post=self.backend_job).total_score, 0.0)
+
+        summary = MatchingEngine(rescore=True, prune=False).load().run()
+        self.assertEqual((summary['created'], summary['updated']), (0, 4))
+        self.assertAlmostEqual(CandidateJobMatch.objects.get(candidate=self.alice, job_post=self.backend_job).total_score, 0.75)
+
+    def test_run_matching_command_uses_engine(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        out = StringIO()
+        call_command('run_matching', stdout=out)
+        self.assertIn('2 matches created', out.getvalue())
+        self.assertEqual(CandidateJobMatch.objects.count(), 2)
+
+    def test_index_prunes_zero_overlap_pairs(self):
+        from matching.engine import MatchingEngine
+
+        summary = MatchingEngine().load().run()
+
+        self.assertEqual(summary['pairs_scored'], 2)
+        self.assertFalse(CandidateJobMatch.objects.filter(candidate=self.alice, job_post=self.law_job).exists())
+        self.assertFalse(CandidateJobMatch.objects.filter(candidate=self.bob, job_post=self.backend_job).exists())
+
+    def test_index_keeps_application_pairs_and_matches_full_scores(self):
+        from applications.models import Application
+        from matching.engine import MatchingEngine
+
+        Application.objects.create(candidate=self.bob, job_post=self.backend_job, resume="resume.pdf", duration_of_internship=6)
+        pruned = MatchingEngine().load()
+        full = MatchingEngine(prune=False).load()
+
+        pruned_scores = pruned.score_block(0, len(pruned.candidates))
+        full_scores = full.score_block(0, len(full.candidates))
+        full_totals = dict(zip(zip(full_scores.candidate_ids.tolist(), full_scores.job_ids.tolist()), full_scores.total.tolist()))
+
+        self.assertEqual(len(pruned_scores), 3)
+        for pair, total in zip(zip(pruned_scores.candidate_ids.tolist(), pruned_scores.job_ids.tolist()), pruned_scores.total.tolist()):
+            self.assertAlmostEqual(total, full_totals[pair])
+        self.assertIn((self.bob.id, self.backend_job.id), full_totals)
+
+
+class IncrementalMatchingTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter = make_recruiter('inc-recruiter')
+        self.alice = make_candidate('inc-alice')
+        self.job = make_job(self.recruiter, required_skills=["python", "sql"])
+
+    def test_saves_mark_entities_dirty_only_when_inputs_change(self):
+        from matching.engine import run_incremental_matching
+
+        run_incremental_matching()
+        self.assertFalse(Candidate.objects.filter(match_dirty=True).exists())
+        self.assertFalse(JobPost.objects.filter(match_dirty=True).exists())
+
+        self.alice.refresh_from_db()
+        self.alice.can_university_view = False
+        self.alice.save()
+        self.assertFalse(Candidate.objects.get(pk=self.alice.pk).match_dirty)
+
+        self.alice.skills = ["python", "sql"]
+        self.alice.save(update_fields=['skills'])
+        self.assertTrue(Candidate.objects.get(pk=self.alice.pk).match_dirty)
+
+    def test_incremental_run_updates_stale_matches_in_place(self):
+        from matching.engine import run_incremental_matching
+
+        run_incremental_matching()
+        match = CandidateJobMatch.objects.get(candidate=self.alice, job_post=self.job)
+        self.assertEqual(match.skill_match_score, 0.5)
+
+        self.alice.refresh_from_db()
+        self.alice.skills = ["python", "sql"]
+        self.alice.save()
+        summary = run_incremental_matching()
+
+        self.assertEqual((summary['dirty_candidates'], summary['dirty_jobs']), (1, 0))
+        self.assertEqual(summary['updated'], 1)
+        refreshed = CandidateJobMatch.objects.get(pk=match.pk)
+        self.assertEqual(refreshed.skill_match_score, 1.0)
+        self.assertFalse(Candidate.objects.get(pk=self.alice.pk).match_dirty)
+
+
+class MatchQueueTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter = make_recruiter('queue-recruiter')
+
+    def test_saves_enqueue_once_per_entity_after_commit(self):
+        from matching.models import MatchQueueItem
+
+        with self.captureOnCommitCallbacks(execute=True):
+            candidate = make_candidate('queue-alice')
+            candidate.save()
+            make_job(self.recruiter)
+            make_job(self.recruiter, is_active=False)
+
+        self.assertEqual(CandidateJobMatch.objects.count(), 0)
+        self.assertEqual(
+            sorted(MatchQueueItem.objects.values_list('entity_type', flat=True)),
+            [MatchQueueItem.CANDIDATE, MatchQueueItem.JOB_POST],
+        )
+
+    def test_process_match_queue_drains_and_scores(self):
+        from django.core.management import call_command
+        from matching.models import MatchQueueItem
+
+        with self.captureOnCommitCallbacks(execute=True):
+            candidate = make_candidate('queue-bob')
+            job = make_job(self.recruiter)
+
+        out = StringIO()
+        call_command('process_match_queue', '--once', stdout=out)
+
+        self.assertFalse(MatchQueueItem.objects.exists())
+        self.assertTrue(CandidateJobMatch.objects.filter(candidate=candidate, job_post=job).exists())
+        self.assertFalse(Candidate.objects.get(pk=candidate.pk).match_dirty)
+        self.assertIn('2 entities processed', out.getvalue())
+
+
+class PicklingPool:
+    """
+    Stands in for the spawn pool: runs each task inline, since workers could
+    not see the in-memory test database, but pickles its arguments and
+    result as the process boundary would.
+    """
+
+    def __init__(self, max_workers=None, mp_context=None, initializer=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(pickle.loads(pickle.dumps(fn(*pickle.loads(pickle.dumps(args))))))
+        return future
+
+
+class ShardedMatchingTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter('shard-recruiter')
+        self.candidates = [make_candidate(f'shard-{i}') for i in range(5)]
+        make_job(recruiter)
+        make_job(recruiter, required_skills=["python"])
+
+    def test_shard_ranges_cover_every_candidate_once(self):
+        from matching.parallel import shard_ranges
+
+        ranges = shard_ranges(shard_size=2)
+        ids = [c.id for c in self.candidates]
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], ids[0])
+        self.assertEqual(ranges[-1], (ids[4], ids[4]))
+
+    def test_sharded_run_matches_single_engine_run(self):
+        from matching.parallel import run_sharded_matching
+
+        progress = []
+        summary = run_sharded_matching(shard_size=2, progress=lambda *args: progress.append(args))
+
+        self.assertEqual(summary['shards'], 3)
+        self.assertEqual(summary['created'], 10)
+        self.assertEqual(summary['candidates'], 5)
+        self.assertEqual([p[0] for p in progress], [1, 2, 3])
+        self.assertEqual(CandidateJobMatch.objects.count(), 10)
+
+    def test_worker_pool_path_matches_single_engine_run(self):
+        from unittest import mock
+        from matching import parallel
+        from matching.engine import MatchingEngine
+        from matching.models import CandidateJobMatchManager
+
+        MatchingEngine().load().run()
+        expected = {(m.candidate_id, m.job_post_id): (m.total_score, m.skill_match_score, m.location_match)
+                    for m in CandidateJobMatch.objects.all()}
+        CandidateJobMatch.objects.all().delete()
+
+        upsert = mock.patch.object(CandidateJobMatchManager, 'upsert_scored', autospec=True,
+                                   side_effect=CandidateJobMatchManager.upsert_scored)
+        with mock.patch.object(parallel, 'ProcessPoolExecutor', PicklingPool), upsert as upsert_scored:
+            summary = parallel.run_sharded_matching(workers=2, shard_size=2)
+            rescored = parallel.run_sharded_matching(workers=2, shard_size=2, rescore=True)
+
+        # One manager upsert per shard (three shards of up to two candidates) and run
+        self.assertEqual(upsert_scored.call_count, 6)
+        self.assertEqual((summary['created'], summary['updated']), (10, 0))
+        self.assertEqual((rescored['created'], rescored['updated']), (0, 10))
+        actual = {(m.candidate_id, m.job_post_id): (m.total_score, m.skill_match_score, m.location_match)
+                  for m in CandidateJobMatch.objects.all()}
+        self.assertEqual(actual, expected)
+        self.assertTrue(all(m.created_at for m in CandidateJobMatch.objects.all()))
+
+
+class TopMatchProjectionTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter = make_recruiter('top-recruiter')
+        self.strong = make_candidate('top-strong', skills=["python", "django"])
+        self.weak = make_candidate('top-weak', skills=["python"], resume=None)
+        self.job = make_job(self.recruiter)
+
+    @override_settings(MATCHING_TOP_K=1)
+    def test_engine_keeps_top_k_per_job_and_candidate(self):
+        from matching.engine import MatchingEngine
+        from matching.models import CandidateTopMatch, JobTopMatch
+
+        MatchingEngine().load().run()
+
+        top = JobTopMatch.objects.get(job_post=self.job)
+        self.assertEqual((top.rank, top.match.candidate_id), (1, self.strong.id))
+        self.assertEqual(CandidateTopMatch.objects.filter(candidate=self.weak).count(), 1)
+
+        self.weak.skills = ["python", "django"]
+        self.weak.resume = "resume.pdf"
+        self.weak.save()
+        CandidateJobMatch.objects.filter(candidate=self.strong).update(total_score=0.1)
+        MatchingEngine(rescore=True).load(candidates=Candidate.objects.filter(pk=self.weak.pk)).run()
+
+        self.assertEqual(JobTopMatch.objects.get(job_post=self.job).match.candidate_id, self.weak.id)
+
+    @override_settings(MATCHING_TOP_K=1)
+    def test_deletes_refill_the_projection(self):
+        from matching.engine import MatchingEngine
+        from matching.models import CandidateTopMatch, JobTopMatch
+
+        other_job = make_job(self.recruiter, title="Data Analyst", required_skills=["python"])
+        MatchingEngine().load().run()
+        self.assertEqual(JobTopMatch.objects.get(job_post=self.job).match.candidate_id, self.strong.id)
+        top_job = CandidateTopMatch.objects.get(candidate=self.weak).match.job_post_id
+
+        with self.captureOnCommitCallbacks(execute=True):
+            JobTopMatch.objects.get(job_post=self.job).match.delete()
+        self.assertEqual(JobTopMatch.objects.get(job_post=self.job).match.candidate_id, self.weak.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            JobPost.objects.filter(pk=top_job).delete()
+        remaining = other_job if top_job == self.job.id else self.job
+        self.assertEqual(CandidateTopMatch.objects.get(candidate=self.weak).match.job_post_id, remaining.id)
+
+    @override_settings(MATCHING_TOP_K=1)
+    def test_dashboard_falls_back_when_projection_holds_only_closed_jobs(self):
+        from matching.engine import MatchingEngine
+
+        from datetime import date, timedelta
+
+        deadline = date.today() + timedelta(days=30)
+        JobPost.objects.filter(pk=self.job.pk).update(application_deadline=deadline)
+        open_job = make_job(self.recruiter, title="Data Analyst", required_skills=["python"], application_deadline=deadline)
+        MatchingEngine().load().run()
+        self.assertEqual(CandidateTopMatch.objects.get(candidate=self.strong).match.job_post_id, self.job.id)
+        JobPost.objects.filter(pk=self.job.pk).update(is_active=False)
+
+        client = APIClient()
+        client.force_authenticate(user=self.strong.user)
+        response = client.get(reverse('candidate-dashboard-matches'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['job_post']['id'] for m in response.data['top_matches']], [open_job.id])
+
+    def test_candidate_stats_read_projection(self):
+        from matching.engine import MatchingEngine
+
+        MatchingEngine().load().run()
+        client = APIClient()
+        client.force_authenticate(user=self.strong.user)
+        response = client.get(reverse('candidate-dashboard-stats'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['top_matched_jobs'][0]['job_title'], self.job.title)
+
+
+class TitleClusterTests(MatchingTestCase):
+    def test_synonyms_and_fuzzy_variants_share_a_cluster(self):
+        from matching.titles import assign_title_clusters
+        from matching.utils import titles_match
+
+        clusters = assign_title_clusters(["Frontend Developer", "React Developer", " web  developer", "Frontend Developers", "Legal Analyst"])
+
+        self.assertEqual(clusters["frontend developer"], clusters["react developer"])
+        self.assertEqual(clusters["frontend developer"], clusters["web developer"])
+        self.assertEqual(clusters["frontend developer"], clusters["frontend developers"])
+        self.assertNotEqual(clusters["frontend developer"], clusters["legal analyst"])
+        self.assertTrue(titles_match("Legal Researcher", "legal analyst"))
+        self.assertFalse(titles_match("Legal Researcher", "Frontend Developer"))
+
+    def test_clusters_are_persisted_and_memoized(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from matching.models import NormalizedTitle
+        from matching.titles import assign_title_clusters, clear_title_memo
+
+        first = assign_title_clusters(["Backend Engineer", "Data Analyst"])
+        self.assertEqual(NormalizedTitle.objects.count(), 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(assign_title_clusters(["backend engineer"]), {"backend engineer": first["backend engineer"]})
+        self.assertEqual(len(queries), 0)
+
+        clear_title_memo()
+        self.assertEqual(assign_title_clusters(["Data Analyst"])["data analyst"], first["data analyst"])
+
+
+class SkillVocabularyTests(MatchingTestCase):
+    def test_aliases_share_a_canonical_skill(self):
+        from matching.utils import skill_score_from_ids
+        from matching.skills import skill_ids
+
+        self.assertEqual(calculate_skill_score(["ReactJS", "Node"], ["react", "node.js"]), 1.0)
+        self.assertEqual(skill_ids(["ReactJS", " react.js "]), skill_ids(["React"]))
+        self.assertEqual(skill_score_from_ids(skill_ids(["JS", "python3"]), skill_ids(["javascript", "Python", "Go"])), 0.6667)
+
+    def test_saves_store_skill_ids(self):
+        from matching.models import Skill
+
+        candidate = make_candidate('skills-user', skills=["Python", "python 3", "Django"])
+        candidate.refresh_from_db()
+        self.assertEqual(
+            candidate.skill_ids,
+            sorted(Skill.objects.filter(name__in=["python", "django"]).values_list('id', flat=True)),
+        )
+
+    def test_bitset_overlap_matches_index_overlap(self):
+        from matching.engine import MatchingEngine
+        from matching.skills import bitset_overlap
+
+        recruiter = make_recruiter('skills-recruiter')
+        make_candidate('skills-a', skills=["ReactJS", "SQL"])
+        make_candidate('skills-b', skills=["Go"])
+        make_job(recruiter, required_skills=["react", "sql", "Docker"])
+        make_job(recruiter, required_skills=["go", "Rust"])
+
+        engine = MatchingEngine().load()
+        ci, ji, overlap = engine.index.pairs(0, len(engine.candidates))
+        self.assertEqual(bitset_overlap(engine.candidate_bits[ci], engine.job_bits[ji]).tolist(), overlap.astype(int).tolist())
+        scores = engine.score_pairs(ci, ji)
+        self.assertIn(1.0 / 2, scores.components['skill_match_score'].tolist())
+
+
+class RecommendationPrefilterTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        from datetime import timedelta
+        from django.utils import timezone
+        self.recruiter = make_recruiter('rec-recruiter')
+        self.job = make_job(self.recruiter, location=" lagos ", industry="TECH")
+        make_job(self.recruiter, is_active=False)
+        make_job(self.recruiter, application_deadline=timezone.now().date() - timedelta(days=1))
+        make_job(self.recruiter, location="Abuja")
+        self.other_job = make_job(self.recruiter, duration_of_internship=3)
+
+    def _apply(self, candidate, job, duration):
+        from applications.models import Application
+        return Application.objects.create(candidate=candidate, job_post=job, resume="resume.pdf", duration_of_internship=duration)
+
+    def test_candidate_sees_only_open_jobs_passing_sql_filters(self):
+        from matching.utils import match_candidate_to_jobs
+
+        candidate = make_candidate('rec-alice', employment_type="Tech")
+        self._apply(candidate, self.other_job, 6)
+
+        self.assertEqual(match_candidate_to_jobs(candidate), [self.job])
+
+    def test_job_candidates_use_one_query_regardless_of_catalog_size(self):
+        from matching.utils import match_jobpost_to_candidates
+
+        for n in range(5):
+            candidate = make_candidate(f'rec-{n}', employment_type="tech", skills=["Python3", "Django"])
+            self._apply(candidate, self.other_job, 6 if n % 2 else 3)
+        make_candidate('rec-law', employment_type="tech", skills=["Law"])
+
+        with self.assertNumQueries(1):
+            matches = match_jobpost_to_candidates(self.job)
+        self.assertEqual(sorted(c.user.username for c in matches), ['rec-1', 'rec-3'])
+
+
+class PerfToolingTests(MatchingTestCase):
+    def test_seed_perf_data_creates_consistent_rows(self):
+        from django.core.management import call_command
+        from applications.models import Application
+
+        out = StringIO()
+        call_command('seed_perf_data', candidates=40, jobs=8, universities=2, stdout=out)
+
+        self.assertIn('40 candidates', out.getvalue())
+        self.assertEqual(Candidate.objects.count(), 40)
+        self.assertEqual(JobPost.objects.count(), 8)
+        self.assertTrue(Application.objects.exists())
+        self.assertTrue(CandidateJobMatch.objects.exists())
+        candidate = Candidate.objects.first()
+        self.assertTrue(candidate.skill_ids)
+        self.assertEqual(candidate.city_key, candidate.city.lower())
+
+    def test_benchmark_reports_json_and_rolls_back(self):
+        import json
+        import os
+        from django.conf import settings
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('benchmark_matching', scales='20', jobs_ratio=0.2, stdout=out)
+
+        report = json.loads(out.getvalue())
+        results = report['scales'][0]['results']
+        self.assertEqual(report['scales'][0]['jobs'], 4)
+        for name in ('run_matching', 'run_matching_stream', 'signal_receivers', 'process_match_queue', 'match_candidate_to_jobs', 'match_jobpost_to_candidates'):
+            self.assertLessEqual({'seconds', 'queries', 'peak_memory_kb'}, set(results[name]))
+        self.assertGreater(results['process_match_queue']['queries'], 0)
+        self.assertEqual(Candidate.objects.count(), 0)
+        self.assertFalse(MatchQueueItem.objects.exists())
+        # Snapshots went to a temporary directory, not the configured one
+        self.assertEqual(os.listdir(settings.MATCHING_INDEX_DIR), [])
+
+
+class MatchUpsertTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter('upsert-recruiter')
+        self.candidates = [make_candidate(f'upsert-{n}') for n in range(3)]
+        self.job = make_job(recruiter)
+        CandidateJobMatch.objects.all().delete()
+
+    def test_calculate_total_score_does_not_save(self):
+        match = CandidateJobMatch(candidate=self.candidates[0], job_post=self.job, skill_match_score=1.0, has_resume=True)
+        from matching.utils import SCORE_WEIGHTS
+        with self.assertNumQueries(0):
+            calculate_total_score(match, SCORE_WEIGHTS)
+        self.assertAlmostEqual(match.total_score, 0.4)
+
+    def test_upsert_inserts_and_updates_in_one_statement_per_batch(self):
+        CandidateJobMatch.objects.create(candidate=self.candidates[0], job_post=self.job, total_score=0.9)
+        matches = [
+            CandidateJobMatch(candidate=candidate, job_post=self.job, degree_match=True)
+            for candidate in self.candidates
+        ]
+        with self.assertNumQueries(4):  # active weights, savepoint, upsert, release
+            CandidateJobMatch.objects.upsert(matches)
+
+        self.assertEqual(CandidateJobMatch.objects.count(), 3)
+        self.assertEqual(set(CandidateJobMatch.objects.values_list('total_score', flat=True)), {0.1})
+
+    def test_upsert_scored_writes_engine_arrays_in_batches(self):
+        import numpy as np
+        from matching.engine import ScoredPairs
+        from matching.models import MATCH_FIELDS
+
+        existing = CandidateJobMatch.objects.create(candidate=self.candidates[0], job_post=self.job, total_score=0.9)
+        ids = np.array([c.pk for c in self.candidates])
+        components = {name: np.zeros(3) for name in MATCH_FIELDS}
+        components['degree_match'] = np.array([True, False, True])
+        components['skill_match_score'] = np.array([0.5, 0.25, 1.0], dtype=np.float32)
+        scored = ScoredPairs(ids, np.full(3, self.job.pk), components, np.array([0.123456, 0.2, 0.3]))
+
+        with self.assertNumQueries(6):  # savepoint, upsert, release for each of two batches
+            CandidateJobMatch.objects.upsert_scored(scored, batch_size=2)
+
+        rows = {m.candidate_id: m for m in CandidateJobMatch.objects.all()}
+        self.assertEqual(len(rows), 3)
+        first = rows[self.candidates[0].pk]
+        self.assertEqual((first.pk, first.created_at), (existing.pk, existing.created_at))
+        self.assertEqual((first.total_score, first.degree_match, first.skill_match_score), (0.1235, True, 0.5))
+        self.assertFalse(rows[self.candidates[1].pk].degree_match)
+
+    def test_engine_writes_through_the_manager(self):
+        from unittest import mock
+        from matching.engine import MatchingEngine
+        from matching.models import CandidateJobMatchManager
+
+        with mock.patch.object(CandidateJobMatchManager, 'upsert_scored', autospec=True,
+                               side_effect=CandidateJobMatchManager.upsert_scored) as upsert:
+            MatchingEngine().load().run()
+        self.assertTrue(upsert.called)
+        self.assertEqual(CandidateJobMatch.objects.count(), 3)
+
+
+class ScoreWeightsTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter('weights-recruiter')
+        make_candidate('weights-a')
+        make_candidate('weights-b', city="Abuja", skills=["python"], resume=None)
+        make_job(recruiter)
+        make_job(recruiter, location="Abuja", required_skills=["python", "go"])
+        from matching.engine import MatchingEngine
+        MatchingEngine(rescore=True).load().run()
+
+    def test_activating_a_version_deactivates_the_others(self):
+        from matching.models import ScoreWeights
+        from matching.weights import get_active_weights
+
+        first = ScoreWeights.objects.create(is_active=True)
+        second = ScoreWeights.objects.create(skill_match_score=0.5, is_active=True)
+
+        first.refresh_from_db()
+        self.assertFalse(first.is_active)
+        self.assertEqual(get_active_weights(), second.as_dict())
+
+    def test_recompute_matches_in_memory_totals_and_reranks(self):
+        from django.core.management import call_command
+        from matching.models import ScoreWeights, JobTopMatch
+
+        weights = ScoreWeights.objects.create(professional_title_match=0, skill_match_score=1.0, location_match=0.5)
+        call_command('recompute_total_scores', weights_version=weights.pk, stdout=StringIO())
+
+        for match in CandidateJobMatch.objects.all():
+            expected = calculate_total_score(CandidateJobMatch(**{f: getattr(match, f) for f in weights.as_dict()}), weights.as_dict()).total_score
+            self.assertAlmostEqual(match.total_score, expected)
+        for top in JobTopMatch.objects.select_related('match'):
+            self.assertAlmostEqual(top.total_score, top.match.total_score)
+
+
+class MatchingRunTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter('run-recruiter')
+        self.candidates = [make_candidate(f'run-{n}') for n in range(5)]
+        make_job(recruiter)
+        make_job(recruiter, required_skills=["django"])
+        CandidateJobMatch.objects.all().delete()
+
+    def test_failed_run_resumes_from_last_checkpoint(self):
+        from unittest import mock
+        from matching import parallel
+        from matching.models import MatchingRun
+        from matching.runs import create_run, execute_run
+
+        run = create_run(shard_size=2)
+        self.assertEqual(len(run.shards), 3)
+
+        real_score_shard = parallel.score_shard
+        calls = []
+
+        def flaky(first_id, last_id, options):
+            calls.append(first_id)
+            if len(calls) == 2:
+                raise RuntimeError("worker died")
+            return real_score_shard(first_id, last_id, options)
+
+        with mock.patch.object(parallel, 'score_shard', flaky):
+            with self.assertRaises(RuntimeError):
+                execute_run(run)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.completed_shards, run.candidates_done), (MatchingRun.FAILED, [0], 2))
+
+        execute_run(run)
+        run.refresh_from_db()
+        self.assertEqual(run.status, MatchingRun.COMPLETED)
+        self.assertEqual(sorted(run.completed_shards), [0, 1, 2])
+        self.assertEqual(run.candidates_done, 5)
+        self.assertEqual(CandidateJobMatch.objects.count(), 10)
+
+    def test_run_matching_checkpoint_records_run(self):
+        from django.core.management import call_command
+        from matching.models import MatchingRun
+
+        out = StringIO()
+        call_command('run_matching', checkpoint=True, shard_size=2, stdout=out)
+
+        run = MatchingRun.objects.get()
+        self.assertEqual(run.status, MatchingRun.COMPLETED)
+        self.assertEqual(run.progress, 1.0)
+        self.assertIn('10 matches created', out.getvalue())
+
+
+    def test_queued_runs_execute_one_at_a_time(self):
+        from matching.models import MatchingRun
+        from matching.runs import claim_run, create_run, execute_run
+
+        first, second = create_run(shard_size=2), create_run()
+
+        claimed = claim_run()
+        self.assertEqual((claimed.pk, claimed.status), (first.pk, MatchingRun.RUNNING))
+        self.assertIsNone(claim_run())
+        execute_run(claimed)
+        self.assertEqual(claim_run().pk, second.pk)
+
+    def test_abandoned_run_is_resumed_by_the_next_claim(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from matching.models import MatchingRun
+        from matching.runs import claim_run, create_run
+
+        run = create_run(shard_size=2)
+        create_run()
+        MatchingRun.objects.filter(pk=run.pk).update(
+            status=MatchingRun.RUNNING, last_checkpoint_at=timezone.now() - timedelta(hours=2),
+        )
+
+        self.assertEqual(claim_run().pk, run.pk)
+
+    def test_api_queues_a_run_for_the_worker(self):
+        from matching.models import MatchingRun
+
+        admin = User.objects.create_superuser(username='run-admin', email='run-admin@example.com', password='pass')
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        response = client.post(reverse('run-matching'))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(CandidateJobMatch.objects.exists())
+        run = MatchingRun.objects.get(pk=response.data['run_id'])
+        self.assertEqual(run.status, MatchingRun.PENDING)
+
+        out = StringIO()
+        call_command('process_matching_runs', '--once', stdout=out)
+        run.refresh_from_db()
+        self.assertEqual(run.status, MatchingRun.COMPLETED)
+        self.assertEqual(CandidateJobMatch.objects.count(), 10)
+        self.assertIn('1 runs executed', out.getvalue())
+
+
+class FieldChangeDetectionTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter = make_recruiter('fields-recruiter')
+        self.candidate = make_candidate('fields-alice')
+        self.job = make_job(self.recruiter)
+
+    def test_saves_outside_match_fields_do_no_matching_work(self):
+        from matching.models import MatchQueueItem
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertNumQueries(1):
+                self.candidate.can_university_view = False
+                self.candidate.save(update_fields=['can_university_view'])
+            self.candidate.save()
+            self.job.number_of_slots = 3
+            self.job.save()
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(MatchQueueItem.objects.exists())
+
+    def test_match_field_changes_enqueue_only_that_entity(self):
+        from matching.models import MatchQueueItem
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidate.city = "Abuja"
+            self.candidate.save(update_fields=['city'])
+
+        self.assertEqual(
+            list(MatchQueueItem.objects.values_list('entity_type', 'entity_id')),
+            [(MatchQueueItem.CANDIDATE, self.candidate.pk)],
+        )
+        self.assertEqual(Candidate.objects.get(pk=self.candidate.pk).city_key, "abuja")
+
+    def test_toggle_university_view_skips_matching(self):
+        from matching.models import MatchQueueItem
+
+        client = APIClient()
+        client.force_authenticate(self.candidate.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('toggle-university-visibility'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(MatchQueueItem.objects.exists())
+
+
+class ApplicationPairRescoreTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter('pair-recruiter')
+        self.candidate = make_candidate('pair-alice')
+        self.job = make_job(recruiter)
+        self.other_job = make_job(recruiter, required_skills=["django"])
+        from matching.engine import MatchingEngine
+        MatchingEngine(rescore=True).load().run()
+
+    def test_application_rescores_only_its_pair_in_one_update(self):
+        from applications.models import Application
+
+        before = CandidateJobMatch.objects.get(candidate=self.candidate, job_post=self.job)
+        other_before = CandidateJobMatch.objects.get(candidate=self.candidate, job_post=self.other_job).total_score
+        self.assertFalse(before.duration_match)
+
+        with CaptureQueriesContext(connection) as queries:
+            application = Application.objects.create(candidate=self.candidate, job_post=self.job, resume="resume.pdf", duration_of_internship=6)
+        self.assertEqual(sum(q['sql'].startswith('UPDATE "matching_candidatejobmatch"') for q in queries), 1)
+
+        after = CandidateJobMatch.objects.get(pk=before.pk)
+        self.assertTrue(after.duration_match)
+        self.assertAlmostEqual(after.total_score, before.total_score + 0.1)
+        # The top-K projections follow the new score
+        self.assertAlmostEqual(CandidateTopMatch.objects.get(match=after).total_score, after.total_score)
+        self.assertAlmostEqual(JobTopMatch.objects.get(match=after).total_score, after.total_score)
+        self.assertEqual(CandidateJobMatch.objects.get(candidate=self.candidate, job_post=self.other_job).total_score, other_before)
+
+        application.duration_of_internship = 3
+        application.save(update_fields=['duration_of_internship'])
+        self.assertAlmostEqual(CandidateJobMatch.objects.get(pk=before.pk).total_score, before.total_score)
+
+    def test_application_scores_a_pair_that_was_pruned(self):
+        from applications.models import Application
+
+        outsider = make_candidate('pair-law', professional_title="Lawyer", degree="Law", city="Kano", skills=["law"])
+        self.assertFalse(CandidateJobMatch.objects.filter(candidate=outsider).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            application = Application.objects.create(candidate=outsider, job_post=self.job, resume="resume.pdf", duration_of_internship=6)
+
+        # Queued for the worker rather than scored inside the request
+        self.assertFalse(CandidateJobMatch.objects.filter(candidate=outsider).exists())
+        self.assertTrue(MatchQueueItem.objects.filter(entity_type=MatchQueueItem.APPLICATION, entity_id=application.pk).exists())
+
+        call_command('process_match_queue', '--once', stdout=StringIO())
+        match = CandidateJobMatch.objects.get(candidate=outsider, job_post=self.job)
+        self.assertTrue(match.duration_match)
+        self.assertTrue(CandidateTopMatch.objects.filter(match=match).exists())
+
+
+class MatchingServerTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        from applications.models import Application
+        self.recruiter = make_recruiter('srv-recruiter')
+        self.job = make_job(self.recruiter)
+        self.other_job = make_job(self.recruiter, duration_of_internship=3)
+        make_job(self.recruiter, location="Abuja")
+        self.candidates = [make_candidate(f'srv-{n}', employment_type="tech") for n in range(3)]
+        for n, candidate in enumerate(self.candidates[:2]):
+            Application.objects.create(candidate=candidate, job_post=self.other_job, resume="resume.pdf", duration_of_internship=6 if n else 3)
+
+    def test_state_answers_like_the_database(self):
+        from matching.server import MatchingState
+        from matching.utils import match_candidate_to_jobs, match_jobpost_to_candidates
+
+        state = MatchingState()
+        state.refresh()
+        for candidate in self.candidates:
+            self.assertEqual(state.candidate_jobs(candidate.pk), [j.pk for j in match_candidate_to_jobs(candidate)])
+        for job in JobPost.objects.all():
+            self.assertEqual(state.job_candidates(job.pk), [c.pk for c in match_jobpost_to_candidates(job)])
+        self.assertIsNone(state.candidate_jobs(0))
+
+    def test_refresh_applies_only_changes(self):
+        from applications.models import Application
+        from matching.server import MatchingState
+
+        state = MatchingState()
+        state.refresh()
+        self.job.is_active = False
+        self.job.save()
+        Application.objects.create(candidate=self.candidates[2], job_post=self.other_job, resume="resume.pdf", duration_of_internship=3)
+
+        self.assertGreater(state.refresh(), 0)
+        self.assertIsNone(state.job_candidates(self.job.pk))
+        self.assertEqual(state.job_candidates(self.other_job.pk), [self.candidates[0].pk, self.candidates[2].pk])
+
+    def test_refresh_rereads_late_commits_without_reapplying(self):
+        from datetime import timedelta
+        from matching.server import MatchingState
+
+        state = MatchingState()
+        state.refresh()
+        self.assertEqual(state.refresh(), 0)
+        # Saved before the watermark but committed after the last poll
+        JobPost.objects.filter(pk=self.job.pk).update(
+            is_active=False, updated_at=state.watermarks['jobs'] - timedelta(seconds=30),
+        )
+
+        self.assertEqual(state.refresh(), 1)
+        self.assertIsNone(state.job_candidates(self.job.pk))
+        self.assertEqual(state.refresh(), 0)
+
+    def test_read_paths_do_not_create_skills(self):
+        from matching.models import Skill
+        from matching.server import MatchingState
+        from matching.utils import match_jobpost_to_candidates
+
+        JobPost.objects.filter(pk=self.job.pk).update(required_skills=["cobol"], skill_ids=[])
+        skills = Skill.objects.count()
+        MatchingState().refresh()
+        match_jobpost_to_candidates(JobPost.objects.get(pk=self.job.pk))
+
+        self.assertEqual(Skill.objects.count(), skills)
+
+    def test_only_seeking_candidates_are_recommended(self):
+        from matching.utils import match_jobpost_to_candidates
+
+        Candidate.objects.filter(pk=self.candidates[1].pk).update(is_seeking=False)
+
+        self.assertNotIn(self.candidates[1].pk, [c.pk for c in match_jobpost_to_candidates(self.job)])
+        self.assertNotIn(self.candidates[1].pk, [c.pk for c in match_jobpost_to_candidates(self.other_job)])
+
+    @override_settings(MATCHING_SERVER_URL="http://127.0.0.1:9/")
+    def test_view_falls_back_to_database_when_server_is_down(self):
+        client = APIClient()
+        client.force_authenticate(self.candidates[0].user)
+        response = client.get(reverse('candidate-top-matches', args=[self.candidates[0].pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.data['matches']], [self.other_job.pk])
+
+
+class TextSimilarityTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter('text-recruiter')
+        self.candidate = make_candidate('text-alice', professional_title="Backend Developer", skills=["Python", "Django"])
+        self.backend_job = make_job(recruiter, title="Backend Developer", description="Build Django REST APIs in Python.")
+        self.law_job = make_job(recruiter, title="Legal Researcher", description="Draft contracts and research case law.", required_skills=["Research"])
+
+    def test_index_is_persisted_and_memory_mapped(self):
+        import numpy as np
+        from matching.text import TextIndex, build_job_index, candidate_tokens, vectorize
+
+        build_job_index()
+        index = TextIndex.load()
+        self.assertIsInstance(index.postings, np.memmap)
+        self.assertEqual(sorted(index.job_ids.tolist()), [self.backend_job.pk, self.law_job.pk])
+
+        rows = vectorize([candidate_tokens({'professional_title': "Backend Developer", 'degree': "", 'skills': ["python"]})], index.idf)
+        similarity = dict(zip(index.job_ids.tolist(), index.similarity(rows)[0].tolist()))
+        self.assertGreater(similarity[self.backend_job.pk], 0.3)
+        self.assertEqual(similarity[self.law_job.pk], 0.0)
+
+    def _weigh_text(self, weight=0.2):
+        from matching.models import ScoreWeights
+        ScoreWeights.objects.update(is_active=False)
+        ScoreWeights.objects.create(text_similarity=weight, is_active=True)
+
+    def test_engine_stores_text_similarity_and_sees_edits(self):
+        from matching.engine import MatchingEngine
+
+        self._weigh_text()
+        MatchingEngine(prune=False).load().run()
+        backend = CandidateJobMatch.objects.get(candidate=self.candidate, job_post=self.backend_job)
+        law = CandidateJobMatch.objects.get(candidate=self.candidate, job_post=self.law_job)
+        self.assertGreater(backend.text_similarity, law.text_similarity)
+
+        self.law_job.description = "Backend Developer building Django services in Python."
+        self.law_job.save()
+        MatchingEngine(prune=False, rescore=True).load().run()
+        self.assertGreater(CandidateJobMatch.objects.get(pk=law.pk).text_similarity, law.text_similarity)
+
+    def test_pair_similarity_matches_the_dense_product(self):
+        import numpy as np
+        from matching.engine import MatchingEngine
+
+        self._weigh_text()
+        make_candidate('text-bob', professional_title="Legal Researcher", skills=["Research"])
+        engine = MatchingEngine().load()
+        dense = engine.job_text.similarity(engine.candidate_text)
+        ci = np.repeat(np.arange(len(engine.candidates)), len(engine.jobs))
+        ji = np.tile(np.arange(len(engine.jobs)), len(engine.candidates))
+        np.testing.assert_allclose(engine.job_text.pair_similarity(engine.candidate_text, ci, ji), dense[ci, ji], atol=1e-6)
+
+    def test_zero_text_weight_skips_the_text_index(self):
+        from unittest import mock
+        from matching.engine import MatchingEngine
+
+        with mock.patch('matching.engine.JobText') as job_text:
+            MatchingEngine(prune=False).load().run()
+        job_text.assert_not_called()
+        backend = CandidateJobMatch.objects.get(candidate=self.candidate, job_post=self.backend_job)
+        self.assertEqual(backend.text_similarity, 0.0)
+        self.assertAlmostEqual(backend.total_score, calculate_total_score(backend).total_score)
+
+    def test_text_weight_is_applied_by_recompute(self):
+        from matching.engine import MatchingEngine
+        from matching.models import ScoreWeights
+        from matching.weights import recompute_total_scores
+
+        self._weigh_text()
+        MatchingEngine(prune=False).load().run()
+        zero = {field: 0.0 for field in ScoreWeights().as_dict()}
+        ScoreWeights.objects.update(is_active=False)
+        ScoreWeights.objects.create(**dict(zero, text_similarity=1.0), is_active=True)
+        recompute_total_scores()
+
+        match = CandidateJobMatch.objects.get(candidate=self.candidate, job_post=self.backend_job)
+        self.assertGreater(match.text_similarity, 0)
+        self.assertAlmostEqual(match.total_score, match.text_similarity)
+
+
+class EngineSnapshotTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter = make_recruiter('snap-recruiter')
+        self.candidates = [make_candidate(f'snap-{n}', skills=["python", "sql"][:n % 2 + 1]) for n in range(4)]
+        self.jobs = [make_job(self.recruiter, required_skills=["python"]), make_job(self.recruiter, title="Data Analyst", required_skills=["sql"])]
+
+    def _scores(self, engine):
+        import numpy as np
+        ci = np.repeat(np.arange(len(engine.candidates)), len(engine.jobs))
+        ji = np.tile(np.arange(len(engine.jobs)), len(engine.candidates))
+        return {(c, j): row for c, j, row in engine.score_pairs(ci, ji).iter_rows()}
+
+    def test_unchanged_snapshot_is_used_memory_mapped(self):
+        from datetime import timedelta
+        from unittest import mock
+        import numpy as np
+        from matching.engine import MatchingEngine
+
+        MatchingEngine().load_features()
+        with mock.patch('matching.engine.WATERMARK_SLACK', timedelta(0)):
+            engine = MatchingEngine().load_features()
+
+        self.assertIsInstance(engine.candidates.ids, np.memmap)
+        self.assertEqual(engine.candidates.ids.tolist(), sorted(c.pk for c in self.candidates))
+
+    def test_saving_keeps_the_replaced_version(self):
+        import numpy as np
+        from matching.snapshots import load_arrays, save_arrays, store_dir
+
+        root = store_dir('retention')
+        first = save_arrays(root, {'a': np.arange(3)}, {'n': 1})
+        second = save_arrays(root, {'a': np.arange(4)}, {'n': 2})
+        self.assertTrue(first.exists())
+        third = save_arrays(root, {'a': np.arange(5)}, {'n': 3})
+
+        self.assertEqual(sorted(root.glob('v*')), sorted([second, third]))
+        self.assertEqual(load_arrays(root)[1], {'n': 3})
+
+    def test_reclustered_titles_invalidate_the_snapshot(self):
+        from matching.engine import MatchingEngine, load_snapshot
+        from matching.models import NormalizedTitle
+
+        MatchingEngine().load_features()
+        self.assertIsNotNone(load_snapshot())
+        make_candidate('snap-later', professional_title="Product Manager")
+        MatchingEngine(snapshot=False).load_features()
+        self.assertIsNotNone(load_snapshot())
+
+        NormalizedTitle.objects.all().delete()
+        self.assertIsNone(load_snapshot())
+        engine = MatchingEngine().load()
+        cold = MatchingEngine(snapshot=False).load()
+        self.assertEqual(self._scores(engine), self._scores(cold))
+        clusters = set(engine.vocabularies['titles'].codes) - {''}
+        self.assertTrue(clusters <= set(NormalizedTitle.objects.values_list('cluster_id', flat=True)))
+
+    def test_warm_load_applies_deltas_like_a_cold_load(self):
+        from matching.engine import MatchingEngine
+
+        MatchingEngine().load_features()
+        self.candidates[0].skills = ["sql", "excel"]
+        self.candidates[0].save()
+        self.candidates[1].delete()
+        make_candidate('snap-new', professional_title="Data Analyst")
+        self.jobs[0].is_active = False
+        self.jobs[0].save()
+        make_job(self.recruiter, title="Backend Engineer", required_skills=["django"])
+
+        warm = MatchingEngine().load()
+        cold = MatchingEngine(snapshot=False).load()
+        self.assertEqual(self._scores(warm), self._scores(cold))
+
+    def test_matching_server_restores_its_snapshot(self):
+        from matching.server import MatchingState
+        from matching.utils import match_jobpost_to_candidates
+
+        state = MatchingState()
+        state.refresh()
+        state.save()
+        self.candidates[2].delete()
+        self.candidates[3].city = "Abuja"
+        self.candidates[3].save()
+
+        restored = MatchingState.restore()
+        restored.prune()
+        restored.refresh()
+        for job in self.jobs:
+            self.assertEqual(restored.job_candidates(job.pk), [c.pk for c in match_jobpost_to_candidates(job)])
+        self.assertEqual(len(restored.candidates), 3)
+
+
+class StreamingMatchingTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter('stream-recruiter')
+        skills = [["python"], ["sql", "excel"], ["python", "react"], ["law"], ["go", "docker"]]
+        for n, candidate_skills in enumerate(skills):
+            make_candidate(f'stream-{n}', skills=candidate_skills, city="Abuja" if n % 2 else "Lagos")
+        make_job(recruiter, required_skills=["python", "sql"])
+        make_job(recruiter, title="Data Analyst", location="Abuja", required_skills=["excel"])
+
+    def _matches(self):
+        return set(CandidateJobMatch.objects.values_list('candidate_id', 'job_post_id', 'total_score', 'text_similarity'))
+
+    def test_streamed_batches_match_a_full_run(self):
+        from matching.engine import MatchingEngine, run_streaming_matching
+        from matching.models import CandidateTopMatch
+
+        MatchingEngine(snapshot=False).load().run()
+        expected = self._matches()
+        top = set(CandidateTopMatch.objects.values_list('candidate_id', 'match__job_post_id'))
+        CandidateJobMatch.objects.all().delete()
+        CandidateTopMatch.objects.all().delete()
+
+        # Later batches bring new skills, which widens the bitsets mid-run
+        summary = run_streaming_matching(batch_size=2, chunk_size=1)
+
+        self.assertEqual(summary['batches'], 3)
+        self.assertEqual(summary['candidates'], 5)
+        self.assertEqual(self._matches(), expected)
+        self.assertEqual(set(CandidateTopMatch.objects.values_list('candidate_id', 'match__job_post_id')), top)
+
+    def test_run_matching_stream_option(self):
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('run_matching', stream=True, batch_size=3, stdout=out)
+
+        self.assertIn('Streamed 2 batches', out.getvalue())
+        self.assertTrue(CandidateJobMatch.objects.exists())
+
+
+class ScopedRematchTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        from matching.engine import MatchingEngine
+        recruiter = make_recruiter('scope-recruiter')
+        self.alice = make_candidate('scope-alice')
+        self.bob = make_candidate('scope-bob', skills=["python"])
+        self.job = make_job(recruiter)
+        self.other_job = make_job(recruiter, title="Data Analyst", required_skills=["python", "sql"])
+        MatchingEngine().load().run()
+        self.scores = dict(CandidateJobMatch.objects.values_list('pk', 'total_score'))
+        CandidateJobMatch.objects.update(total_score=-1)
+
+    def _rescored(self):
+        return {
+            (m.candidate_id, m.job_post_id) for m in CandidateJobMatch.objects.all()
+            if m.total_score == self.scores[m.pk]
+        }
+
+    def test_rescore_pairs_touches_only_the_given_pairs(self):
+        from matching.engine import rescore_pairs
+
+        summary = rescore_pairs([(self.alice.pk, self.job.pk)])
+
+        self.assertEqual(summary['updated'], 1)
+        self.assertEqual(self._rescored(), {(self.alice.pk, self.job.pk)})
+
+    def test_admin_action_rescores_the_selection(self):
+        admin = User.objects.create_superuser(username='scope-admin', email='scope-admin@example.com', password='pass')
+        self.client.force_login(admin)
+        match = CandidateJobMatch.objects.get(candidate=self.bob, job_post=self.other_job)
+
+        response = self.client.post(reverse('admin:matching_candidatejobmatch_changelist'), {
+            'action': 'run_matching_engine', '_selected_action': [match.pk],
+        }, follow=True)
+
+        self.assertContains(response, "1 matches updated")
+        self.assertEqual(self._rescored(), {(self.bob.pk, self.other_job.pk)})
+
+    def test_run_matching_scoped_options(self):
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        call_command('run_matching', candidates=[self.alice.pk], stdout=StringIO())
+        self.assertEqual(self._rescored(), {(self.alice.pk, self.job.pk), (self.alice.pk, self.other_job.pk)})
+
+        since = timezone.now()
+        Candidate.objects.update(updated_at=since - timedelta(days=1))
+        JobPost.objects.update(updated_at=since - timedelta(days=1))
+        self.other_job.save()
+        call_command('run_matching', since=since, stdout=StringIO())
+        self.assertIn((self.bob.pk, self.other_job.pk), self._rescored())
+        self.assertNotIn((self.bob.pk, self.job.pk), self._rescored())
@@ -0,0 +1,318 @@
+"""
+Text similarity over titles, skills and descriptions.
+
+Documents are split into words plus whole canonical skills, hashed into
+N_FEATURES columns with crc32 (stable across processes, unlike hash())
+and weighted with sublinear TF-IDF, L2-normalized so a dot product is a
+cosine similarity.
+
+The job side is persisted in MATCHING_INDEX_DIR/text term-major: for every
+hashed term, the jobs containing it and their weights, as .npy arrays
+loaded with mmap_mode='r' so processes share the page cache instead of
+each holding a copy. A batch of candidates is scored against every
+indexed job with one sparse product (TextIndex.similarity), which gathers
+the postings of the batch's terms and accumulates them with bincount. When
+only some pairs are wanted, as after the engine's pruning,
+TextIndex.pair_similarity keeps only the gathered postings of those pairs.
+
+IDF is fitted on the indexed jobs. Term counts are kept unweighted
+(term_counts) so they can be cached and weighted with whichever IDF is
+current. Jobs created or edited after the index was built are weighted on
+load with the same IDF (JobText); once too many are, the index is
+rebuilt. `manage.py build_text_index` rebuilds it on demand.
+"""
+import re
+import zlib
+from functools import lru_cache
+
+import numpy as np
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .snapshots import load_arrays, save_arrays, store_dir
+from .utils import canonical_skill
+
+N_FEATURES = 2 ** 18
+MAX_GATHER = 4_000_000      # postings gathered per bincount pass
+STALE_REBUILD_FRACTION = 0.2
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+# ---------- Vectorizing ----------
+
+@lru_cache(maxsize=65536)
+def _hash(token):
+    return zlib.crc32(token.encode()) % N_FEATURES
+
+
+def tokenize(*texts, skills=()):
+    words = [word for text in texts for word in _TOKEN_RE.findall((text or '').lower())]
+    return words + ['skill:' + canonical_skill(s) for s in skills or ()]
+
+
+def job_tokens(row):
+    return tokenize(row['title'], row['description'], skills=row['required_skills'])
+
+
+def candidate_tokens(row):
+    return tokenize(row['professional_title'], row['degree'], skills=row['skills'])
+
+
+class SparseRows:
+    """Minimal CSR matrix: row i holds indices[indptr[i]:indptr[i+1]]."""
+
+    def __init__(self, indptr, indices, data):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, stops = self.indptr[rows], self.indptr[rows + 1]
+        lengths = stops - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(indptr, self.indices[positions], self.data[positions])
+
+    @classmethod
+    def concat(cls, parts):
+        indptr, offset = [np.zeros(1, dtype=np.int64)], 0
+        for part in parts:
+            indptr.append(np.asarray(part.indptr[1:]) + offset)
+            offset += len(part.indices)
+        return cls(
+            np.concatenate(indptr),
+            np.concatenate([part.indices for part in parts]),
+            np.concatenate([part.data for part in parts]),
+        )
+
+
+def term_counts(docs):
+    """Hashed term counts of token lists, as SparseRows."""
+    indptr, indices, counts = [0], [], []
+    for doc in docs:
+        terms, n = np.unique(np.fromiter((_hash(t) for t in doc), dtype=np.int64, count=len(doc)),
+                             return_counts=True)
+        indices.append(terms)
+        counts.append(n)
+        indptr.append(indptr[-1] + len(terms))
+    return SparseRows(
+        np.array(indptr, dtype=np.int64),
+        np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+        np.concatenate(counts) if counts else np.empty(0, dtype=np.int64),
+    )
+
+
+def fit_idf(indices, documents):
+    """Smoothed IDF from the term indices of a term-count matrix."""
+    df = np.bincount(indices, minlength=N_FEATURES)
+    return (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+
+
+def weigh(counts, idf):
+    """L2-normalized sublinear TF-IDF rows from term_counts() rows."""
+    data = (1 + np.log(counts.data)) * idf[counts.indices]
+    row = np.repeat(np.arange(len(counts)), np.diff(counts.indptr))
+    norms = np.sqrt(np.bincount(row, weights=data ** 2, minlength=len(counts)))
+    return SparseRows(counts.indptr, counts.indices, (data / np.maximum(norms[row], 1e-12)).astype(np.float32))
+
+
+def vectorize(docs, idf):
+    """TF-IDF rows for token lists, using a fitted idf."""
+    return weigh(term_counts(docs), idf)
+
+
+# ---------- Job index ----------
+
+def index_dir():
+    return store_dir('text')
+
+
+class TextIndex:
+    """Term-major TF-IDF matrix of jobs: the postings of term t are postings[indptr[t]:indptr[t+1]]."""
+
+    ARRAYS = ('job_ids', 'indptr', 'postings', 'weights', 'idf')
+
+    def __init__(self, job_ids, indptr, postings, weights, idf, built_at=None):
+        self.job_ids = job_ids
+        self.indptr = indptr
+        self.postings = postings
+        self.weights = weights
+        self.idf = idf
+        self.built_at = built_at
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    @classmethod
+    def build(cls, job_ids, counts, idf=None, built_at=None):
+        """Indexes term_counts() rows of jobs; idf is fitted on them unless given."""
+        if idf is None:
+            idf = fit_idf(counts.indices, len(counts))
+        rows = weigh(counts, idf)
+
+        order = np.argsort(rows.indices, kind='stable')
+        term_indptr = np.zeros(N_FEATURES + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows.indices, minlength=N_FEATURES), out=term_indptr[1:])
+        job_column = np.repeat(np.arange(len(counts), dtype=np.int32), np.diff(rows.indptr))
+        return cls(np.asarray(job_ids, dtype=np.int64), term_indptr, job_column[order],
+                   rows.data[order], idf, built_at)
+
+    def columns(self, job_ids):
+        """Index column of each job id, or -1 for jobs not in the index."""
+        job_ids = np.asarray(job_ids, dtype=np.int64)
+        if not len(self.job_ids):
+            return np.full(len(job_ids), -1, dtype=np.int64)
+        order = np.argsort(self.job_ids)
+        pos = np.minimum(np.searchsorted(self.job_ids, job_ids, sorter=order), len(order) - 1)
+        return np.where(self.job_ids[order[pos]] == job_ids, order[pos], -1)
+
+    def _gather(self, rows):
+        """
+        Yields (row, column, product) arrays of the nonzero terms of
+        rows x the index, gathering at most MAX_GATHER postings at a time.
+        """
+        if not len(self) or not len(rows.indices):
+            return
+        starts = self.indptr[rows.indices]
+        lengths = self.indptr[rows.indices + 1] - starts
+        entry_row = np.repeat(np.arange(len(rows), dtype=np.int64), np.diff(rows.indptr))
+        cumulative = np.cumsum(lengths)
+        first = 0
+        while first < len(lengths):
+            # Bound the gathered postings so common terms cannot blow up memory
+            done = cumulative[first] - lengths[first]
+            last = max(int(np.searchsorted(cumulative, done + MAX_GATHER, side='right')), first + 1)
+            n = lengths[first:last]
+            total = int(n.sum())
+            if total:
+                entry = np.repeat(np.arange(first, last), n)
+                positions = starts[entry] + np.arange(total) - np.repeat(np.cumsum(n) - n, n)
+                yield entry_row[entry], self.postings[positions], self.weights[positions] * rows.data[entry]
+            first = last
+
+    def similarity(self, rows):
+        """Dense (len(rows), len(self)) cosine similarities for TF-IDF rows."""
+        n_rows, n_jobs = len(rows), len(self)
+        out = np.zeros(n_rows * n_jobs, dtype=np.float64)
+        for row, column, product in self._gather(rows):
+            out += np.bincount(row * n_jobs + column, weights=product, minlength=n_rows * n_jobs)
+        return out.reshape(n_rows, n_jobs).astype(np.float32)
+
+    def pair_similarity(self, rows, row_of_pair, columns):
+        """
+        Cosine similarity of rows[row_of_pair[p]] and index column
+        columns[p] for each pair p, without the dense rows x jobs result.
+        """
+        n_jobs = len(self)
+        wanted, inverse = np.unique(np.asarray(row_of_pair, dtype=np.int64) * n_jobs + columns, return_inverse=True)
+        out = np.zeros(len(wanted), dtype=np.float64)
+        for row, column, product in self._gather(rows):
+            keys = row * n_jobs + column
+            pos = np.minimum(np.searchsorted(wanted, keys), len(wanted) - 1)
+            hit = wanted[pos] == keys
+            out += np.bincount(pos[hit], weights=product[hit], minlength=len(wanted))
+        return out[inverse].astype(np.float32)
+
+    # ----- Persistence -----
+
+    def save(self, path=None):
+        return save_arrays(path or index_dir(), {name: getattr(self, name) for name in self.ARRAYS}, {
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+            'n_features': N_FEATURES,
+            'jobs': len(self),
+        })
+
+    @classmethod
+    def load(cls, path=None):
+        """Memory-maps the current index, or returns None when there is none."""
+        stored = load_arrays(path or index_dir())
+        if stored is None or stored[1]['n_features'] != N_FEATURES:
+            return None
+        arrays, meta = stored
+        return cls(built_at=parse_datetime(meta['built_at']) if meta['built_at'] else None,
+                   **{name: arrays[name] for name in cls.ARRAYS})
+
+
+def build_job_index(jobs=None, path=None):
+    """Vectorizes jobs (every active job by default), persists them and returns the mapped index."""
+    from applications.models import JobPost
+
+    if jobs is None:
+        jobs = JobPost.active_jobs.all()
+    # Taken before reading, so edits made while building count as stale
+    built_at = timezone.now()
+    rows = list(jobs.order_by('id').values('id', 'title', 'description', 'required_skills'))
+    counts = term_counts([job_tokens(r) for r in rows])
+    TextIndex.build([r['id'] for r in rows], counts, built_at=built_at).save(path)
+    return TextIndex.load(path)
+
+
+def ensure_job_index(job_ids=(), updated_at=()):
+    """
+    Returns the persisted index, rebuilding it when it is missing or when
+    more than STALE_REBUILD_FRACTION of it would have to be re-weighted for
+    the given jobs (ids and updated_at epoch seconds).
+    """
+    index = TextIndex.load()
+    if index is None:
+        return build_job_index()
+    if len(job_ids):
+        stale = _stale(index, job_ids, updated_at).sum()
+        if stale > STALE_REBUILD_FRACTION * max(len(index), 1):
+            return build_job_index()
+    return index
+
+
+def _stale(index, job_ids, updated_at):
+    missing = index.columns(job_ids) < 0
+    if index.built_at is None:
+        return np.ones(len(missing), dtype=bool)
+    return missing | (np.asarray(updated_at, dtype=np.float64) > index.built_at.timestamp())
+
+
+class JobText:
+    """
+    Text similarity against a fixed list of jobs. Columns come from the
+    persisted index where it is current and from an in-memory supplement,
+    vectorized with the same IDF, for jobs created or edited since.
+    """
+
+    def __init__(self, job_ids, updated_at, counts):
+        self.index = ensure_job_index(job_ids, updated_at)
+        self.idf = np.asarray(self.index.idf)
+        stale = _stale(self.index, job_ids, updated_at)
+        self.columns = np.where(stale, -1, self.index.columns(job_ids))
+        self.stale = np.flatnonzero(stale)
+        self.supplement = TextIndex.build(
+            np.asarray(job_ids)[self.stale], counts.take(self.stale), idf=self.idf
+        ) if len(self.stale) else None
+        self.supplement_columns = np.full(len(self.columns), -1, dtype=np.int64)
+        self.supplement_columns[self.stale] = np.arange(len(self.stale))
+
+    def similarity(self, rows):
+        """Dense (len(rows), len(job_ids)) similarities, in job_ids order."""
+        out = np.zeros((len(rows), len(self.columns)), dtype=np.float32)
+        indexed = self.columns >= 0
+        if indexed.any():
+            out[:, indexed] = self.index.similarity(rows)[:, self.columns[indexed]]
+        if self.supplement is not None:
+            out[:, self.stale] = self.supplement.similarity(rows)
+        return out
+
+    def pair_similarity(self, rows, row_of_pair, job_of_pair):
+        """Similarities of rows[row_of_pair[p]] and job_ids[job_of_pair[p]], for each pair p."""
+        out = np.zeros(len(job_of_pair), dtype=np.float32)
+        for index, columns in ((self.index, self.columns), (self.supplement, self.supplement_columns)):
+            if index is None:
+                continue
+            cols = columns[job_of_pair]
+            kept = cols >= 0
+            if kept.any():
+                out[kept] = index.pair_similarity(rows, row_of_pair[kept], cols[kept])
+        return out
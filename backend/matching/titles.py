@@ -0,0 +1,120 @@
+"""
+Title equivalence clusters.
+
+Every distinct normalized title is assigned a cluster ID once, using
+TITLE_SYNONYMS first and fuzzy matching against existing cluster
+representatives second. Assignments are stored in NormalizedTitle and
+memoized per process, so comparing two titles is an integer comparison
+and fuzzy work scales with distinct titles rather than pairs.
+
+Changing TITLE_SYNONYMS only affects titles seen afterwards; clear the
+NormalizedTitle table to recluster everything. Clustering only ever adds
+rows, so cluster_version() lets caches of cluster IDs (the engine
+snapshot) notice that the table was cleared or pruned since.
+"""
+from difflib import SequenceMatcher
+
+from django.db.models import Count, F, Max
+
+from .models import NormalizedTitle
+from .utils import TITLE_SYNONYMS
+
+FUZZY_THRESHOLD = 0.8
+LOOKUP_CHUNK_SIZE = 500
+
+_cluster_memo = {}
+
+
+def normalize_title(title):
+    return " ".join((title or "").lower().split())
+
+
+def _synonym_bases():
+    bases = {}
+    for base, synonyms in TITLE_SYNONYMS.items():
+        bases[base] = base
+        for synonym in synonyms:
+            bases.setdefault(synonym, base)
+    return bases
+
+
+def _new_cluster(title):
+    row, _ = NormalizedTitle.objects.get_or_create(title=title)
+    if not row.cluster_id:
+        NormalizedTitle.objects.filter(pk=row.pk, cluster_id=0).update(cluster_id=row.pk)
+        row.refresh_from_db(fields=['cluster_id'])
+    return row.cluster_id
+
+
+def _join_cluster(title, cluster_id):
+    row, _ = NormalizedTitle.objects.get_or_create(title=title, defaults={'cluster_id': cluster_id})
+    return row.cluster_id
+
+
+def _fuzzy_cluster(title, representatives):
+    matcher = SequenceMatcher(None, '', title)
+    for rep_title, cluster_id in representatives:
+        matcher.set_seq1(rep_title)
+        if (matcher.real_quick_ratio() > FUZZY_THRESHOLD
+                and matcher.quick_ratio() > FUZZY_THRESHOLD
+                and matcher.ratio() > FUZZY_THRESHOLD):
+            return cluster_id
+    return None
+
+
+def assign_title_clusters(titles):
+    """Returns {normalized title: cluster_id} for the given raw titles."""
+    wanted = {normalize_title(t) for t in titles}
+    missing = [t for t in wanted if t not in _cluster_memo]
+
+    for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+        chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+        _cluster_memo.update(
+            NormalizedTitle.objects.filter(title__in=chunk, cluster_id__gt=0).values_list('title', 'cluster_id')
+        )
+
+    unseen = sorted(t for t in missing if t not in _cluster_memo)
+    if unseen:
+        bases = _synonym_bases()
+        representatives = list(
+            NormalizedTitle.objects.filter(cluster_id=F('pk')).values_list('title', 'cluster_id')
+        )
+        for title in unseen:
+            if title in bases:
+                base = bases[title]
+                cluster_id = _cluster_memo.get(base)
+                if cluster_id is None:
+                    cluster_id = _cluster_memo[base] = _new_cluster(base)
+                    representatives.append((base, cluster_id))
+                if title != base:
+                    cluster_id = _join_cluster(title, cluster_id)
+            else:
+                cluster_id = _fuzzy_cluster(title, representatives) if title else None
+                if cluster_id is None:
+                    cluster_id = _new_cluster(title)
+                    representatives.append((title, cluster_id))
+                else:
+                    cluster_id = _join_cluster(title, cluster_id)
+            _cluster_memo[title] = cluster_id
+
+    return {t: _cluster_memo[t] for t in wanted}
+
+
+def title_cluster_id(title):
+    return assign_title_clusters([title])[normalize_title(title)]
+
+
+def cluster_version():
+    """[highest id, row count] of NormalizedTitle."""
+    stats = NormalizedTitle.objects.aggregate(last=Max('id'), count=Count('id'))
+    return [stats['last'] or 0, stats['count']]
+
+
+def clusters_unchanged(version):
+    """True when every row counted by a cluster_version() is still there, i.e. rows were only added since."""
+    last, count = version
+    return NormalizedTitle.objects.filter(id__lte=last).count() == count
+
+
+def clear_title_memo():
+    _cluster_memo.clear()
@@ -0,0 +1,85 @@
+"""
+Materialized top-K projections of CandidateJobMatch.
+
+Dashboards read the best MATCHING_TOP_K matches per job and per candidate
+from JobTopMatch / CandidateTopMatch instead of sorting the whole match
+table on every request. The engine refreshes the rows of every candidate
+and job it wrote scores for; deleting a match refreshes its candidate and
+job once the transaction commits so the next-best matches move up.
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import CandidateJobMatch, CandidateTopMatch, JobTopMatch
+
+DEFAULT_TOP_K = 50
+REFRESH_CHUNK_SIZE = 500
+
+_pending = threading.local()
+
+
+def get_top_k():
+    return getattr(settings, 'MATCHING_TOP_K', DEFAULT_TOP_K)
+
+
+def _refresh(model, owner_field, owner_ids, k):
+    owner_ids = sorted(set(owner_ids))
+    for start in range(0, len(owner_ids), REFRESH_CHUNK_SIZE):
+        chunk = owner_ids[start:start + REFRESH_CHUNK_SIZE]
+        ranked = (
+            CandidateJobMatch.objects.filter(**{f'{owner_field}__in': chunk})
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=[F(owner_field)],
+                order_by=[F('total_score').desc(), F('id').asc()],
+            ))
+            .filter(position__lte=k)
+            .values_list('id', owner_field, 'position', 'total_score')
+        )
+        rows = [
+            model(match_id=match_id, rank=position, total_score=score, **{owner_field: owner_id})
+            for match_id, owner_id, position, score in ranked
+        ]
+        with transaction.atomic():
+            model.objects.filter(**{f'{owner_field}__in': chunk}).delete()
+            model.objects.bulk_create(rows)
+
+
+def refresh_top_matches(candidate_ids=(), job_ids=()):
+    """Recomputes the top-K projections for the given candidates and jobs."""
+    k = get_top_k()
+    _refresh(CandidateTopMatch, 'candidate_id', candidate_ids, k)
+    _refresh(JobTopMatch, 'job_post_id', job_ids, k)
+
+
+def rebuild_top_matches():
+    """Recomputes the projections for every candidate and job that has matches."""
+    refresh_top_matches(
+        CandidateJobMatch.objects.values_list('candidate_id', flat=True).distinct(),
+        CandidateJobMatch.objects.values_list('job_post_id', flat=True).distinct(),
+    )
+
+
+def _flush_pending_refreshes():
+    candidate_ids = getattr(_pending, 'candidate_ids', set())
+    job_ids = getattr(_pending, 'job_ids', set())
+    _pending.candidate_ids, _pending.job_ids = set(), set()
+    if candidate_ids or job_ids:
+        refresh_top_matches(candidate_ids, job_ids)
+
+
+def refresh_top_matches_on_commit(candidate_ids=(), job_ids=()):
+    """
+    Refreshes the projections of the given owners after commit. Owners
+    collected during one transaction are refreshed together, so a cascade
+    deleting many matches costs one refresh per chunk rather than per row.
+    """
+    if not hasattr(_pending, 'candidate_ids'):
+        _pending.candidate_ids, _pending.job_ids = set(), set()
+    _pending.candidate_ids.update(candidate_ids)
+    _pending.job_ids.update(job_ids)
+    transaction.on_commit(_flush_pending_refreshes)
@@ -1,7 +1,12 @@
-from difflib import SequenceMatcher
+import hashlib
+import json
+
+import numpy as np
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
 
 from applications.models import Application, JobPost
-from candidates.models import Candidate
+from candidates.models import Candidate, normalized_key
 from matching.models import CandidateJobMatch
 
 # ---------- Synonym & Inference Helpers ----------
@@ -13,20 +18,37 @@ TITLE_SYNONYMS = {
     # Add more as needed
 }
 
-def titles_match(candidate_title, job_title):
-    candidate_title = candidate_title.lower()
-    job_title = job_title.lower()
+SKILL_ALIASES = {
+    "react": ["reactjs", "react.js", "react js"],
+    "javascript": ["js", "ecmascript"],
+    "typescript": ["ts"],
+    "node.js": ["node", "nodejs", "node js"],
+    "python": ["python3", "python 3"],
+    "postgresql": ["postgres", "psql"],
+    "machine learning": ["ml", "machinelearning"],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    "html": ["html5"],
+    "css": ["css3"],
+    "aws": ["amazon web services"],
+    # Add more as needed
+}
 
-    if candidate_title == job_title:
-        return True
+_SKILL_CANONICAL = {
+    alias: base for base, aliases in SKILL_ALIASES.items() for alias in aliases
+}
+
+def canonical_skill(name):
+    name = " ".join(str(name).lower().split())
+    return _SKILL_CANONICAL.get(name, name)
 
-    for base, synonyms in TITLE_SYNONYMS.items():
-        if (candidate_title == base and job_title in synonyms) or \
-           (job_title == base and candidate_title in synonyms) or \
-           (candidate_title in synonyms and job_title in synonyms):
-            return True
+def canonical_skills(skills):
+    return {canonical_skill(s) for s in (skills or [])}
 
-    return SequenceMatcher(None, candidate_title, job_title).ratio() > 0.8
+def titles_match(candidate_title, job_title):
+    """Titles match when they fall in the same cached equivalence cluster."""
+    from .titles import title_cluster_id
+    return title_cluster_id(candidate_title) == title_cluster_id(job_title)
 
 def infer_industry_from_title(title):
     title = title.lower()
@@ -38,92 +60,177 @@ def infer_industry_from_title(title):
 
 # ---------- Score Calculators ----------
 
+# Defaults, used until a ScoreWeights version is activated
+SCORE_WEIGHTS = {
+    "professional_title_match": 0.20,
+    "skill_match_score": 0.30,
+    "degree_match": 0.10,
+    "location_match": 0.10,
+    "duration_match": 0.10,
+    "industry_match": 0.10,
+    "has_resume": 0.10,
+    # TF-IDF over titles, skills and descriptions; off until a weights version enables it
+    "text_similarity": 0.0,
+}
+
 def calculate_skill_score(candidate_skills, job_required_skills):
     if not candidate_skills or not job_required_skills:
         return 0.0
-    candidate_set = set(map(str.lower, candidate_skills))
-    job_set = set(map(str.lower, job_required_skills))
+    candidate_set = canonical_skills(candidate_skills)
+    job_set = canonical_skills(job_required_skills)
     return round(len(candidate_set & job_set) / max(len(job_set), 1), 4)
 
-def calculate_total_score(match):
-    score = (
-        0.20 * int(match.professional_title_match) +
-        0.30 * match.skill_match_score +
-        0.10 * int(match.degree_match) +
-        0.10 * int(match.location_match) +
-        0.10 * int(match.duration_match) +
-        0.10 * int(match.industry_match) +
-        0.10 * int(match.has_resume)
+def skill_score_from_ids(candidate_skill_ids, job_skill_ids):
+    """Same as calculate_skill_score, on precomputed sorted Skill id arrays."""
+    if not len(candidate_skill_ids) or not len(job_skill_ids):
+        return 0.0
+    shared = np.intersect1d(candidate_skill_ids, job_skill_ids, assume_unique=True)
+    return round(len(shared) / len(job_skill_ids), 4)
+
+def calculate_total_score(match, weights=None):
+    """
+    Sets match.total_score in memory using the active ScoreWeights (or the
+    given weights); persist it with save() or CandidateJobMatch.objects.upsert().
+    The engine computes the same weighted sum vectorized and writes it with
+    CandidateJobMatch.objects.upsert_scored().
+    """
+    if weights is None:
+        from .weights import get_active_weights
+        weights = get_active_weights()
+    score = sum(
+        weight * float(getattr(match, field))
+        for field, weight in weights.items()
     )
     match.total_score = round(score, 4)
-    match.save()
     return match
 
-# ---------- Matching Core ----------
-
-def run_matching_engine():
-    applications = Application.objects.select_related('candidate').all()
-    job_posts = JobPost.active_jobs.all()
-
-    for application in applications:
-        candidate = application.candidate
-        for job in job_posts:
-            if candidate.location != job.location:
-                continue
-
-            candidate_industry = candidate.industry or infer_industry_from_title(candidate.professional_title)
-            job_industry = job.industry or infer_industry_from_title(job.professional_title)
-            if candidate_industry != job_industry:
-                continue
+# ---------- Change Tracking ----------
+
+def _fingerprint(*values):
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _normalized_skills(skills):
+    return sorted(canonical_skills(skills))
+
+# Fields that feed the match score; saves touching none of them skip matching work
+CANDIDATE_MATCH_FIELDS = frozenset({'professional_title', 'degree', 'city', 'skills', 'resume'})
+JOBPOST_MATCH_FIELDS = frozenset({
+    'title', 'description', 'industry', 'location', 'required_skills', 'duration_of_internship', 'is_active',
+})
+
+def candidate_fingerprint(candidate):
+    """Hash of every Candidate field that feeds the match score."""
+    return _fingerprint(
+        (candidate.professional_title or '').strip().lower(),
+        (candidate.degree or '').strip().lower(),
+        (candidate.city or '').strip().lower(),
+        _normalized_skills(candidate.skills),
+        bool(candidate.resume),
+    )
 
-            if not titles_match(candidate.professional_title, job.professional_title):
-                continue
+def jobpost_fingerprint(job):
+    """Hash of every JobPost field that feeds the match score."""
+    return _fingerprint(
+        (job.title or '').strip().lower(),
+        (job.description or '').strip(),
+        (job.industry or '').strip().lower(),
+        (job.location or '').strip().lower(),
+        _normalized_skills(job.required_skills),
+        job.duration_of_internship,
+        job.is_active,
+    )
 
-            if application.duration_of_internship != job.duration:
-                continue
+# Change markers set by track_matching_inputs(); persist them together
+MATCH_MARKER_FIELDS = ('match_fingerprint', 'match_dirty', 'skill_ids')
+
+def track_matching_inputs(instance, fingerprint, skills):
+    """
+    Sets MATCH_MARKER_FIELDS on a Candidate/JobPost in memory and returns
+    True when its matching inputs changed. The caller persists the markers
+    and queues the rematch. The fingerprint covers the skill list, so
+    skill_ids only changes with it.
+    """
+    from .skills import skill_ids
+
+    if fingerprint == instance.match_fingerprint:
+        return False
+    instance.match_fingerprint = fingerprint
+    instance.match_dirty = True
+    instance.skill_ids = skill_ids(skills)
+    return True
 
-            skill_score = calculate_skill_score(candidate.skills, job.skills)
-            total_score = round(skill_score * 100, 2)
+# ---------- Matching Core ----------
 
-            CandidateJobMatch.objects.update_or_create(
-                candidate=candidate,
-                job_post=job,
-                defaults={"score": total_score}
-            )
+def run_matching_engine():
+    """Rescores every overlapping candidate/job pair through the batch engine."""
+    from .engine import run_batch_matching
+    return run_batch_matching(rescore=True)
 
 # ---------- Recommendation Functions ----------
 
+def _open_jobs():
+    today = timezone.now().date()
+    return JobPost.active_jobs.filter(Q(application_deadline__isnull=True) | Q(application_deadline__gte=today))
+
 def match_candidate_to_jobs(candidate, skill_threshold=0.4):
+    """
+    Open jobs in the candidate's city and employment type whose duration
+    matches the candidate's latest application. Location, industry,
+    duration and deadline are filtered in SQL; skills only on what is left.
+    """
+    from .skills import entity_skill_ids
+
     matches = []
-    application = Application.objects.filter(candidate=candidate).first()
-
-    for job in JobPost.objects.all():
-        skill_score = calculate_skill_score(candidate.skills, job.skills)
-        if (
-            job.location.lower() == candidate.location.lower()
-            and application and job.duration == application.duration_of_internship
-            and job.industry.lower() == candidate.employment_type.lower()
-            and skill_score >= skill_threshold
-        ):
-            matches.append(job)
+    duration = (
+        Application.objects.filter(candidate=candidate)
+        .order_by('-applied_at').values_list('duration_of_internship', flat=True).first()
+    )
+    if duration is not None:
+        jobs = _open_jobs().filter(
+            location_key=normalized_key(candidate.city),
+            industry_key=normalized_key(candidate.employment_type),
+            duration_of_internship=duration,
+        )
+        candidate_skill_ids = entity_skill_ids(candidate, 'skills')
+        matches = [
+            job for job in jobs
+            if skill_score_from_ids(candidate_skill_ids, entity_skill_ids(job, 'required_skills')) >= skill_threshold
+        ]
 
     if not matches:
-        matches = JobPost.objects.filter(industry__iexact=candidate.employment_type)[:10]
+        matches = _open_jobs().filter(industry_key=normalized_key(candidate.employment_type))[:10]
     return matches
 
 def match_jobpost_to_candidates(job, skill_threshold=0.4):
-    matches = []
-    for candidate in Candidate.objects.all():
-        application = Application.objects.filter(candidate=candidate).first()
-        skill_score = calculate_skill_score(candidate.skills, job.skills)
-        if (
-            job.location.lower() == candidate.location.lower()
-            and application and job.duration == application.duration_of_internship
-            and job.industry.lower() == candidate.employment_type.lower()
-            and skill_score >= skill_threshold
-        ):
-            matches.append(candidate)
+    """
+    Seeking candidates in the job's location and industry whose latest
+    application duration matches the job, fetched with one query.
+    """
+    from .skills import entity_skill_ids
+
+    latest_duration = (
+        Application.objects.filter(candidate=OuterRef('pk'))
+        .order_by('-applied_at').values('duration_of_internship')[:1]
+    )
+    candidates = (
+        Candidate.objects.filter(
+            is_seeking=True,
+            city_key=normalized_key(job.location),
+            employment_type_key=normalized_key(job.industry),
+        )
+        .annotate(latest_duration=Subquery(latest_duration))
+        .filter(latest_duration=job.duration_of_internship)
+        .order_by('id')
+    )
+    job_skill_ids = entity_skill_ids(job, 'required_skills')
+    matches = [
+        candidate for candidate in candidates
+        if skill_score_from_ids(entity_skill_ids(candidate, 'skills'), job_skill_ids) >= skill_threshold
+    ]
 
     if not matches:
-        matches = Candidate.objects.filter(employment_type__iexact=job.industry)[:10]
+        matches = Candidate.objects.filter(
+            is_seeking=True, employment_type_key=normalized_key(job.industry)
+        ).order_by('id')[:10]
     return matches
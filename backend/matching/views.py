@@ -5,6 +5,8 @@ from rest_framework.decorators import api_view, permission_classes
 
 from .models import CandidateJobMatch
 from .serializers import CandidateJobMatchSerializer
+from .runs import create_run
+from .server import query_server
 from .utils import (
     calculate_skill_score,
     calculate_total_score,
@@ -26,47 +28,12 @@ class RunMatchingEngine(APIView):
     permission_classes = [IsAdminUser]
 
     def post(self, request):
-        candidates = Candidate.objects.all()
-        job_posts = JobPost.active_jobs.all()
-        match_count = 0
-
-        for candidate in candidates:
-            for job in job_posts:
-                if CandidateJobMatch.objects.filter(candidate=candidate, job_post=job).exists():
-                    continue
-
-                # Get the candidate's application for this job (if any)
-                application = Application.objects.filter(candidate=candidate, job_post=job).first()
-                if application:
-                    duration_match = application.duration_of_internship == job.duration_of_internship
-                else:
-                    duration_match = False  # or default to True if optional
-
-                professional_title_match = candidate.professional_title.strip().lower() == job.title.strip().lower()
-                skill_score = calculate_skill_score(candidate.skills, job.required_skills)
-                location_match = candidate.city.strip().lower() == job.location.strip().lower()
-                industry_match = (
-                    candidate.degree and 
-                    candidate.professional_title.lower() == job.industry.lower()
-                )
-                has_resume = bool(candidate.resume)
-
-                match = CandidateJobMatch(
-                    candidate=candidate,
-                    job_post=job,
-                    professional_title_match=professional_title_match,
-                    skill_match_score=skill_score,
-                    degree_match=True,  # TODO: Replace with real logic
-                    location_match=location_match,
-                    duration_match=duration_match,
-                    industry_match=industry_match,
-                    has_resume=has_resume,
-                )
-                calculate_total_score(match)
-                match.save()
-                match_count += 1
-
-        return Response({"detail": f"Matching completed. {match_count} matches created."})
+        # Executed by the process_matching_runs worker, not in the request
+        run = create_run()
+        return Response(
+            {"detail": f"{run} queued.", "run_id": run.pk, "status": run.status},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
 
 
@@ -84,8 +51,15 @@ class RecruiterTopMatchesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated, IsRecruiterUser]
 
     def get_queryset(self):
-        recruiter = self.request.user.recruiter
-        return CandidateJobMatch.objects.filter(job_post__recruiter=recruiter).order_by('-total_score')
+        # Only rows in the per-job top-K projection are ranked, not the whole match table
+        return CandidateJobMatch.objects.filter(
+            job_rankings__job_post__recruiter__user=self.request.user
+        ).select_related('candidate__user', 'job_post').order_by('-total_score')
+
+
+def _in_order(model, ids):
+    objects = model.objects.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
 
 
 # 🔁 New View: Return jobs matched to a candidate
@@ -97,17 +71,24 @@ def candidate_job_matches(request, candidate_id):
     except Candidate.DoesNotExist:
         return Response({"error": "Candidate not found or unauthorized."}, status=status.HTTP_404_NOT_FOUND)
 
-    matches = match_candidate_to_jobs(candidate)
     limit = int(request.query_params.get("limit", 5))
     offset = int(request.query_params.get("offset", 0))
 
-    serializer = JobSerializer(matches[offset:offset+limit], many=True)
+    # The matching server answers from memory; only the requested page is loaded
+    ids = query_server(f"candidates/{candidate.pk}/jobs")
+    if ids is None:
+        matches = match_candidate_to_jobs(candidate)
+        total, page = len(matches), matches[offset:offset+limit]
+    else:
+        total, page = len(ids), _in_order(JobPost, ids[offset:offset+limit])
+
+    serializer = JobSerializer(page, many=True)
     return Response({
-        "total_matches": len(matches),
+        "total_matches": total,
         "matches": serializer.data,
         "limit": limit,
         "offset": offset,
-        "has_more": offset + limit < len(matches)
+        "has_more": offset + limit < total
     })
 
 
@@ -120,15 +101,21 @@ def job_candidate_matches(request, job_id):
     except JobPost.DoesNotExist:
         return Response({"error": "Job not found or unauthorized."}, status=status.HTTP_404_NOT_FOUND)
 
-    matches = match_jobpost_to_candidates(job)
     limit = int(request.query_params.get("limit", 5))
     offset = int(request.query_params.get("offset", 0))
 
-    serializer = CandidateSerializer(matches[offset:offset+limit], many=True)
+    ids = query_server(f"jobs/{job.pk}/candidates")
+    if ids is None:
+        matches = match_jobpost_to_candidates(job)
+        total, page = len(matches), matches[offset:offset+limit]
+    else:
+        total, page = len(ids), _in_order(Candidate, ids[offset:offset+limit])
+
+    serializer = CandidateSerializer(page, many=True)
     return Response({
-        "total_matches": len(matches),
+        "total_matches": total,
         "matches": serializer.data,
         "limit": limit,
         "offset": offset,
-        "has_more": offset + limit < len(matches)
+        "has_more": offset + limit < total
     })
@@ -0,0 +1,69 @@
+"""
+Versioned score weights and set-based total_score recomputation.
+
+Every component score is stored on CandidateJobMatch, so a weight change
+only needs total_score rewritten: one UPDATE ... SET total_score =
+ROUND(sum(component * weight), 4) per primary-key range, with no rows
+loaded into Python. The exception is text_similarity, which the engine only
+computes while its weight is non-zero: raising it from 0 needs a rescoring
+run (run_matching --rescore) before the totals reflect it.
+"""
+from django.db import transaction
+from django.db.models import F, FloatField, Max, Min, Value
+from django.db.models.functions import Cast, Round
+
+from .models import CandidateJobMatch, ScoreWeights
+from .utils import SCORE_WEIGHTS
+
+RECOMPUTE_CHUNK_SIZE = 50000
+
+
+def get_active_weights():
+    """Returns {component field: weight} from the active ScoreWeights, or the defaults."""
+    weights = ScoreWeights.objects.filter(is_active=True).first()
+    return weights.as_dict() if weights else dict(SCORE_WEIGHTS)
+
+
+def total_score_expression(weights, known=None):
+    """
+    SQL expression for ROUND(sum(component * weight), 4). Components given
+    in known ({field: value}) are folded in as constants, e.g. when the same
+    UPDATE also changes them.
+    """
+    known = known or {}
+    terms = [
+        Value(float(known[field]) * weight) if field in known
+        else Cast(F(field), FloatField()) * Value(float(weight))
+        for field, weight in weights.items() if weight
+    ]
+    if not terms:
+        return Value(0.0)
+    expression = terms[0]
+    for term in terms[1:]:
+        expression = expression + term
+    return Round(expression, 4)
+
+
+def recompute_total_scores(weights=None, chunk_size=RECOMPUTE_CHUNK_SIZE, progress=None):
+    """
+    Rewrites total_score for every match from its stored components, one
+    UPDATE per chunk of primary keys, and returns the number of rows updated.
+    progress(updated_so_far, last_pk) is called after each chunk.
+    """
+    if weights is None:
+        weights = get_active_weights()
+    expression = total_score_expression(weights)
+
+    bounds = CandidateJobMatch.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return 0
+
+    updated = 0
+    for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+        with transaction.atomic():
+            updated += CandidateJobMatch.objects.filter(
+                pk__gte=start, pk__lt=start + chunk_size
+            ).update(total_score=expression)
+        if progress:
+            progress(updated, start + chunk_size - 1)
+    return updated
@@ -197,6 +197,35 @@ CORS_ALLOW_CREDENTIALS = True
 
 FRONTEND_URL = "http://localhost:3000" #Change later
 
+
+# Matching engine
+# "skip" only scores candidate/job pairs sharing a skill, city, industry or title;
+# "score" falls back to scoring the full candidates x jobs product.
+MATCHING_ZERO_OVERLAP_FALLBACK = "skip"
+# Size of the per-job and per-candidate top match tables read by the dashboards
+MATCHING_TOP_K = 50
+# `manage.py matching_server` address, e.g. http://127.0.0.1:8765; unset means
+# recommendations are always computed from the database.
+MATCHING_SERVER_URL = os.getenv("MATCHING_SERVER_URL")
+MATCHING_SERVER_TIMEOUT = 0.05
+# Persisted, memory-mapped matching state: the TF-IDF job index and the engine
+# and matching_server snapshots (see matching/snapshots.py)
+MATCHING_INDEX_DIR = BASE_DIR / "matching_index"
+# Warm-start the engine from its snapshot, encoding only rows changed since
+MATCHING_ENGINE_SNAPSHOT = True
+# `manage.py process_matching_runs`: seconds without a checkpoint before a
+# running MatchingRun counts as abandoned and is resumed by the next worker
+MATCHING_RUN_TIMEOUT = 3600
+
+# Resume analysis
+# Load the NER model in the background at startup (e.g. in web workers) instead
+# of on the first application that needs it.
+RESUME_PARSER_WARMUP = os.getenv("RESUME_PARSER_WARMUP", "").lower() in ("1", "true", "yes")
+# `manage.py process_resume_queue`: seconds before a running analysis counts as
+# hung and is retried, and how many attempts it gets before it is marked failed
+RESUME_ANALYSIS_TIMEOUT = 300
+RESUME_ANALYSIS_MAX_ATTEMPTS = 3
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_USE_TLS = True
 EMAIL_HOST = os.getenv("EMAIL_HOST")
@@ -26,7 +26,7 @@ from applications.serializers import (
     ApplicationSerializer,
     ApplicationFlatSerializer
 )
-from matching.models import CandidateJobMatch
+from matching.models import JobTopMatch
 from matching.serializers import CandidateJobMatchSerializer
 
 from .models import Recruiter
@@ -159,6 +159,14 @@ class EmployerAnalyticsViewSet(viewsets.ViewSet):
         })
 
 
+def _top_matches(top_queryset):
+    """Resolves top-K projection rows to their CandidateJobMatch, best first."""
+    return [
+        top.match for top in
+        top_queryset.select_related('match__candidate__user', 'match__job_post').order_by('rank')
+    ]
+
+
 class RecruiterDashboardMatchesView(APIView):
     """Fetch top matched candidates for all jobs posted by a recruiter or a specific job."""
     permission_classes = [IsAuthenticated, IsRecruiterUser]
@@ -173,8 +181,8 @@ class RecruiterDashboardMatchesView(APIView):
             except JobPost.DoesNotExist:
                 return Response({'error': 'Job not found or not owned by recruiter.'}, status=404)
 
-            matches = CandidateJobMatch.objects.filter(job_post=job).order_by('-total_score')[:10]
-            serialized_matches = CandidateJobMatchSerializer(matches, many=True).data
+            top_matches = _top_matches(JobTopMatch.objects.filter(job_post=job, rank__lte=10))
+            serialized_matches = CandidateJobMatchSerializer(top_matches, many=True).data
             return Response({
                 'job_post': job.title,
                 'job_id': job.id,
@@ -183,10 +191,13 @@ class RecruiterDashboardMatchesView(APIView):
 
         # Otherwise, return matches for all jobs posted by recruiter
         job_posts = JobPost.objects.filter(recruiter=recruiter)
+        top_by_job = {}
+        for match in _top_matches(JobTopMatch.objects.filter(job_post__recruiter=recruiter, rank__lte=10)):
+            top_by_job.setdefault(match.job_post_id, []).append(match)
+
         results = []
         for job in job_posts:
-            matches = CandidateJobMatch.objects.filter(job_post=job).order_by('-total_score')[:10]
-            serialized_matches = CandidateJobMatchSerializer(matches, many=True).data
+            serialized_matches = CandidateJobMatchSerializer(top_by_job.get(job.id, []), many=True).data
             results.append({
                 'job_post': job.title,
                 'job_id': job.id,